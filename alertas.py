@@ -0,0 +1,130 @@
+"""
+GeoAlertAR - Cambios de nivel entre corridas, con histéresis.
+
+Compara el resultado nuevo con la instantánea anterior de `historico/` punto a
+punto (id = coordenadas redondeadas, como el estado FWI) y emite sólo los
+cambios de nivel: el feed es proporcional a lo que cambió, no a la cantidad de
+puntos.
+
+Histéresis: para subir de nivel el riesgo tiene que superar el umbral por
+`histeresis` puntos y para bajar, quedar `histeresis` puntos por debajo; así un
+punto que oscila alrededor de 75 no alterna ALTO/CRÍTICO en cada corrida. El
+nivel resultante se guarda en la columna `nivel_alerta` (que viaja en la
+instantánea y es la referencia de la corrida siguiente). Un punto sin datos
+conserva su nivel anterior: la falta de datos no des-escala.
+
+Cada cambio es una línea JSON:
+    {"fecha", "id", "nombre", "lat", "lon", "tipo": "escalamiento" | "desescalamiento",
+     "nivel_anterior", "nivel", "riesgo_anterior", "riesgo"}
+"""
+import glob
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import fwi
+from riesgo_vectorizado import UMBRALES, NIVEL_BAJO, NIVEL_SIN_DATOS, COBERTURA_MINIMA
+
+HISTERESIS = 3.0
+NIVELES = [NIVEL_BAJO] + [nivel for _, nivel in reversed(UMBRALES)]  # orden creciente
+_UMBRALES_ASCENDENTES = np.array([umbral for umbral, _ in reversed(UMBRALES)], dtype=np.float64)
+_INDICE_NIVEL = {nivel: i for i, nivel in enumerate(NIVELES)}
+
+
+def instantanea_anterior(carpeta, fecha):
+    """Ruta de la última riesgo_YYYY-MM-DD.csv anterior a `fecha` (date), o None."""
+    anteriores = []
+    for ruta in glob.glob(os.path.join(carpeta, 'riesgo_*.csv')):
+        encontrada = re.search(r'riesgo_(\d{4}-\d{2}-\d{2})\.csv$', ruta)
+        if encontrada and encontrada.group(1) < fecha.isoformat():
+            anteriores.append((encontrada.group(1), ruta))
+    return max(anteriores)[1] if anteriores else None
+
+
+def _indice_niveles(riesgo, desplazamiento):
+    """Cantidad de umbrales (desplazados) que supera el riesgo: 0 = BAJO ... 3 = CRÍTICO."""
+    return (np.asarray(riesgo, dtype=np.float64)[:, None] > _UMBRALES_ASCENDENTES + desplazamiento).sum(axis=1)
+
+
+def nivel_con_histeresis(riesgo, indice_anterior, histeresis=HISTERESIS):
+    """
+    Índice de nivel nuevo dado el anterior (-1 = sin nivel previo): sube si
+    supera el umbral + histeresis, baja si queda debajo del umbral - histeresis.
+    """
+    sube = _indice_niveles(riesgo, histeresis)
+    baja = _indice_niveles(riesgo, -histeresis)
+    sin_previo = indice_anterior < 0
+    return np.select([sin_previo, sube > indice_anterior, baja < indice_anterior],
+                     [_indice_niveles(riesgo, 0.0), sube, baja], default=indice_anterior)
+
+
+def diferenciar(df, anterior=None, fecha=None, histeresis=HISTERESIS):
+    """
+    Agrega `nivel_alerta` a `df` y devuelve (df, cambios) con los cambios de
+    nivel respecto de la instantánea `anterior` (DataFrame o None = primera corrida).
+    """
+    ids = fwi.ids_puntos(df['lat'], df['lon'])
+    riesgo = pd.to_numeric(df['riesgo_final'], errors='coerce').to_numpy(dtype=np.float64)
+    cobertura = df['cobertura'].to_numpy(dtype=np.float64) if 'cobertura' in df else np.ones(len(df))
+    sin_datos = np.isnan(riesgo) | (cobertura < COBERTURA_MINIMA)
+
+    indice_anterior = np.full(len(df), -1, dtype=np.int64)
+    riesgo_anterior = np.full(len(df), np.nan)
+    if anterior is not None and len(anterior):
+        columna = 'nivel_alerta' if 'nivel_alerta' in anterior else 'nivel'
+        previo = pd.DataFrame({
+            'id': fwi.ids_puntos(anterior['lat'], anterior['lon']),
+            'indice': anterior[columna].map(_INDICE_NIVEL).fillna(-1).astype(np.int64),
+            'riesgo': pd.to_numeric(anterior['riesgo_final'], errors='coerce'),
+        }).drop_duplicates('id').set_index('id')
+        alineado = previo.reindex(ids)
+        indice_anterior = alineado['indice'].fillna(-1).to_numpy(dtype=np.int64)
+        riesgo_anterior = alineado['riesgo'].to_numpy(dtype=np.float64)
+
+    indice = nivel_con_histeresis(np.nan_to_num(riesgo), indice_anterior, histeresis)
+    indice = np.where(sin_datos, indice_anterior, indice)
+    df = df.assign(nivel_alerta=[NIVELES[i] if i >= 0 else NIVEL_SIN_DATOS for i in indice])
+
+    if anterior is None:
+        return df, []
+    # sin nivel previo (punto nuevo) sólo se avisa si arranca por encima de BAJO
+    cambio = (indice != indice_anterior) & (indice >= 0) & ((indice_anterior >= 0) | (indice > 0))
+    cambios = []
+    for k in np.flatnonzero(cambio):
+        cambios.append({
+            'fecha': fecha.isoformat() if fecha else None,
+            'id': ids[k],
+            'nombre': df['nombre'].iloc[k] if 'nombre' in df else None,
+            'lat': float(df['lat'].iloc[k]), 'lon': float(df['lon'].iloc[k]),
+            'tipo': 'escalamiento' if indice[k] > indice_anterior[k] else 'desescalamiento',
+            'nivel_anterior': NIVELES[indice_anterior[k]] if indice_anterior[k] >= 0 else None,
+            'nivel': NIVELES[indice[k]],
+            'riesgo_anterior': None if np.isnan(riesgo_anterior[k]) else float(riesgo_anterior[k]),
+            'riesgo': float(riesgo[k]),
+        })
+    return df, cambios
+
+
+def escribir_cambios(cambios, ruta, acumulado=None, fecha=None):
+    """
+    Escribe el feed JSONL de esta corrida en `ruta` y lo agrega a `acumulado`
+    si se indica. Repetir una `fecha` (reintento de una corrida) reemplaza sus
+    líneas en `acumulado` en lugar de duplicarlas.
+    """
+    lineas = ''.join(json.dumps(c, ensure_ascii=False) + '\n' for c in cambios)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        f.write(lineas)
+    if acumulado:
+        os.makedirs(os.path.dirname(acumulado) or '.', exist_ok=True)
+        fecha = fecha.isoformat() if fecha else None
+        previas = []
+        if os.path.exists(acumulado):
+            with open(acumulado, 'r', encoding='utf-8') as f:
+                previas = [linea for linea in f if linea.strip() and json.loads(linea).get('fecha') != fecha]
+        temporal = acumulado + '.tmp'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            f.write(''.join(previas) + lineas)
+        os.replace(temporal, acumulado)
@@ -9,52 +9,293 @@ import ee
 import pandas as pd
 import geojson
 import os
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+import json
 import sys
+import argparse
+import warnings
+import numpy as np
 import requests
 
+from riesgo_vectorizado import (calcular_riesgo_y_cobertura, calcular_riesgo_vectorizado, clasificar_niveles,
+                                ventana_pico, a_float, normalizar_factor, cargar_perfil, re_puntuar_csv,
+                                PERFIL_BASE, COBERTURA_MINIMA, NIVEL_SIN_DATOS)
+from cubo_riesgo import escribir_cubo, rasterizar_puntos
+from publicacion import exportar_binario, publicar
+from exportacion_gee import exportar_y_esperar
+from contexto import ContextoEjecucion, clave_hash
+from cache_etapas import CacheEtapas
+import fwi
+from modelos_riesgo import MODELOS, crear_modelo, puntuar_modelos
+from suavizado import suavizar_riesgo
+from alertas import diferenciar, escribir_cambios, instantanea_anterior
+from cargador_puntos import (lotes_puntos, leer_puntos, huella_lote, geojson_lote, coordenadas_representativas,
+                             PROPIEDADES_NOMBRE)
+from tabla_puntos import TablaPuntos
+
 # --- CONFIGURACIÓN CON RUTA CORREGIDA ---
 PUNTOS_GEOJSON = 'datos_geo/puntos_cordoba.geojson' # <-- ¡LÍNEA CORREGIDA!
+LOTE_PUNTOS_GEE = 5000       # puntos por FeatureCollection enviada a GEE (y por entrada de cache)
 CARPETA_SALIDA = 'docs'
 ARCHIVO_SALIDA_CSV = os.path.join(CARPETA_SALIDA, 'riesgo_cordoba.csv')
+ARCHIVO_SALIDA_BIN = os.path.join(CARPETA_SALIDA, 'riesgo_cordoba.bin')
 GEE_PROJECT_ID = 'portafolio-aegis'
+CARPETA_HISTORICO = 'historico'  # una instantánea por fecha de referencia
+ARCHIVO_CAMBIOS = os.path.join(CARPETA_SALIDA, 'cambios_nivel.jsonl')           # cambios de esta corrida
+ARCHIVO_CAMBIOS_HISTORICO = os.path.join(CARPETA_HISTORICO, 'cambios_nivel.jsonl')  # todos, acumulados
+
+# --- CLIMA (Open-Meteo) ---
+URL_CLIMA_PRONOSTICO = "https://api.open-meteo.com/v1/forecast"
+URL_CLIMA_ARCHIVO = "https://archive-api.open-meteo.com/v1/archive"  # reanálisis, desde 1940
+DIAS_PASADOS_PRONOSTICO = 92  # el endpoint de pronóstico sólo guarda los últimos ~3 meses
+
+# --- PRONÓSTICO HORARIO ---
+ARCHIVO_PRONOSTICO = os.path.join(CARPETA_SALIDA, 'pronostico_riesgo.npz')
+DIAS_PRONOSTICO_MAX = 7      # horizonte de Open-Meteo que usamos
+PUNTOS_POR_LOTE_CLIMA = 50   # coordenadas por request (límite práctico de la URL)
+ZONA_HORARIA = 'America/Argentina/Cordoba'  # fija, para que todos los puntos compartan el eje de horas
+CARPETA_CUBO = os.path.join(CARPETA_SALIDA, 'cubo_pronostico')
+RESOLUCION_CUBO_GRADOS = 0.05
+
+# --- FWI (índice meteorológico canadiense) ---
+ARCHIVO_FWI_CSV = os.path.join(CARPETA_SALIDA, 'fwi_cordoba.csv')
+ARCHIVO_ESTADO_FWI = os.path.join(CARPETA_HISTORICO, 'fwi_estado.npz')  # códigos de humedad del último día
+DIAS_FWI_PONERSE_AL_DIA = 30  # más corridas salteadas que esto: los códigos se reinician
+
+# --- ESTADÍSTICAS ZONALES ---
+POLIGONOS_GEOJSON = os.path.join(CARPETA_SALIDA, 'layers', 'Areas_Protegidas_Poligono.geojson')
+ARCHIVO_ZONAS_CSV = os.path.join(CARPETA_SALIDA, 'riesgo_zonas.csv')
+FACTORES_SATELITALES = ('ndvi', 'nbr', 'lst_celsius', 'precip_60d_mm')
+FACTORES_CLIMA = ('humedad_min', 'viento_max_kmh')
+
+# --- EXTRACCIÓN SATELITAL ---
+# 'compuesto': mosaico del último píxel válido (sin nubes) de la ventana, armado una sola vez en el servidor.
+# 'ultima': la imagen más reciente tal cual (comportamiento original, suele venir nublada).
+# Las ventanas de fechas y los IDs de dataset viven en contexto.ContextoEjecucion.
+MODO_EXTRACCION = 'compuesto'
+
+# --- DATOS FALTANTES ---
+# Los valores faltantes viajan como null/NaN (nunca 0) y se renormalizan los pesos.
+# Con menos cobertura que COBERTURA_MINIMA (riesgo_vectorizado) el punto se marca
+# como NIVEL_SIN_DATOS.
+
+
+# --- REDUCCIONES (puntos y polígonos) ---
+ESCALA_REDUCCION = 1000      # metros
+TILE_SCALE = 1               # >1 reparte la reducción en más tiles (menos memoria por tile)
+BEST_EFFORT = False          # True: GEE sube la escala solo si hay demasiados píxeles
+MAX_PIXELES = 1e9
+ESCALA_MAXIMA = 16000        # tope de la escalada automática
+TILE_SCALE_MAXIMO = 16
+# Fragmentos (en minúscula) de errores de GEE que se resuelven reduciendo más grueso
+ERRORES_RECUPERABLES = ('computation timed out', 'too many pixels', 'user memory limit exceeded',
+                        'output of image computation is too large')
+
+
+def url_clima(fecha_inicio, hoy=None):
+    """
+    Endpoint de Open-Meteo para datos desde `fecha_inicio`: el de pronóstico si
+    todavía los guarda, si no el archivo histórico (mismos parámetros y respuesta).
+    """
+    hoy = hoy or date.today()
+    if fecha_inicio < hoy - timedelta(days=DIAS_PASADOS_PRONOSTICO):
+        return URL_CLIMA_ARCHIVO
+    return URL_CLIMA_PRONOSTICO
+
+
+def reducir_region(imagen, geometria, escala=ESCALA_REDUCCION, tile_scale=TILE_SCALE, reductor=None):
+    """reduceRegion con los parámetros configurables de escala/tileScale/bestEffort."""
+    return imagen.reduceRegion(
+        reducer=reductor or ee.Reducer.mean(),
+        geometry=geometria,
+        scale=escala,
+        tileScale=tile_scale,
+        bestEffort=BEST_EFFORT,
+        maxPixels=MAX_PIXELES
+    )
+
 
-def analizar_punto_en_servidor_gee(punto):
-    fecha_fin = ee.Date(datetime.now()).advance(-2, 'day')
-    fecha_inicio = fecha_fin.advance(-30, 'day')
+def obtener_con_escala_adaptativa(construir, escala=ESCALA_REDUCCION, tile_scale=TILE_SCALE, obtener=None):
+    """
+    Ejecuta `obtener(construir(escala, tile_scale))` (por defecto `.getInfo()`).
+    Si GEE corta por tiempo, memoria o cantidad de píxeles, reintenta con escala
+    y tileScale duplicados hasta ESCALA_MAXIMA / TILE_SCALE_MAXIMO.
+    """
+    obtener = obtener or (lambda objeto: objeto.getInfo())
+    while True:
+        try:
+            return obtener(construir(escala, tile_scale))
+        except ee.EEException as e:
+            mensaje = str(e).lower()
+            if not any(fragmento in mensaje for fragmento in ERRORES_RECUPERABLES):
+                raise
+            if escala >= ESCALA_MAXIMA and tile_scale >= TILE_SCALE_MAXIMO:
+                raise
+            escala = min(escala * 2, ESCALA_MAXIMA)
+            tile_scale = min(tile_scale * 2, TILE_SCALE_MAXIMO)
+            print(f"  -> GEE: {e}. Reintentando con escala={escala} m, tileScale={tile_scale}...")
+
+
+def imagen_o_vacia(imagen, bandas):
+    """`imagen` si existe; si no, una imagen totalmente enmascarada con las mismas bandas."""
+    vacia = ee.Image.constant([0] * len(bandas)).rename(bandas).updateMask(0)
+    return ee.Image(ee.Algorithms.If(imagen, imagen, vacia))
+
+
+def reductor_puntual(estadisticas_extra=False):
+    """mean() solo, o mean + stdDev + count combinados (claves <banda>_mean, ...)."""
+    reductor = ee.Reducer.mean()
+    if estadisticas_extra:
+        reductor = (reductor
+                    .combine(ee.Reducer.stdDev(), sharedInputs=True)
+                    .combine(ee.Reducer.count(), sharedInputs=True))
+    return reductor
+
+
+def reducir_factores(imagen, punto, escala, tile_scale, estadisticas_extra=False):
+    """
+    Una sola reducción por feature sobre la imagen apilada de factores.
+    Con estadísticas extra, las medias quedan con el nombre del factor y se
+    agregan <factor>_stdDev y <factor>_count.
+    """
+    valores = reducir_region(imagen.select(list(FACTORES_SATELITALES)), punto.geometry(),
+                             escala, tile_scale, reductor_puntual(estadisticas_extra))
+    if estadisticas_extra:
+        medias = [f"{factor}_mean" for factor in FACTORES_SATELITALES]
+        valores = valores.rename(medias, list(FACTORES_SATELITALES))
+    # sin píxel válido la reducción devuelve null: se propaga como null
+    return punto.set(valores)
+
+
+def analizar_punto_en_servidor_gee(punto, contexto, escala=ESCALA_REDUCCION, tile_scale=TILE_SCALE, estadisticas_extra=False):
+    fecha_fin = ee.Date(contexto.fecha_fin.isoformat())
+    fecha_inicio = ee.Date(contexto.fecha_inicio_satelital.isoformat())
     rango_fechas = ee.DateRange(fecha_inicio, fecha_fin)
 
-    def obtener_valor_seguro(coleccion, banda, factor_escala=1):
-        imagen = coleccion.filterBounds(punto.geometry()).filterDate(rango_fechas).sort('system:time_start', False).first()
-        def calcular_valor(img):
-            valor_raw = img.select(banda).reduceRegion(ee.Reducer.mean(), punto.geometry(), 1000).get(banda)
-            return ee.Algorithms.If(valor_raw, ee.Number(valor_raw).multiply(factor_escala), 0)
-        return ee.Algorithms.If(imagen, calcular_valor(imagen), 0)
-
-    coleccion_lst = ee.ImageCollection('MODIS/061/MOD11A1')
-    lst_kelvin = obtener_valor_seguro(coleccion_lst, 'LST_Day_1km', 0.02)
-    lst_celsius = ee.Algorithms.If(ee.Number(lst_kelvin).gt(0), ee.Number(lst_kelvin).subtract(273.15), 0)
-    
-    coleccion_reflectancia = ee.ImageCollection('MODIS/061/MOD09GA')
-    imagen_reflectancia = coleccion_reflectancia.filterBounds(punto.geometry()).filterDate(rango_fechas).sort('system:time_start', False).first()
-    def calcular_indices(img):
-        ndvi = img.normalizedDifference(['sur_refl_b02', 'sur_refl_b01']).rename('ndvi')
-        nbr = img.normalizedDifference(['sur_refl_b02', 'sur_refl_b07']).rename('nbr')
-        valor_ndvi = ndvi.reduceRegion(ee.Reducer.mean(), punto.geometry(), 1000).get('ndvi')
-        valor_nbr = nbr.reduceRegion(ee.Reducer.mean(), punto.geometry(), 1000).get('nbr')
-        return ee.Dictionary({'ndvi': ee.Algorithms.If(valor_ndvi, valor_ndvi, 0), 'nbr': ee.Algorithms.If(valor_nbr, valor_nbr, 0)})
-    indices = ee.Dictionary(ee.Algorithms.If(imagen_reflectancia, calcular_indices(imagen_reflectancia), {'ndvi': 0, 'nbr': 0}))
-
-    coleccion_precip = ee.ImageCollection('UCSB-CHG/CHIRPS/PENTAD')
-    fecha_inicio_precip = fecha_fin.advance(-60, 'day')
-    imagen_precip_total = coleccion_precip.filterDate(fecha_inicio_precip, fecha_fin).sum().rename('precip')
-    precip_mm = obtener_valor_seguro(ee.ImageCollection(imagen_precip_total), 'precip')
-
-    return punto.set({'ndvi': indices.get('ndvi'), 'nbr': indices.get('nbr'), 'lst_celsius': lst_celsius, 'precip_60d_mm': precip_mm})
+    def ultima_imagen(coleccion):
+        return coleccion.filterBounds(punto.geometry()).filterDate(rango_fechas).sort('system:time_start', False).first()
+
+    imagen_lst = ultima_imagen(ee.ImageCollection(contexto.datasets['lst']))
+    lst = imagen_o_vacia(imagen_lst, ['LST_Day_1km']).select('LST_Day_1km')
+    # LST = 0 (relleno) se enmascara para que no se convierta en -273 °C
+    lst_celsius = lst.updateMask(lst.gt(0)).multiply(0.02).subtract(273.15).rename('lst_celsius')
+
+    imagen_reflectancia = ultima_imagen(ee.ImageCollection(contexto.datasets['reflectancia']))
+    reflectancia = imagen_o_vacia(imagen_reflectancia, ['sur_refl_b01', 'sur_refl_b02', 'sur_refl_b07'])
+    ndvi = reflectancia.normalizedDifference(['sur_refl_b02', 'sur_refl_b01']).rename('ndvi')
+    nbr = reflectancia.normalizedDifference(['sur_refl_b02', 'sur_refl_b07']).rename('nbr')
+
+    coleccion_precip = ee.ImageCollection(contexto.datasets['precip'])
+    fecha_inicio_precip = ee.Date(contexto.fecha_inicio_precip.isoformat())
+    precip = coleccion_precip.filterDate(fecha_inicio_precip, fecha_fin).sum().rename('precip_60d_mm')
+
+    apilada = ee.Image.cat([ndvi, nbr, lst_celsius, precip])
+    return reducir_factores(apilada, punto, escala, tile_scale, estadisticas_extra)
+
+
+def enmascarar_nubes_mod09(img):
+    # state_1km: bits 0-1 estado de nubes (00 = despejado), bit 2 sombra, bit 10 nube interna
+    qa = img.select('state_1km')
+    despejado = (qa.bitwiseAnd(3).eq(0)
+                 .And(qa.bitwiseAnd(1 << 2).eq(0))
+                 .And(qa.bitwiseAnd(1 << 10).eq(0)))
+    return img.updateMask(despejado)
+
+
+def enmascarar_calidad_lst(img):
+    # QC_Day: bits 0-1 = 00 buena calidad, 01 otra calidad; 10/11 no producido (nubes)
+    return img.updateMask(img.select('QC_Day').bitwiseAnd(3).lt(2))
+
+
+def construir_compuesto_satelital(contexto):
+    """
+    Imagen con bandas ndvi, nbr, lst_celsius y precip_60d_mm donde cada píxel
+    tiene el último valor válido (sin nubes) de la ventana del `contexto`. Se
+    arma una sola vez y todos los puntos se reducen contra ella.
+    """
+    fecha_fin = ee.Date(contexto.fecha_fin.isoformat())
+    fecha_inicio = ee.Date(contexto.fecha_inicio_satelital.isoformat())
+
+    # sort ascendente + mosaic(): la imagen más nueva queda arriba y los huecos
+    # enmascarados se completan con la anterior válida
+    def indices(img):
+        return ee.Image.cat([
+            img.normalizedDifference(['sur_refl_b02', 'sur_refl_b01']).rename('ndvi'),
+            img.normalizedDifference(['sur_refl_b02', 'sur_refl_b07']).rename('nbr'),
+        ]).copyProperties(img, ['system:time_start'])
+    reflectancia = (ee.ImageCollection(contexto.datasets['reflectancia'])
+                    .filterDate(fecha_inicio, fecha_fin)
+                    .map(enmascarar_nubes_mod09)
+                    .map(indices)
+                    .sort('system:time_start')
+                    .mosaic())
+
+    lst = (ee.ImageCollection(contexto.datasets['lst'])
+           .filterDate(fecha_inicio, fecha_fin)
+           .map(enmascarar_calidad_lst)
+           .select('LST_Day_1km')
+           .sort('system:time_start')
+           .mosaic()
+           .multiply(0.02).subtract(273.15)
+           .rename('lst_celsius'))
+
+    precip = (ee.ImageCollection(contexto.datasets['precip'])
+              .filterDate(ee.Date(contexto.fecha_inicio_precip.isoformat()), fecha_fin)
+              .sum()
+              .rename('precip_60d_mm'))
+
+    return ee.Image.cat([reflectancia, lst, precip])
+
+
+def analizar_punto_compuesto(compuesto, escala=ESCALA_REDUCCION, tile_scale=TILE_SCALE, estadisticas_extra=False):
+    """Devuelve la función para `FeatureCollection.map` que reduce cada punto contra `compuesto`."""
+    def analizar(punto):
+        return reducir_factores(compuesto, punto, escala, tile_scale, estadisticas_extra)
+    return analizar
+
+
+def imagen_riesgo_satelital(compuesto, perfil=PERFIL_BASE):
+    """
+    Por píxel, la parte satelital del índice: `suma_satelital` = Σ peso·riesgo del
+    factor y `peso_satelital` = Σ pesos con dato. Como el índice es lineal, su
+    media areal más los términos de clima da el riesgo areal ponderado.
+    """
+    pesos_perfil, rangos = perfil['pesos'], perfil['rangos']
+    suma = ee.Image.constant(0)
+    pesos = ee.Image.constant(0)
+    for factor in FACTORES_SATELITALES:
+        minimo, amplitud, invertido = rangos[factor]
+        r = compuesto.select(factor).subtract(minimo).divide(amplitud).clamp(0, 1)
+        if invertido:
+            r = ee.Image.constant(1).subtract(r)
+        suma = suma.add(r.multiply(pesos_perfil[factor]).unmask(0))
+        pesos = pesos.add(r.mask().gt(0).multiply(pesos_perfil[factor]).unmask(0))
+    return ee.Image.cat([suma.rename('suma_satelital'), pesos.rename('peso_satelital')])
+
+
+def reductor_zonal():
+    """media + p90 + máximo en un único reductor combinado."""
+    return (ee.Reducer.mean()
+            .combine(ee.Reducer.percentile([90]), sharedInputs=True)
+            .combine(ee.Reducer.max(), sharedInputs=True))
 
 
 class AnalizadorHackathon:
-    def __init__(self):
+    def __init__(self, contexto=None, puntos_geojson=PUNTOS_GEOJSON,
+                 escala=ESCALA_REDUCCION, tile_scale=TILE_SCALE, estadisticas_extra=False,
+                 bucket_exportacion=None, cache=None, perfil=None, modelos=(), radio_suavizado=None):
+        # Fecha de referencia, ventanas y datasets: nada depende de datetime.now() más abajo
+        self.contexto = contexto or ContextoEjecucion.para_fecha(modo_extraccion=MODO_EXTRACCION)
+        self.modo_extraccion = self.contexto.modo_extraccion
+        self.cache = cache or CacheEtapas()
+        self.perfil = perfil or PERFIL_BASE  # pesos y rangos del índice (ver perfiles_riesgo.json)
+        self.bucket_exportacion = bucket_exportacion  # si se define, Export.table en lugar de getInfo()
+        self.estadisticas_extra = estadisticas_extra
+        self.modelos = tuple(modelos)  # modelos extra de modelos_riesgo, una columna riesgo_<modelo> c/u
+        self.radio_suavizado = radio_suavizado  # km; None = sin suavizado espacial
+        self.puntos_geojson = puntos_geojson
+        self.escala = escala
+        self.tile_scale = tile_scale
         self._inicializar_gee()
 
     def _inicializar_gee(self):
@@ -67,11 +308,14 @@ class AnalizadorHackathon:
 
     def obtener_datos_climaticos(self, lat, lon):
         try:
-            URL = "https://api.open-meteo.com/v1/forecast"
+            URL = url_clima(self.contexto.fecha_referencia)
             params = {
                 "latitude": lat, "longitude": lon,
                 "daily": "relative_humidity_2m_min,wind_speed_10m_max",
-                "wind_speed_unit": "kmh", "timezone": "auto", "forecast_days": 1
+                "wind_speed_unit": "kmh", "timezone": "auto",
+                # día explícito en lugar de forecast_days=1: la corrida no depende de cuándo se ejecuta
+                "start_date": self.contexto.fecha_referencia.isoformat(),
+                "end_date": self.contexto.fecha_referencia.isoformat()
             }
             response = requests.get(URL, params=params)
             response.raise_for_status()
@@ -82,92 +326,512 @@ class AnalizadorHackathon:
             }
         except Exception as e:
             print(f"  -> Error de clima: {e}")
-            return {'humedad_min': None, 'viento_max_kmh': None}
+            return {'humedad_min': np.nan, 'viento_max_kmh': np.nan}
+
+    def obtener_pronostico_horario(self, lats, lons, dias=DIAS_PRONOSTICO_MAX):
+        """
+        Pide a Open-Meteo humedad, viento y temperatura horarios para muchos puntos,
+        agrupando las coordenadas en lotes (una request por lote).
+        Devuelve (horas, humedad, viento, temperatura) con matrices (puntos × horas);
+        los lotes que fallan quedan en NaN.
+        """
+        dias = max(1, min(int(dias), DIAS_PRONOSTICO_MAX))
+        horas, clima = self.obtener_clima_horario(
+            lats, lons, ('relative_humidity_2m', 'wind_speed_10m', 'temperature_2m'),
+            self.contexto.fecha_referencia, dias)
+        return horas, clima['relative_humidity_2m'], clima['wind_speed_10m'], clima['temperature_2m']
+
+    def obtener_clima_horario(self, lats, lons, variables, fecha_inicio, dias):
+        """
+        Variables horarias de Open-Meteo desde `fecha_inicio` por `dias` días
+        (pasados o futuros), en lotes de PUNTOS_POR_LOTE_CLIMA coordenadas.
+        Devuelve (horas, dict variable -> matriz puntos × horas, NaN si el lote falla).
+        """
+        n_horas = dias * 24
+        clima = {v: np.full((len(lats), n_horas), np.nan, dtype=np.float32) for v in variables}
+        horas = None
+
+        URL = url_clima(fecha_inicio)
+        for inicio in range(0, len(lats), PUNTOS_POR_LOTE_CLIMA):
+            fin = min(inicio + PUNTOS_POR_LOTE_CLIMA, len(lats))
+            print(f"  Lote clima {inicio + 1}-{fin} de {len(lats)}...", end="\r")
+            params = {
+                "latitude": ",".join(str(v) for v in lats[inicio:fin]),
+                "longitude": ",".join(str(v) for v in lons[inicio:fin]),
+                "hourly": ",".join(variables),
+                "wind_speed_unit": "kmh", "timezone": ZONA_HORARIA,
+                "start_date": fecha_inicio.isoformat(),
+                "end_date": (fecha_inicio + timedelta(days=dias - 1)).isoformat()
+            }
+            try:
+                response = requests.get(URL, params=params)
+                response.raise_for_status()
+                data = response.json()
+            except Exception as e:
+                print(f"  -> Error de clima en lote {inicio + 1}-{fin}: {e}")
+                continue
+            # Con una sola coordenada Open-Meteo devuelve un objeto en lugar de una lista
+            if isinstance(data, dict):
+                data = [data]
+            if horas is None:
+                # eje fijo (hora local de ZONA_HORARIA desde fecha_inicio), no el de la primera ubicación
+                horas = np.datetime64(fecha_inicio, 'D') + np.arange(n_horas).astype('timedelta64[h]')
+            for j, ubicacion in enumerate(data):
+                hourly = ubicacion['hourly']
+                for variable in variables:
+                    # Open-Meteo devuelve null en horas sin dato; si trae menos horas, el resto queda NaN
+                    valores = a_float(hourly[variable][:n_horas])
+                    clima[variable][inicio + j, :len(valores)] = valores
+        print()
+        return horas, clima
 
     def calcular_riesgo_local(self, props):
-        ndvi = props.get('ndvi', 0)
-        nbr = props.get('nbr', 0)
-        lst = props.get('lst_celsius', 0)
-        precip = props.get('precip_60d_mm', 0)
-        humedad = props.get('humedad_min', 100)
-        viento = props.get('viento_max_kmh', 0)
-
-        riesgo_ndvi = 1 - max(0, min(1, (ndvi - 0.1) / 0.5))
-        riesgo_nbr = 1 - max(0, min(1, (nbr - 0.0) / 0.5))
-        riesgo_lst = max(0, min(1, (lst - 15) / 30))
-        riesgo_precip = 1 - max(0, min(1, (precip - 10) / 140))
-        riesgo_humedad = 1 - max(0, min(1, (humedad - 15) / 65))
-        riesgo_viento = max(0, min(1, (viento - 10) / 50))
-        
-        riesgo_final = (riesgo_nbr * 0.25 + 
-                        riesgo_precip * 0.10 + 
-                        riesgo_humedad * 0.30 +
-                        riesgo_viento * 0.25 +
-                        riesgo_lst * 0.05 +
-                        riesgo_ndvi * 0.05) * 100
-        
-        return round(riesgo_final, 1)
+        """Riesgo 0-100 de un punto; los factores ausentes o None no cuentan (NaN si no hay ninguno)."""
+        return round(float(calcular_riesgo_vectorizado(props, self.perfil)), 1)
 
-    def clasificar_nivel(self, riesgo):
+    def clasificar_nivel(self, riesgo, cobertura=1.0):
+        if np.isnan(riesgo) or cobertura < COBERTURA_MINIMA: return NIVEL_SIN_DATOS
         if riesgo > 75: return "CRÍTICO"
         if riesgo > 50: return "ALTO"
         if riesgo > 25: return "MODERADO"
         return "BAJO"
 
-    def ejecutar(self):
-        print("\n🛰️  Iniciando análisis v4.1 (Ruta Corregida)...")
-        
+    def _lotes_puntos(self):
+        """Lotes compactos (ids, lon, lat) leídos en streaming del archivo de puntos."""
+        try:
+            yield from lotes_puntos(self.puntos_geojson, LOTE_PUNTOS_GEE)
+        except FileNotFoundError:
+            print(f"❌ ERROR CRÍTICO: No se encontró '{self.puntos_geojson}'. Verifica la ruta.")
+            sys.exit(1)
+
+    def _cargar_puntos(self):
         try:
-            with open(PUNTOS_GEOJSON, 'r', encoding='utf-8') as f:
-                puntos_locales = geojson.load(f)
-            print(f"✔️  {len(puntos_locales['features'])} puntos de análisis cargados.")
+            puntos = leer_puntos(self.puntos_geojson)
         except FileNotFoundError:
-            print(f"❌ ERROR CRÍTICO: No se encontró '{PUNTOS_GEOJSON}'. Verifica la ruta.")
+            print(f"❌ ERROR CRÍTICO: No se encontró '{self.puntos_geojson}'. Verifica la ruta.")
             sys.exit(1)
+        print(f"✔️  {len(puntos.ids)} puntos de análisis cargados.")
+        return puntos
 
-        puntos_gee = ee.FeatureCollection(puntos_locales)
-        print("⚙️  Enviando trabajo a Google Earth Engine...")
-        resultados_gee = puntos_gee.map(analizar_punto_en_servidor_gee)
-        print("📥 Descargando resultados de GEE...")
-        resultados_procesados = resultados_gee.getInfo()
+    def _columnas_gee(self):
+        """Propiedades que devuelve GEE por punto (los factores, más desvío y conteo si se piden)."""
+        columnas = FACTORES_SATELITALES
+        if self.estadisticas_extra:
+            columnas += tuple(f"{f}_{e}" for f in FACTORES_SATELITALES for e in ('stdDev', 'count'))
+        return columnas
+
+    def _extraer_factores_satelitales(self):
+        """
+        (clave, TablaPuntos) con los factores GEE de todos los puntos: cada lote
+        se consulta, se pasa a columnas y se cachea por separado, así nunca hay
+        más de un lote como features GeoJSON en memoria.
+        """
+        columnas = self._columnas_gee()
+        claves, tablas = [], []
+        for lote in self._lotes_puntos():
+            clave = self.contexto.clave('gee', huella_lote(lote), self.escala, self.tile_scale, columnas)
+            tablas.append(self.cache.obtener_o_calcular(
+                'gee', clave, lambda: TablaPuntos.desde_features(self._consultar_gee(lote, clave)['features'], columnas)))
+            claves.append(clave)
+        tabla = TablaPuntos.concatenar(tablas, columnas)
+        print(f"✔️  {len(tabla)} puntos de análisis procesados en {len(claves)} lotes.")
+        return clave_hash('gee', claves), tabla
+
+    def _consultar_gee(self, lote, clave):
+        puntos_gee = ee.FeatureCollection(geojson_lote(lote))
+        print(f"⚙️  Enviando {len(lote.ids)} puntos a Google Earth Engine (modo '{self.modo_extraccion}')...")
+        compuesto = construir_compuesto_satelital(self.contexto) if self.modo_extraccion == 'compuesto' else None
+
+        def construir(escala, tile_scale):
+            if compuesto is not None:
+                return puntos_gee.map(analizar_punto_compuesto(compuesto, escala, tile_scale, self.estadisticas_extra))
+            return puntos_gee.map(lambda punto: analizar_punto_en_servidor_gee(punto, self.contexto, escala, tile_scale,
+                                                                               self.estadisticas_extra))
+
+        obtener = None
+        if self.bucket_exportacion:
+            prefijo = f"geoalertar/factores_{clave[:16]}"
+            obtener = lambda coleccion: exportar_y_esperar(coleccion, self.bucket_exportacion, prefijo)
+            print(f"📤 Modo batch: exportando a gs://{self.bucket_exportacion}/{prefijo}.geojson")
+        else:
+            print("📥 Descargando resultados de GEE...")
+        return obtener_con_escala_adaptativa(construir, self.escala, self.tile_scale, obtener)
+
+    def _obtener_clima_puntos(self, lats, lons):
+        """Humedad mínima y viento máximo del día por punto, como columnas (NaN si falló)."""
+        clima = {factor: np.full(len(lats), np.nan) for factor in FACTORES_CLIMA}
+        for i, (lat, lon) in enumerate(zip(lats.tolist(), lons.tolist())):
+            print(f"  [{i+1}/{len(lats)}] Procesando clima...", end="\r")
+            for factor, valor in self.obtener_datos_climaticos(lat, lon).items():
+                clima[factor][i] = a_float(valor)
+        print()
+        return clima
+
+    @staticmethod
+    def _factores(tabla, clima):
+        """Factores sin redondear (y coordenadas) por punto, tal como entran al cálculo de riesgo."""
+        factores = {columna: tabla[columna] for columna in ('lat', 'lon') + FACTORES_SATELITALES}
+        factores.update(clima)
+        return factores
+
+    def _puntuar(self, tabla, clima):
+        """Riesgo, nivel y cobertura de todos los puntos en una pasada sobre las columnas."""
+        riesgo, cobertura = calcular_riesgo_y_cobertura(self._factores(tabla, clima), self.perfil)
+        riesgo, cobertura = np.round(riesgo, 1), np.round(cobertura, 2)
+
+        columnas = {
+            'ndvi': np.round(tabla['ndvi'], 3), 'nbr': np.round(tabla['nbr'], 3),
+            'lst_celsius': np.round(tabla['lst_celsius'], 1), 'precip_60d_mm': np.round(tabla['precip_60d_mm'], 1),
+            **clima,
+            'riesgo_final': riesgo, 'nivel': clasificar_niveles(riesgo, cobertura), 'cobertura': cobertura,
+        }
+        if self.estadisticas_extra:
+            for factor in FACTORES_SATELITALES:
+                columnas[f"{factor}_stddev"] = np.round(tabla[f"{factor}_stdDev"], 3)
+                columnas[f"{factor}_pixeles"] = pd.array(np.round(tabla[f"{factor}_count"]), dtype='Int64')
+        return tabla.a_dataframe(('nombre', 'lat', 'lon'), **columnas)
+
+    def ejecutar(self, binario=False):
+        print("\n🛰️  Iniciando análisis v4.1 (Ruta Corregida)...")
         
-        print("🌦️  Obteniendo datos de clima y calculando riesgo final...")
-        lista_final = []
-        for i, punto in enumerate(resultados_procesados['features']):
-            nombre = punto['properties']['nombre']
-            print(f"  [{i+1}/{len(resultados_procesados['features'])}] Procesando clima para {nombre}...", end="\r")
-            
-            props = punto['properties']
-            coords = punto['geometry']['coordinates']
-            
-            datos_clima = self.obtener_datos_climaticos(coords[1], coords[0])
-            
-            props_completas = {**props, **datos_clima}
-            
-            riesgo = self.calcular_riesgo_local(props_completas)
-            nivel = self.clasificar_nivel(riesgo)
-            
-            lista_final.append({
-                'nombre': props.get('nombre'),
-                'lat': coords[1], 'lon': coords[0],
-                'ndvi': round(props.get('ndvi', 0), 3),
-                'nbr': round(props.get('nbr', 0), 3),
-                'lst_celsius': round(props.get('lst_celsius', 0), 1),
-                'precip_60d_mm': round(props.get('precip_60d_mm', 0), 1),
-                'humedad_min': datos_clima.get('humedad_min'),
-                'viento_max_kmh': datos_clima.get('viento_max_kmh'),
-                'riesgo_final': riesgo, 'nivel': nivel
-            })
-        print("\n")
+        # Cada etapa se cachea por el hash de sus entradas; la clave de cada una
+        # incluye la anterior, así una corrida repetida arranca en la primera invalidada.
+        clave_gee, tabla = self._extraer_factores_satelitales()
+
+        print("🌦️  Obteniendo datos de clima...")
+        clave_clima = self.contexto.clave_clima(tabla.huella(('lat', 'lon')))
+        # con algún punto sin clima no se cachea: la próxima corrida reintenta
+        clima = self.cache.obtener_o_calcular(
+            'clima', clave_clima, lambda: self._obtener_clima_puntos(tabla['lat'], tabla['lon']),
+            es_valido=lambda clima: not any(np.isnan(valores).any() for valores in clima.values()))
+
+        print("🧮 Calculando riesgo final...")
+        clave_puntuacion = clave_hash('puntuacion', clave_gee, clave_clima, self.perfil,
+                                      COBERTURA_MINIMA, self.estadisticas_extra)
+        df = self.cache.obtener_o_calcular('puntuacion', clave_puntuacion,
+                                           lambda: self._puntuar(tabla, clima))
+        if self.modelos:
+            df = self._puntuar_modelos(df, tabla, clima)
+        if self.radio_suavizado:
+            df = self._suavizar(df)
         if not os.path.exists(CARPETA_SALIDA):
             os.makedirs(CARPETA_SALIDA)
+        df = self._diferenciar_niveles(df)
         
-        df = pd.DataFrame(lista_final)
         df.to_csv(ARCHIVO_SALIDA_CSV, index=False)
         print(f"✅ Análisis completo. Resultados guardados en '{ARCHIVO_SALIDA_CSV}'.")
+        if binario:
+            exportar_binario(df, ARCHIVO_SALIDA_BIN)
+            print(f"📦 Versión binaria compacta en '{ARCHIVO_SALIDA_BIN}'.")
+        else:
+            # el mapa prioriza el binario: no dejar uno viejo tapando al CSV nuevo
+            for ruta in (ARCHIVO_SALIDA_BIN, ARCHIVO_SALIDA_BIN + '.gz', ARCHIVO_SALIDA_BIN + '.br'):
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+        publicar(df, CARPETA_SALIDA, [ARCHIVO_SALIDA_CSV, ARCHIVO_SALIDA_BIN], self.contexto.como_dict())
+        print(f"🗜️  Variantes comprimidas y manifiesto en '{CARPETA_SALIDA}/manifiesto.json'.")
+        self._guardar_instantanea(df)
         print("\n📈 Resumen de Riesgos:")
         print(df['nivel'].value_counts())
 
+    def _puntuar_modelos(self, df, tabla, clima):
+        """
+        Una columna riesgo_<modelo> por modelo pedido, sobre los mismos arrays de
+        factores que riesgo_final (no las columnas redondeadas del CSV).
+        """
+        print(f"🧮 Modelos lado a lado: {', '.join(self.modelos)}...")
+        factores = self._factores(tabla, clima)
+        opciones = {'perfil': self.perfil, 'contexto': self.contexto, 'ruta_estado_fwi': ARCHIVO_ESTADO_FWI}
+        modelos = [crear_modelo(nombre, **opciones) for nombre in self.modelos]
+        return df.assign(**puntuar_modelos(modelos, factores))
+
+    def _suavizar(self, df):
+        """Riesgo y nivel suavizados por vecindario, más la marca de máximo local."""
+        print(f"🧽 Suavizando riesgo con vecinos a {self.radio_suavizado} km...")
+        riesgo = pd.to_numeric(df['riesgo_final'], errors='coerce').to_numpy(dtype=np.float64)
+        suave, maximo = suavizar_riesgo(riesgo, df['lat'].to_numpy(), df['lon'].to_numpy(), self.radio_suavizado)
+        cobertura = df['cobertura'].to_numpy(dtype=np.float64) if 'cobertura' in df else 1.0
+        return df.assign(riesgo_suavizado=np.round(suave, 1),
+                         nivel_suavizado=clasificar_niveles(suave, cobertura),
+                         maximo_local=maximo)
+
+    def _diferenciar_niveles(self, df):
+        """Cambios de nivel contra la instantánea anterior -> ARCHIVO_CAMBIOS (JSON lines)."""
+        ruta_anterior = instantanea_anterior(CARPETA_HISTORICO, self.contexto.fecha_referencia)
+        anterior = pd.read_csv(ruta_anterior) if ruta_anterior else None
+        df, cambios = diferenciar(df, anterior, self.contexto.fecha_referencia)
+        escribir_cambios(cambios, ARCHIVO_CAMBIOS, ARCHIVO_CAMBIOS_HISTORICO, self.contexto.fecha_referencia)
+        if ruta_anterior is None:
+            print("🔔 Sin instantánea anterior: esta corrida queda como referencia de niveles.")
+        else:
+            suben = sum(c['tipo'] == 'escalamiento' for c in cambios)
+            print(f"🔔 {suben} escalamientos y {len(cambios) - suben} desescalamientos desde "
+                  f"'{ruta_anterior}' -> '{ARCHIVO_CAMBIOS}'.")
+        return df
+
+    def _guardar_instantanea(self, df):
+        """Copia fechada del resultado + el contexto que lo produjo (para reproducir la corrida)."""
+        os.makedirs(CARPETA_HISTORICO, exist_ok=True)
+        base = os.path.join(CARPETA_HISTORICO, f"riesgo_{self.contexto.fecha_referencia.isoformat()}")
+        df.to_csv(base + '.csv', index=False)
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'contexto': self.contexto.como_dict(), 'clave': self.contexto.clave()}, f, indent=2)
+        print(f"🗂️  Instantánea guardada en '{base}.csv'.")
+
+    def ejecutar_zonas(self, ruta_poligonos=POLIGONOS_GEOJSON):
+        """
+        Estadísticas zonales por polígono (media, p90 y máximo de cada factor) y
+        riesgo areal ponderado, en un único reduceRegions sobre todas las zonas.
+        Guarda el ranking en ARCHIVO_ZONAS_CSV.
+        """
+        print(f"\n🗺️  Iniciando análisis zonal de '{ruta_poligonos}'...")
+        try:
+            with open(ruta_poligonos, 'r', encoding='utf-8') as f:
+                poligonos = geojson.load(f)
+        except FileNotFoundError:
+            print(f"❌ ERROR CRÍTICO: No se encontró '{ruta_poligonos}'. Verifica la ruta.")
+            sys.exit(1)
+        print(f"✔️  {len(poligonos['features'])} zonas cargadas.")
+
+        compuesto = construir_compuesto_satelital(self.contexto)
+        imagen = ee.Image.cat([compuesto.select(list(FACTORES_SATELITALES)), imagen_riesgo_satelital(compuesto, self.perfil)])
+        zonas_gee = ee.FeatureCollection(poligonos)
+
+        def construir(escala, tile_scale):
+            return imagen.reduceRegions(collection=zonas_gee, reducer=reductor_zonal(),
+                                        scale=escala, tileScale=tile_scale)
+
+        print("⚙️  Enviando reduceRegions a Google Earth Engine...")
+        features = obtener_con_escala_adaptativa(construir, self.escala, self.tile_scale)['features']
+
+        coordenadas = np.array([coordenadas_representativas(f['geometry']) for f in features], dtype=np.float64)
+        print("🌦️  Obteniendo clima en el centro de cada zona...")
+        # Pronóstico de 1 día: mínimo de humedad / máximo de viento de las próximas 24 h
+        _, humedad, viento, _ = self.obtener_pronostico_horario(coordenadas[:, 1], coordenadas[:, 0], dias=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # zonas sin clima -> NaN
+            clima = {'humedad_min': np.nanmin(humedad, axis=1), 'viento_max_kmh': np.nanmax(viento, axis=1)}
+
+        filas = []
+        for i, feature in enumerate(features):
+            props = feature['properties']
+            nombre = next((props[k] for k in PROPIEDADES_NOMBRE if props.get(k)), f"zona_{i + 1}")
+            suma = float(a_float(props.get('suma_satelital_mean')))
+            peso = float(a_float(props.get('peso_satelital_mean')))
+            if np.isnan(suma):
+                suma, peso = 0.0, 0.0
+            for factor in FACTORES_CLIMA:
+                minimo, amplitud, invertido = self.perfil['rangos'][factor]
+                if not np.isnan(clima[factor][i]):
+                    peso_factor = self.perfil['pesos'][factor]
+                    suma += peso_factor * float(normalizar_factor(clima[factor][i], minimo, amplitud, invertido))
+                    peso += peso_factor
+            riesgo = round(suma / peso * 100, 1) if peso > 0 else np.nan
+            cobertura = round(peso, 2)
+
+            fila = {'zona': nombre, 'lat': round(coordenadas[i, 1], 4), 'lon': round(coordenadas[i, 0], 4)}
+            for factor in FACTORES_SATELITALES:
+                for estadistico in ('mean', 'p90', 'max'):
+                    valor = float(a_float(props.get(f"{factor}_{estadistico}")))
+                    fila[f"{factor}_{estadistico}"] = round(valor, 3)
+            fila.update({
+                'humedad_min': clima['humedad_min'][i], 'viento_max_kmh': clima['viento_max_kmh'][i],
+                'riesgo_final': riesgo, 'nivel': self.clasificar_nivel(riesgo, cobertura), 'cobertura': cobertura,
+            })
+            filas.append(fila)
+
+        df = pd.DataFrame(filas).sort_values('riesgo_final', ascending=False, na_position='last')
+        df.insert(0, 'ranking', range(1, len(df) + 1))
+        if not os.path.exists(CARPETA_SALIDA):
+            os.makedirs(CARPETA_SALIDA)
+        df.to_csv(ARCHIVO_ZONAS_CSV, index=False)
+        print(f"✅ Ranking zonal guardado en '{ARCHIVO_ZONAS_CSV}'.")
+        print(df[['ranking', 'zona', 'riesgo_final', 'nivel']].head(10).to_string(index=False))
+
+    def ejecutar_fwi(self):
+        """
+        Avanza los códigos de humedad FWI de cada punto hasta la fecha de
+        referencia (recuperando los días sin corrida, hasta DIAS_FWI_PONERSE_AL_DIA)
+        con el clima horario de Open-Meteo, y guarda ARCHIVO_FWI_CSV.
+        """
+        print("\n🔥 Actualizando índice FWI...")
+        puntos = self._cargar_puntos()
+        nombres, lons, lats = puntos.ids, puntos.lon, puntos.lat
+        ids = fwi.ids_puntos(lats, lons)
+
+        estado = fwi.EstadoFWI.cargar(ARCHIVO_ESTADO_FWI)
+        codigos, ultima = estado.obtener(ids)
+        hoy = np.datetime64(self.contexto.fecha_referencia, 'D')
+        primer_dia = hoy - DIAS_FWI_PONERSE_AL_DIA + 1
+        # un estado posterior a esta corrida (reproceso de una fecha vieja) no se pisa
+        futuro = ultima > hoy
+        reiniciar = np.isnat(ultima) | (ultima < primer_dia - 1) | futuro
+        for codigo, inicial in (('ffmc', fwi.FFMC_INICIAL), ('dmc', fwi.DMC_INICIAL), ('dc', fwi.DC_INICIAL)):
+            codigos[codigo][reiniciar] = inicial
+        ultima[reiniciar] = primer_dia - 1
+
+        # aunque todos estén al día, se pide hoy: el ISI usa el viento del mediodía
+        desde = min(ultima.min() + 1, hoy)
+        print(f"🌦️  Clima horario del {desde} al {hoy} (lluvia 24 h previa incluida)...")
+        # un día antes para acumular la lluvia previa al primer mediodía
+        horas, clima = self.obtener_clima_horario(
+            lats, lons, ('temperature_2m', 'relative_humidity_2m', 'wind_speed_10m', 'precipitation'),
+            (desde - 1).item(), int((hoy - desde).astype(np.int64)) + 2)
+        if horas is None:
+            print("❌ No se pudo obtener clima para el FWI.")
+            sys.exit(1)
+        dias, entradas = fwi.clima_mediodia(horas, clima['temperature_2m'], clima['relative_humidity_2m'],
+                                            clima['wind_speed_10m'], clima['precipitation'])
+
+        for k, dia in enumerate(dias):
+            pendientes = ultima < dia
+            if not pendientes.any():
+                continue
+            nuevos = fwi.actualizar_dia(
+                codigos, entradas['temperatura'][:, k], entradas['humedad'][:, k],
+                entradas['viento'][:, k], entradas['lluvia'][:, k], dia.astype(object).month, lats)
+            for codigo in ('ffmc', 'dmc', 'dc'):
+                codigos[codigo] = np.where(pendientes, nuevos[codigo], codigos[codigo])
+            ultima = np.where(pendientes, dia, ultima)
+
+        # índices del día de referencia con el viento del mediodía de hoy
+        viento_hoy = entradas['viento'][:, -1] if len(dias) and dias[-1] == hoy else np.full(len(ids), np.nan)
+        isi = fwi.isi(codigos['ffmc'], viento_hoy)
+        bui = fwi.bui(codigos['dmc'], codigos['dc'])
+        indice_fwi = fwi.fwi(isi, bui)
+
+        guardar = ~futuro
+        estado.registrar([i for i, g in zip(ids, guardar) if g],
+                         {c: v[guardar] for c, v in codigos.items()}, ultima[guardar])
+        estado.guardar(ARCHIVO_ESTADO_FWI)
+
+        df = pd.DataFrame({
+            'nombre': nombres, 'lat': lats, 'lon': lons,
+            **{c: np.round(v, 1) for c, v in codigos.items()},
+            'isi': np.round(isi, 1), 'bui': np.round(bui, 1), 'fwi': np.round(indice_fwi, 1),
+        })
+        if not os.path.exists(CARPETA_SALIDA):
+            os.makedirs(CARPETA_SALIDA)
+        df.to_csv(ARCHIVO_FWI_CSV, index=False)
+        print(f"✅ FWI al {hoy} guardado en '{ARCHIVO_FWI_CSV}' (estado en '{ARCHIVO_ESTADO_FWI}').")
+        print(df.sort_values('fwi', ascending=False)[['nombre', 'ffmc', 'dmc', 'dc', 'fwi']].head(10).to_string(index=False))
+
+    def ejecutar_pronostico(self, dias=DIAS_PRONOSTICO_MAX):
+        """
+        Riesgo horario para los próximos `dias`: reutiliza los factores satelitales
+        (una sola pasada por GEE) y combina con humedad/viento horarios.
+        Guarda matrices (puntos × horas) en ARCHIVO_PRONOSTICO.
+        """
+        print(f"\n🛰️  Iniciando pronóstico horario de riesgo ({dias} días)...")
+
+        _, tabla = self._extraer_factores_satelitales()
+
+        # <U en lugar de object: el .npz se tiene que poder abrir con np.load sin allow_pickle
+        nombres = np.asarray(tabla['nombre'], dtype=str)
+        lons, lats = np.ascontiguousarray(tabla['lon']), np.ascontiguousarray(tabla['lat'])
+        satelitales = {banda: np.ascontiguousarray(tabla[banda]) for banda in FACTORES_SATELITALES}
+
+        print("🌦️  Obteniendo pronóstico horario por lotes...")
+        horas, humedad, viento, temperatura = self.obtener_pronostico_horario(lats, lons, dias)
+        if horas is None:
+            print("❌ No se pudo obtener ningún pronóstico horario.")
+            sys.exit(1)
+
+        # Factores satelitales como columna (puntos × 1) contra clima (puntos × horas)
+        factores = {banda: valores[:, None] for banda, valores in satelitales.items()}
+        factores.update({'humedad_min': humedad, 'viento_max_kmh': viento})
+        riesgo, cobertura = calcular_riesgo_y_cobertura(factores, self.perfil)
+        riesgo = np.where(cobertura >= COBERTURA_MINIMA, riesgo, np.nan).astype(np.float32)
+
+        if not os.path.exists(CARPETA_SALIDA):
+            os.makedirs(CARPETA_SALIDA)
+        np.savez_compressed(
+            ARCHIVO_PRONOSTICO,
+            nombres=nombres, lat=lats, lon=lons, horas=horas,
+            riesgo=riesgo, humedad=humedad, viento=viento, temperatura=temperatura
+        )
+        print(f"✅ Pronóstico guardado en '{ARCHIVO_PRONOSTICO}' ({riesgo.shape[0]} puntos × {riesgo.shape[1]} horas).")
+
+        # Cubo tiempo × lat × lon en chunks comprimidos, para recortes por día / localidad
+        lat_grilla, lon_grilla, fila, columna = rasterizar_puntos(lats, lons, RESOLUCION_CUBO_GRADOS)
+        # varios puntos en la misma celda: queda el valor más peligroso (máximo de
+        # riesgo, viento y temperatura; mínimo de humedad), ignorando NaN
+        variables = {}
+        for nombre, matriz, agregar in (('riesgo', riesgo, np.fmax), ('humedad', humedad, np.fmin),
+                                        ('viento', viento, np.fmax), ('temperatura', temperatura, np.fmax)):
+            cubo = np.full((len(horas), len(lat_grilla), len(lon_grilla)), np.nan, dtype=np.float32)
+            agregar.at(cubo, (slice(None), fila, columna), matriz.T)
+            variables[nombre] = cubo
+        escribir_cubo(CARPETA_CUBO, horas, lat_grilla, lon_grilla, variables)
+        print(f"🧊 Cubo de pronóstico escrito en '{CARPETA_CUBO}'.")
+
+        validos = ~np.all(np.isnan(riesgo), axis=1)
+        pico, hora_pico = ventana_pico(riesgo[validos], horas)
+        print("\n🔥 Ventanas de riesgo pico:")
+        for i in np.argsort(pico)[::-1][:10]:
+            print(f"  {nombres[validos][i]}: {pico[i]:.1f} ({self.clasificar_nivel(pico[i])}) el {hora_pico[i]}")
+
+
 if __name__ == "__main__":
-    analizador = AnalizadorHackathon()
-    analizador.ejecutar()
+    parser = argparse.ArgumentParser(description="GeoAlertAR - análisis de riesgo de incendios")
+    parser.add_argument('--pronostico', type=int, metavar='DIAS', nargs='?', const=DIAS_PRONOSTICO_MAX,
+                        help=f"riesgo horario para los próximos DIAS (máx. {DIAS_PRONOSTICO_MAX})")
+    parser.add_argument('--binario', action='store_true',
+                        help="además del CSV, exportar docs/riesgo_cordoba.bin para el mapa")
+    parser.add_argument('--extraccion', choices=['compuesto', 'ultima'], default=MODO_EXTRACCION,
+                        help="'compuesto': mosaico sin nubes del último valor válido; 'ultima': imagen más reciente")
+    parser.add_argument('--zonas', metavar='GEOJSON', nargs='?', const=POLIGONOS_GEOJSON,
+                        help="ranking zonal de polígonos (por defecto, Áreas Protegidas)")
+    parser.add_argument('--puntos', default=PUNTOS_GEOJSON,
+                        help="GeoJSON de entrada (puntos o polígonos; también GeoJSON-seq/NDJSON), leído en streaming")
+    parser.add_argument('--escala', type=int, default=ESCALA_REDUCCION,
+                        help="escala inicial de reduceRegion en metros (se duplica si GEE corta)")
+    parser.add_argument('--tile-scale', type=int, default=TILE_SCALE,
+                        help="tileScale inicial de reduceRegion")
+    parser.add_argument('--estadisticas-extra', action='store_true',
+                        help="agregar desvío estándar y cantidad de píxeles de cada factor (misma reducción)")
+    parser.add_argument('--exportar', metavar='BUCKET',
+                        help="modo batch: Export.table a gs://BUCKET en lugar de getInfo() (trabajos grandes)")
+    parser.add_argument('--fecha', metavar='YYYY-MM-DD',
+                        help="fecha de referencia de la corrida (por defecto, hoy); fija ventanas GEE y clima")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="recalcular todas las etapas sin leer ni escribir el cache en disco")
+    parser.add_argument('--fwi', action='store_true',
+                        help="actualizar el índice FWI canadiense (FFMC, DMC, DC, ISI, BUI, FWI) por punto")
+    parser.add_argument('--modelos', type=lambda v: [m for m in v.split(',') if m], default=[],
+                        metavar='M1,M2', help=f"modelos extra lado a lado, columna riesgo_<modelo> ({', '.join(MODELOS)})")
+    parser.add_argument('--suavizar', type=float, metavar='RADIO_KM',
+                        help="agregar riesgo/nivel suavizados con los vecinos a RADIO_KM y máximos locales")
+    parser.add_argument('--perfil', metavar='NOMBRE', default='base',
+                        help="perfil de pesos/rangos de perfiles_riesgo.json ('base' = fórmula publicada)")
+    parser.add_argument('--re-puntuar', metavar='PERFIL',
+                        help="recalcular el riesgo de un CSV ya generado con otro perfil (sin GEE ni clima)")
+    parser.add_argument('--desde', default=ARCHIVO_SALIDA_CSV,
+                        help="CSV de entrada para --re-puntuar (resultado vigente o una instantánea de historico/)")
+    parser.add_argument('--salida', help="CSV de salida para --re-puntuar (por defecto, docs/riesgo_<PERFIL>.csv)")
+    args = parser.parse_args()
+
+    if args.re_puntuar:
+        # Sólo aritmética sobre los factores ya guardados: no inicializa GEE
+        salida = args.salida or os.path.join(CARPETA_SALIDA, f"riesgo_{args.re_puntuar}.csv")
+        df = re_puntuar_csv(args.desde, cargar_perfil(args.re_puntuar), salida)
+        print(f"✅ '{args.desde}' re-puntuado con el perfil '{args.re_puntuar}' en '{salida}'.")
+        print(df['nivel'].value_counts())
+        sys.exit(0)
+
+    contexto = ContextoEjecucion.para_fecha(args.fecha, modo_extraccion=args.extraccion)
+    analizador = AnalizadorHackathon(contexto=contexto, puntos_geojson=args.puntos,
+                                     escala=args.escala, tile_scale=args.tile_scale,
+                                     estadisticas_extra=args.estadisticas_extra,
+                                     bucket_exportacion=args.exportar,
+                                     cache=CacheEtapas(activo=not args.sin_cache),
+                                     perfil=cargar_perfil(args.perfil), modelos=args.modelos,
+                                     radio_suavizado=args.suavizar)
+    if args.zonas:
+        analizador.ejecutar_zonas(args.zonas)
+    elif args.fwi:
+        analizador.ejecutar_fwi()
+    elif args.pronostico:
+        analizador.ejecutar_pronostico(args.pronostico)
+    else:
+        analizador.ejecutar(binario=args.binario)
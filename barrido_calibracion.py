@@ -0,0 +1,190 @@
+"""
+GeoAlertAR - Barrido de calibración / sensibilidad de pesos y umbrales.
+
+Evalúa miles de perfiles (vectores de pesos + umbrales de nivel) contra los
+factores ya guardados en un CSV de resultados, sin GEE ni clima. Los factores
+se normalizan una sola vez y el riesgo de todos los perfiles sale de un
+producto matricial (perfiles × factores) @ (factores × puntos):
+
+    riesgo[p, i] = Σ_f w[p,f]·r[i,f]·presente[i,f] / Σ_f w[p,f]·presente[i,f]
+
+Por perfil se reporta la distribución de niveles y la estabilidad del ranking
+frente al perfil base (Spearman y solapamiento del top-k).
+
+    python barrido_calibracion.py --muestras 5000 --desde historico/riesgo_2025-09-15.csv
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+
+from riesgo_vectorizado import (normalizar_factor, PESOS, RANGOS, UMBRALES, NIVEL_BAJO,
+                                NIVEL_SIN_DATOS, COBERTURA_MINIMA, FACTORES)
+
+ARCHIVO_ENTRADA = 'docs/riesgo_cordoba.csv'
+ARCHIVO_BARRIDO = 'docs/barrido_calibracion.csv'
+TOP_K = 10
+ELEMENTOS_POR_BLOQUE = 1 << 22  # perfiles × puntos por bloque (~32 MB en float64)
+
+NIVELES = [NIVEL_BAJO] + [nivel for _, nivel in reversed(UMBRALES)] + [NIVEL_SIN_DATOS]
+UMBRALES_BASE = np.array([umbral for umbral, _ in reversed(UMBRALES)], dtype=np.float64)  # ascendentes
+
+
+def preparar_factores(df, rangos=RANGOS):
+    """(riesgo normalizado 0-1 con 0 donde falta, máscara de presencia) de forma puntos × factores."""
+    r = np.zeros((len(df), len(FACTORES)))
+    presente = np.zeros((len(df), len(FACTORES)))
+    for j, factor in enumerate(FACTORES):
+        if factor not in df:
+            continue
+        valores = pd.to_numeric(df[factor], errors='coerce').to_numpy(dtype=np.float64)
+        hay = ~np.isnan(valores)
+        minimo, amplitud, invertido = rangos[factor]
+        r[hay, j] = normalizar_factor(valores[hay], minimo, amplitud, invertido)
+        presente[:, j] = hay
+    return r, presente
+
+
+def muestrear_pesos(n, semilla=None, concentracion=20.0, base=PESOS):
+    """
+    `n` vectores de pesos Dirichlet centrados en `base` (suman 1). Más
+    `concentracion` = perturbaciones más chicas alrededor de la fórmula base.
+    """
+    alfa = np.array([base[f] for f in FACTORES]) * concentracion
+    return np.random.default_rng(semilla).dirichlet(alfa, size=n)
+
+
+def grilla_pesos(paso=0.05):
+    """Todos los vectores de pesos múltiplos de `paso` que suman 1 (símplex regular)."""
+    divisiones = int(round(1 / paso))
+    # barras y estrellas: cortes entre `divisiones` unidades repartidas en len(FACTORES) pesos
+    cortes = np.array(list(itertools.combinations(range(divisiones + len(FACTORES) - 1), len(FACTORES) - 1)))
+    bordes = np.column_stack([np.full(len(cortes), -1), cortes, np.full(len(cortes), divisiones + len(FACTORES) - 1)])
+    return (np.diff(bordes, axis=1) - 1) * paso
+
+
+def muestrear_umbrales(n, semilla=None, desvio=5.0, base=UMBRALES_BASE):
+    """Umbrales (n × 3, ascendentes) perturbados alrededor de los de la fórmula base."""
+    umbrales = base + np.random.default_rng(semilla).normal(0, desvio, size=(n, len(base)))
+    return np.sort(np.clip(umbrales, 0, 100), axis=1)
+
+
+def _riesgo(r, presente, pesos):
+    """(riesgo 0-100, cobertura) de forma perfiles × puntos."""
+    cobertura = pesos @ presente.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        riesgo = np.where(cobertura > 0, (pesos @ (r * presente).T) / cobertura, np.nan) * 100
+    return riesgo, cobertura
+
+
+def _riesgo_redondeado(r, presente, pesos):
+    """Como `_riesgo`, redondeado igual que la corrida (riesgo a 0.1, cobertura a 0.01)."""
+    riesgo, cobertura = _riesgo(r, presente, pesos)
+    return np.round(riesgo, 1), np.round(cobertura, 2)
+
+
+def _rangos(matriz):
+    """
+    Rangos promedio por fila (0 = menor riesgo): los empates (factores recortados
+    al borde del rango, riesgo redondeado) comparten el promedio de sus
+    posiciones, así el resultado no depende del orden de las filas del CSV.
+    Los NaN cuentan como -1 (al fondo, empatados entre sí).
+    """
+    valores = np.nan_to_num(np.asarray(matriz, dtype=np.float64), nan=-1.0)
+    n = valores.shape[1]
+    orden = np.argsort(valores, axis=1, kind='stable')
+    ordenados = np.take_along_axis(valores, orden, axis=1)
+    posiciones = np.broadcast_to(np.arange(n), valores.shape)
+    empieza = np.ones(valores.shape, dtype=bool)
+    empieza[:, 1:] = ordenados[:, 1:] != ordenados[:, :-1]
+    termina = np.ones(valores.shape, dtype=bool)
+    termina[:, :-1] = empieza[:, 1:]
+    primero = np.maximum.accumulate(np.where(empieza, posiciones, 0), axis=1)
+    ultimo = np.minimum.accumulate(np.where(termina, posiciones, n - 1)[:, ::-1], axis=1)[:, ::-1]
+    rangos = np.empty(valores.shape)
+    np.put_along_axis(rangos, orden, (primero + ultimo) / 2.0, axis=1)
+    return rangos
+
+
+def _spearman(rangos, rangos_base):
+    """Correlación de Spearman de cada fila de `rangos` contra `rangos_base` (Pearson sobre rangos promedio)."""
+    a = rangos - rangos.mean(axis=1, keepdims=True)
+    b = rangos_base - rangos_base.mean()
+    return (a @ b) / np.sqrt((a * a).sum(axis=1) * (b @ b))
+
+
+def evaluar_perfiles(r, presente, pesos, umbrales=None, top_k=TOP_K):
+    """
+    Evalúa los perfiles `pesos` (perfiles × factores) y `umbrales` (perfiles × 3
+    o None = base) sobre los factores preparados. Devuelve un DataFrame con una
+    fila por perfil: pesos, umbrales, conteo por nivel, Spearman y solapamiento
+    del top-k contra la fórmula base.
+    """
+    pesos = np.atleast_2d(np.asarray(pesos, dtype=np.float64))
+    if umbrales is None:
+        umbrales = np.broadcast_to(UMBRALES_BASE, (len(pesos), len(UMBRALES_BASE)))
+    n_puntos = r.shape[0]
+    top_k = min(top_k, n_puntos)
+
+    pesos_base = np.array([[PESOS[f] for f in FACTORES]])
+    riesgo_base = _riesgo_redondeado(r, presente, pesos_base)[0][0]
+    rangos_base = _rangos(riesgo_base[None, :])[0]
+    top_base = np.argsort(rangos_base)[-top_k:] if top_k else np.array([], dtype=int)
+
+    conteos = np.zeros((len(pesos), len(NIVELES)), dtype=np.int64)
+    spearman = np.empty(len(pesos))
+    solapamiento = np.empty(len(pesos))
+    bloque = max(1, ELEMENTOS_POR_BLOQUE // max(n_puntos, 1))
+    for inicio in range(0, len(pesos), bloque):
+        fin = inicio + bloque
+        riesgo, cobertura = _riesgo_redondeado(r, presente, pesos[inicio:fin])
+        # índice de nivel = cantidad de umbrales superados; sin datos aparte
+        indice = (riesgo[:, :, None] > umbrales[inicio:fin, None, :]).sum(axis=2)
+        indice[np.isnan(riesgo) | (cobertura < COBERTURA_MINIMA)] = len(NIVELES) - 1
+        desplazado = indice + np.arange(indice.shape[0])[:, None] * len(NIVELES)
+        conteos[inicio:fin] = np.bincount(desplazado.ravel(), minlength=indice.shape[0] * len(NIVELES)).reshape(-1, len(NIVELES))
+
+        rangos = _rangos(riesgo)
+        spearman[inicio:fin] = _spearman(rangos, rangos_base)
+        top = rangos[:, top_base] >= n_puntos - top_k
+        solapamiento[inicio:fin] = top.mean(axis=1) if top_k else np.nan
+
+    df = pd.DataFrame(pesos, columns=[f"peso_{f}" for f in FACTORES])
+    for j, (_, nivel) in enumerate(reversed(UMBRALES)):
+        df[f"umbral_{nivel}"] = umbrales[:, j]
+    for j, nivel in enumerate(NIVELES):
+        df[f"n_{nivel}"] = conteos[:, j]
+    df['spearman'] = spearman
+    df[f"top{top_k}_comun"] = solapamiento
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GeoAlertAR - barrido de calibración de pesos y umbrales")
+    parser.add_argument('--desde', default=ARCHIVO_ENTRADA, help="CSV con los factores crudos (resultado o instantánea)")
+    parser.add_argument('--salida', default=ARCHIVO_BARRIDO)
+    parser.add_argument('--muestras', type=int, default=2000, help="perfiles aleatorios (Dirichlet alrededor de la base)")
+    parser.add_argument('--grilla', type=float, metavar='PASO',
+                        help="en lugar de muestras, todos los pesos múltiplos de PASO (p. ej. 0.1)")
+    parser.add_argument('--concentracion', type=float, default=20.0,
+                        help="concentración Dirichlet: más alta = pesos más cerca de la base")
+    parser.add_argument('--desvio-umbrales', type=float, default=0.0,
+                        help="desvío (puntos de riesgo) para muestrear umbrales; 0 = umbrales base")
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    df_entrada = pd.read_csv(args.desde)
+    r, presente = preparar_factores(df_entrada)
+    pesos = grilla_pesos(args.grilla) if args.grilla else muestrear_pesos(args.muestras, args.semilla, args.concentracion)
+    umbrales = muestrear_umbrales(len(pesos), args.semilla, args.desvio_umbrales) if args.desvio_umbrales else None
+    print(f"🧪 Evaluando {len(pesos)} perfiles sobre {len(df_entrada)} puntos de '{args.desde}'...")
+
+    inicio = time.perf_counter()
+    resultado = evaluar_perfiles(r, presente, pesos, umbrales)
+    segundos = time.perf_counter() - inicio
+    resultado.to_csv(args.salida, index=False)
+    print(f"✅ {len(pesos) / segundos:,.0f} perfiles/s. Resultados en '{args.salida}'.")
+    print("\n📊 Estabilidad del ranking frente a la fórmula base:")
+    print(resultado[['spearman', f"top{min(TOP_K, len(df_entrada))}_comun"]].describe().loc[['mean', 'min', '50%']].round(3))
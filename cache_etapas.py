@@ -0,0 +1,82 @@
+"""
+GeoAlertAR - Cache en disco de etapas del pipeline, direccionado por contenido.
+
+Cada etapa (extracción GEE, clima, cálculo) se guarda como
+`<carpeta>/<etapa>/<clave>.pkl`, donde la clave es el hash de sus entradas
+(puntos, contexto, pesos...). Si la clave de una etapa incluye la de la etapa
+anterior, una corrida repetida salta directo a la primera etapa invalidada.
+
+El tamaño total se limita con política LRU: cada acierto actualiza el mtime y
+al superar el límite se borran los archivos menos usados.
+"""
+import os
+import pickle
+import tempfile
+
+CARPETA_CACHE = '.cache_geoalertar'
+LIMITE_BYTES = 512 * 1024 * 1024
+
+
+class CacheEtapas:
+    def __init__(self, carpeta=CARPETA_CACHE, limite_bytes=LIMITE_BYTES, activo=True):
+        self.carpeta = carpeta
+        self.limite_bytes = limite_bytes
+        self.activo = activo
+
+    def _ruta(self, etapa, clave):
+        return os.path.join(self.carpeta, etapa, f"{clave}.pkl")
+
+    def obtener_o_calcular(self, etapa, clave, calcular, es_valido=None):
+        """
+        Devuelve el resultado guardado para (etapa, clave) o lo calcula y lo guarda.
+        Si `es_valido(resultado)` es False (p. ej. falló una API) no se guarda.
+        """
+        if not self.activo:
+            return calcular()
+        ruta = self._ruta(etapa, clave)
+        if os.path.exists(ruta):
+            try:
+                with open(ruta, 'rb') as f:
+                    resultado = pickle.load(f)
+                os.utime(ruta)  # marca de uso para el LRU
+                print(f"  ♻️  Etapa '{etapa}' desde cache ({clave[:12]}).")
+                return resultado
+            except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+                os.remove(ruta)  # archivo corrupto (p. ej. corrida interrumpida): recalcular
+
+        resultado = calcular()
+        if es_valido is None or es_valido(resultado):
+            self._guardar(ruta, resultado)
+            self._podar()
+        return resultado
+
+    def _guardar(self, ruta, resultado):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        # escritura atómica: un crash a mitad no deja un pickle truncado con nombre válido
+        descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as f:
+            pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+
+    def _podar(self):
+        archivos = []
+        for raiz, _, nombres in os.walk(self.carpeta):
+            for nombre in nombres:
+                if nombre.endswith('.pkl'):
+                    ruta = os.path.join(raiz, nombre)
+                    estado = os.stat(ruta)
+                    archivos.append((estado.st_mtime, estado.st_size, ruta))
+        total = sum(tamanio for _, tamanio, _ in archivos)
+        for _, tamanio, ruta in sorted(archivos):
+            if total <= self.limite_bytes:
+                break
+            os.remove(ruta)
+            total -= tamanio
+
+    def limpiar(self, etapa=None):
+        """Borra todo el cache, o sólo el de una etapa."""
+        carpeta = os.path.join(self.carpeta, etapa) if etapa else self.carpeta
+        for raiz, _, nombres in os.walk(carpeta):
+            for nombre in nombres:
+                if nombre.endswith('.pkl'):
+                    os.remove(os.path.join(raiz, nombre))
@@ -0,0 +1,240 @@
+"""
+GeoAlertAR - Lectura en streaming de los puntos de análisis.
+
+`geojson.load` arma el árbol completo de dicts/listas de Python de todo el
+archivo; con cientos de miles de features eso ocupa varias veces el tamaño del
+GeoJSON. Acá se lee feature por feature y se entrega cada lote ya compacto:
+
+    LotePuntos(ids, lon, lat, geometrias)
+
+- ids: nombre del punto (primera propiedad de PROPIEDADES_NOMBRE presente, si no
+  el `id` del feature o su posición), como array de str internados.
+- lon, lat: float64; para polígonos, el promedio de vértices del anillo exterior;
+  para líneas, multipuntos y GeometryCollection, el de todos sus vértices.
+- geometrias: {posición en el lote: geometría} sólo para lo que no es Point, para
+  que GEE siga reduciendo sobre el polígono completo.
+
+Formatos: FeatureCollection GeoJSON (con `ijson` si está instalado; si no, un
+lector incremental sobre `json.JSONDecoder.raw_decode`), y GeoJSON por líneas
+(NDJSON / GeoJSON-seq RFC 8142: .geojsonl, .geojsons, .ndjson, .jsonl). Los
+features sin geometría se omiten; los de geometría vacía o de tipo desconocido,
+con un aviso.
+"""
+import hashlib
+import json
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    import ijson
+except ImportError:  # opcional: sin ijson se usa el lector incremental propio
+    ijson = None
+
+PROPIEDADES_NOMBRE = ('nombre', 'NOMBRE', 'Nombre', 'name', 'nam', 'fna')
+EXTENSIONES_POR_LINEA = ('.geojsonl', '.geojsons', '.geojsonseq', '.ndjson', '.jsonl')
+SEPARADOR_REGISTRO = '\x1e'  # GeoJSON-seq
+TAMANIO_LOTE = 5000
+TAMANIO_BLOQUE = 1 << 16     # caracteres leídos por vez en el lector incremental
+
+LotePuntos = namedtuple('LotePuntos', ['ids', 'lon', 'lat', 'geometrias'])
+
+_BLANCOS = ' \t\r\n'
+
+
+def _vertices(geometria):
+    """Vértices que representan la geometría (anillos exteriores sin el punto de cierre)."""
+    tipo, coordenadas = geometria['type'], geometria.get('coordinates')
+    if tipo == 'Point':
+        return [coordenadas]
+    if tipo in ('MultiPoint', 'LineString'):
+        return coordenadas
+    if tipo == 'MultiLineString':
+        return [v for linea in coordenadas for v in linea]
+    if tipo == 'Polygon':
+        return coordenadas[0][:-1]
+    if tipo == 'MultiPolygon':
+        return [v for poligono in coordenadas for v in poligono[0][:-1]]
+    if tipo == 'GeometryCollection':
+        return [v for parte in geometria['geometries'] for v in _vertices(parte)]
+    raise ValueError(f"Tipo de geometría no soportado: '{tipo}'")
+
+
+def coordenadas_representativas(geometria):
+    """
+    (lon, lat) del punto; para el resto de las geometrías, el promedio de sus
+    vértices (anillo exterior en polígonos). ValueError si no tiene vértices.
+    """
+    if geometria['type'] == 'Point':
+        return geometria['coordinates'][0], geometria['coordinates'][1]
+    vertices = np.array([v[:2] for v in _vertices(geometria)], dtype=np.float64)
+    if not len(vertices):
+        raise ValueError(f"Geometría '{geometria['type']}' sin coordenadas")
+    return float(vertices[:, 0].mean()), float(vertices[:, 1].mean())
+
+
+class _LectorIncremental:
+    """Recorre un JSON de texto por valores, con un buffer acotado al valor en curso."""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.buffer = ''
+        self.pos = 0
+        self.fin = False
+        self.decodificador = json.JSONDecoder()
+
+    def _leer(self, minimo=TAMANIO_BLOQUE):
+        bloque = self.archivo.read(max(minimo, TAMANIO_BLOQUE))
+        if not bloque:
+            self.fin = True
+            return False
+        self.buffer = self.buffer[self.pos:] + bloque
+        self.pos = 0
+        return True
+
+    def siguiente(self):
+        """Próximo carácter no blanco, sin consumirlo ('' al final del archivo)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _BLANCOS:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._leer():
+                return ''
+
+    def consumir(self, esperado):
+        encontrado = self.siguiente()
+        if encontrado != esperado:
+            raise ValueError(f"JSON inválido: se esperaba '{esperado}' y se encontró '{encontrado}'")
+        self.pos += 1
+
+    def valor(self):
+        self.siguiente()
+        while True:
+            try:
+                valor, fin = self.decodificador.raw_decode(self.buffer, self.pos)
+                # un número al borde del buffer puede estar cortado: confirmar con más texto
+                if fin < len(self.buffer) or self.fin:
+                    self.pos = fin
+                    return valor
+            except json.JSONDecodeError:
+                if self.fin:
+                    raise
+            # valor incompleto: leer al menos lo que ya hay, para no re-decodificar de a poco
+            if not self._leer(len(self.buffer) - self.pos):
+                self.fin = True
+
+    def features(self):
+        """Elementos de 'features' del objeto raíz; el resto de las claves se descarta."""
+        self.consumir('{')
+        while self.siguiente() not in ('}', ''):
+            clave = self.valor()
+            self.consumir(':')
+            if clave != 'features':
+                self.valor()
+            else:
+                self.consumir('[')
+                if self.siguiente() == ']':
+                    self.pos += 1
+                else:
+                    while True:
+                        yield self.valor()
+                        separador = self.siguiente()
+                        self.pos += 1
+                        if separador == ']':
+                            break
+                        if separador != ',':
+                            raise ValueError(f"JSON inválido en 'features': '{separador}'")
+            if self.siguiente() == ',':
+                self.pos += 1
+
+
+def _es_por_lineas(ruta):
+    if ruta.lower().endswith(EXTENSIONES_POR_LINEA):
+        return True
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return f.read(1) == SEPARADOR_REGISTRO
+
+
+def iterar_features(ruta):
+    """Features del archivo de a uno, sin cargar la colección completa."""
+    if _es_por_lineas(ruta):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            for linea in f:
+                linea = linea.strip(SEPARADOR_REGISTRO + _BLANCOS)
+                if linea:
+                    yield json.loads(linea)
+    elif ijson is not None:
+        with open(ruta, 'rb') as f:
+            yield from ijson.items(f, 'features.item', use_float=True)
+    else:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            yield from _LectorIncremental(f).features()
+
+
+def _nombre(feature, posicion):
+    propiedades = feature.get('properties') or {}
+    nombre = next((propiedades[k] for k in PROPIEDADES_NOMBRE if propiedades.get(k)), None)
+    if nombre is None:
+        nombre = feature.get('id', posicion)
+    return sys.intern(str(nombre))
+
+
+def _armar_lote(ids, lon, lat, geometrias):
+    return LotePuntos(np.array(ids, dtype=object), np.array(lon, dtype=np.float64),
+                      np.array(lat, dtype=np.float64), geometrias)
+
+
+def lotes_puntos(ruta, tamanio_lote=TAMANIO_LOTE):
+    """LotePuntos de hasta `tamanio_lote` puntos, en el orden del archivo."""
+    ids, lon, lat, geometrias = [], [], [], {}
+    for posicion, feature in enumerate(iterar_features(ruta)):
+        geometria = feature.get('geometry')
+        if not geometria:
+            continue
+        try:
+            x, y = coordenadas_representativas(geometria)
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            print(f"  ⚠️  Feature {posicion} omitido: {e}")
+            continue
+        if geometria['type'] != 'Point':
+            geometrias[len(ids)] = geometria
+        ids.append(_nombre(feature, posicion))
+        lon.append(x)
+        lat.append(y)
+        if len(ids) == tamanio_lote:
+            yield _armar_lote(ids, lon, lat, geometrias)
+            ids, lon, lat, geometrias = [], [], [], {}
+    if ids:
+        yield _armar_lote(ids, lon, lat, geometrias)
+
+
+def leer_puntos(ruta):
+    """Todos los puntos en un solo LotePuntos (para etapas que no consultan GEE)."""
+    lotes = list(lotes_puntos(ruta))
+    if not lotes:
+        return _armar_lote([], [], [], {})
+    desplazamientos = np.cumsum([0] + [len(lote.ids) for lote in lotes[:-1]])
+    geometrias = {d + i: g for d, lote in zip(desplazamientos, lotes) for i, g in lote.geometrias.items()}
+    return LotePuntos(np.concatenate([lote.ids for lote in lotes]), np.concatenate([lote.lon for lote in lotes]),
+                      np.concatenate([lote.lat for lote in lotes]), geometrias)
+
+
+def huella_lote(lote):
+    """sha256 del contenido del lote (para las claves de cache)."""
+    h = hashlib.sha256()
+    h.update('\n'.join(lote.ids).encode('utf-8'))
+    h.update(np.ascontiguousarray(lote.lon).tobytes())
+    h.update(np.ascontiguousarray(lote.lat).tobytes())
+    h.update(json.dumps(lote.geometrias, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+
+def geojson_lote(lote):
+    """FeatureCollection mínima del lote (sólo 'nombre'), para enviar a GEE."""
+    features = []
+    for i, (nombre, x, y) in enumerate(zip(lote.ids, lote.lon.tolist(), lote.lat.tolist())):
+        geometria = lote.geometrias.get(i) or {'type': 'Point', 'coordinates': [x, y]}
+        features.append({'type': 'Feature', 'properties': {'nombre': nombre}, 'geometry': geometria})
+    return {'type': 'FeatureCollection', 'features': features}
@@ -0,0 +1,74 @@
+"""
+GeoAlertAR - Contexto de ejecución reproducible.
+
+Toda la fecha "de hoy" del pipeline sale de acá: la fecha de referencia, las
+ventanas de GEE y los IDs de dataset viajan en un `ContextoEjecucion` que se
+pasa a la extracción, al clima y al cálculo. Con las mismas entradas se obtiene
+la misma `clave()`, lo que permite cachear etapas completas entre corridas.
+"""
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+
+DATASETS_POR_DEFECTO = {
+    'reflectancia': 'MODIS/061/MOD09GA',
+    'lst': 'MODIS/061/MOD11A1',
+    'precip': 'UCSB-CHG/CHIRPS/PENTAD',
+}
+
+
+def clave_hash(*partes):
+    """sha256 estable de cualquier combinación de valores serializables a JSON."""
+    texto = json.dumps(partes, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+@dataclass(frozen=True)
+class ContextoEjecucion:
+    fecha_referencia: date
+    dias_latencia: int = 2             # MODIS/CHIRPS publican con demora
+    dias_ventana_satelital: int = 30
+    dias_ventana_precip: int = 60
+    modo_extraccion: str = 'compuesto'
+    datasets: dict = field(default_factory=lambda: dict(DATASETS_POR_DEFECTO))
+
+    @classmethod
+    def para_fecha(cls, fecha=None, **kwargs):
+        """Contexto para `fecha` ('YYYY-MM-DD', date o None = hoy)."""
+        if fecha is None:
+            fecha = date.today()
+        elif isinstance(fecha, str):
+            fecha = date.fromisoformat(fecha)
+        return cls(fecha_referencia=fecha, **kwargs)
+
+    @property
+    def fecha_fin(self):
+        return self.fecha_referencia - timedelta(days=self.dias_latencia)
+
+    @property
+    def fecha_inicio_satelital(self):
+        return self.fecha_fin - timedelta(days=self.dias_ventana_satelital)
+
+    @property
+    def fecha_inicio_precip(self):
+        return self.fecha_fin - timedelta(days=self.dias_ventana_precip)
+
+    def como_dict(self):
+        datos = asdict(self)
+        datos['fecha_referencia'] = self.fecha_referencia.isoformat()
+        return datos
+
+    def clave(self, *extras):
+        """Hash del contexto más `extras` (puntos, pesos, etc.)."""
+        return clave_hash(self.como_dict(), *extras)
+
+    def clave_clima(self, *extras):
+        """
+        Hash sólo de lo que define el clima (la fecha de referencia) más `extras`:
+        ventanas, datasets y modo de extracción son de GEE y no invalidan Open-Meteo.
+        """
+        return clave_hash('clima', self.fecha_referencia.isoformat(), *extras)
+
+    def __hash__(self):  # dict no es hasheable: usar la clave de contenido
+        return hash(self.clave())
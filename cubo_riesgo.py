@@ -0,0 +1,187 @@
+"""
+GeoAlertAR - Cubo de pronóstico en chunks comprimidos.
+
+Almacena variables (tiempo × lat × lon) en una carpeta con layout tipo Zarr:
+
+    cubo/
+    ├─ meta.json            dimensiones, tamaño de chunk, dtype y codificación
+    ├─ coords.npz           ejes tiempo / lat / lon
+    └─ <variable>/<it>.<iy>.<ix>   un archivo zlib por chunk
+
+- `riesgo` se cuantiza a uint8 (0-100, 255 = sin dato); el resto a float16.
+- Los chunks completamente vacíos no se escriben (se leen como "sin dato");
+  meta.json lista los chunks escritos y el lector sólo confía en esos.
+- El cubo se escribe en una carpeta temporal que reemplaza a la anterior al
+  final, así no sobreviven chunks de una corrida previa.
+- `CuboRiesgo` lee sólo los chunks que intersectan el recorte pedido, así que
+  extraer un día o una localidad no carga el cubo entero.
+"""
+import json
+import os
+import shutil
+import zlib
+
+import numpy as np
+
+CHUNKS_POR_DEFECTO = (24, 64, 64)  # (horas, lat, lon)
+SIN_DATO_UINT8 = 255
+NIVEL_COMPRESION = 6
+
+# variable -> dtype en disco
+CODIFICACION = {
+    'riesgo': 'uint8',
+}
+DTYPE_POR_DEFECTO = 'float16'
+
+
+def _codificar(valores, dtype):
+    if dtype == 'uint8':
+        salida = np.full(valores.shape, SIN_DATO_UINT8, dtype=np.uint8)
+        validos = ~np.isnan(valores)
+        salida[validos] = np.clip(np.rint(valores[validos]), 0, 100).astype(np.uint8)
+        return salida
+    return valores.astype(dtype)
+
+
+def _decodificar(valores, dtype):
+    if dtype == 'uint8':
+        salida = valores.astype(np.float32)
+        salida[valores == SIN_DATO_UINT8] = np.nan
+        return salida
+    return valores.astype(np.float32)
+
+
+def rasterizar_puntos(lats, lons, resolucion=0.05):
+    """
+    Define una grilla regular que cubre los puntos y devuelve
+    (lat_grilla, lon_grilla, fila, columna) con la celda de cada punto.
+    Los ejes son los centros de celda, con latitudes de norte a sur como un raster.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    lat_max, lon_min = lats.max(), lons.min()
+    n_filas = int(np.floor((lat_max - lats.min()) / resolucion)) + 1
+    n_cols = int(np.floor((lons.max() - lon_min) / resolucion)) + 1
+    fila = np.floor((lat_max - lats) / resolucion).astype(np.int64)
+    columna = np.floor((lons - lon_min) / resolucion).astype(np.int64)
+    lat_grilla = lat_max - (np.arange(n_filas) + 0.5) * resolucion
+    lon_grilla = lon_min + (np.arange(n_cols) + 0.5) * resolucion
+    return lat_grilla, lon_grilla, fila, columna
+
+
+def escribir_cubo(ruta, tiempos, lats, lons, variables, chunks=CHUNKS_POR_DEFECTO):
+    """
+    Escribe `variables` (dict nombre -> array float (tiempo, lat, lon), NaN = sin
+    dato) en `ruta`. `tiempos`, `lats` y `lons` son los ejes del cubo.
+    """
+    forma = (len(tiempos), len(lats), len(lons))
+    destino = ruta
+    ruta = f"{destino.rstrip(os.sep)}.tmp-{os.getpid()}"
+    shutil.rmtree(ruta, ignore_errors=True)
+    os.makedirs(ruta)
+    np.savez(os.path.join(ruta, 'coords.npz'),
+             tiempo=np.asarray(tiempos), lat=np.asarray(lats), lon=np.asarray(lons))
+
+    meta = {'forma': list(forma), 'chunks': list(chunks), 'variables': {}}
+    for nombre, valores in variables.items():
+        valores = np.asarray(valores, dtype=np.float32)
+        if valores.shape != forma:
+            raise ValueError(f"'{nombre}' tiene forma {valores.shape}, se esperaba {forma}")
+        dtype = CODIFICACION.get(nombre, DTYPE_POR_DEFECTO)
+        carpeta = os.path.join(ruta, nombre)
+        os.makedirs(carpeta, exist_ok=True)
+        escritos = []
+        for it in range(0, forma[0], chunks[0]):
+            for iy in range(0, forma[1], chunks[1]):
+                for ix in range(0, forma[2], chunks[2]):
+                    bloque = valores[it:it + chunks[0], iy:iy + chunks[1], ix:ix + chunks[2]]
+                    if np.isnan(bloque).all():
+                        continue
+                    clave = f"{it // chunks[0]}.{iy // chunks[1]}.{ix // chunks[2]}"
+                    datos = np.ascontiguousarray(_codificar(bloque, dtype)).tobytes()
+                    with open(os.path.join(carpeta, clave), 'wb') as f:
+                        f.write(zlib.compress(datos, NIVEL_COMPRESION))
+                    escritos.append(clave)
+        meta['variables'][nombre] = {'dtype': dtype, 'chunks_escritos': escritos}
+
+    with open(os.path.join(ruta, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    # reemplazo del cubo anterior: renombrar es atómico, borrar el viejo no hace falta que lo sea
+    anterior = f"{destino.rstrip(os.sep)}.viejo-{os.getpid()}"
+    if os.path.exists(destino):
+        os.rename(destino, anterior)
+    os.rename(ruta, destino)
+    shutil.rmtree(anterior, ignore_errors=True)
+
+
+class CuboRiesgo:
+    """Lectura perezosa de un cubo escrito con `escribir_cubo`."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(os.path.join(ruta, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        coords = np.load(os.path.join(ruta, 'coords.npz'))
+        self.tiempo = coords['tiempo']
+        self.lat = coords['lat']
+        self.lon = coords['lon']
+        self.forma = tuple(self.meta['forma'])
+        self.chunks = tuple(self.meta['chunks'])
+        self.chunks_leidos = 0  # útil para verificar que el recorte es perezoso
+        self._escritos = {nombre: set(v['chunks_escritos']) for nombre, v in self.meta['variables'].items()}
+
+    @property
+    def variables(self):
+        return list(self.meta['variables'])
+
+    def _leer_chunk(self, nombre, dtype, it, iy, ix):
+        inicio = (it * self.chunks[0], iy * self.chunks[1], ix * self.chunks[2])
+        forma = tuple(min(c, total - i) for c, total, i in zip(self.chunks, self.forma, inicio))
+        clave = f"{it}.{iy}.{ix}"
+        if clave not in self._escritos[nombre]:
+            return np.full(forma, np.nan, dtype=np.float32)
+        archivo = os.path.join(self.ruta, nombre, clave)
+        with open(archivo, 'rb') as f:
+            datos = np.frombuffer(zlib.decompress(f.read()), dtype=dtype).reshape(forma)
+        self.chunks_leidos += 1
+        return _decodificar(datos, dtype)
+
+    def leer(self, nombre, tiempo=slice(None), lat=slice(None), lon=slice(None)):
+        """
+        Devuelve `nombre` recortado por índices (slices sin paso) como float32,
+        leyendo sólo los chunks necesarios.
+        """
+        dtype = self.meta['variables'][nombre]['dtype']
+        rangos = [s.indices(n)[:2] for s, n in zip((tiempo, lat, lon), self.forma)]
+        salida = np.full(tuple(max(0, b - a) for a, b in rangos), np.nan, dtype=np.float32)
+        if salida.size == 0:
+            return salida
+
+        bloques = [range(a // c, (b - 1) // c + 1) for (a, b), c in zip(rangos, self.chunks)]
+        for it in bloques[0]:
+            for iy in bloques[1]:
+                for ix in bloques[2]:
+                    chunk = self._leer_chunk(nombre, dtype, it, iy, ix)
+                    # intersección chunk ∩ recorte, en coordenadas globales
+                    origen = (it * self.chunks[0], iy * self.chunks[1], ix * self.chunks[2])
+                    desde = [max(a, o) for (a, _), o in zip(rangos, origen)]
+                    hasta = [min(b, o + n) for (_, b), o, n in zip(rangos, origen, chunk.shape)]
+                    destino = tuple(slice(d - a, h - a) for d, h, (a, _) in zip(desde, hasta, rangos))
+                    fuente = tuple(slice(d - o, h - o) for d, h, o in zip(desde, hasta, origen))
+                    salida[destino] = chunk[fuente]
+        return salida
+
+    def leer_dia(self, nombre, fecha):
+        """Las horas de `fecha` ('YYYY-MM-DD') para toda la grilla."""
+        dia = np.datetime64(fecha, 'D')
+        horas = np.flatnonzero(self.tiempo.astype('datetime64[D]') == dia)
+        if len(horas) == 0:
+            return np.empty((0, self.forma[1], self.forma[2]), dtype=np.float32)
+        return self.leer(nombre, tiempo=slice(horas[0], horas[-1] + 1))
+
+    def serie_punto(self, nombre, lat, lon):
+        """Serie temporal de la celda más cercana a (lat, lon)."""
+        fila = int(np.abs(self.lat - lat).argmin())
+        columna = int(np.abs(self.lon - lon).argmin())
+        return self.leer(nombre, lat=slice(fila, fila + 1), lon=slice(columna, columna + 1))[:, 0, 0]
@@ -0,0 +1,83 @@
+"""
+GeoAlertAR - Modo batch con Export.table para trabajos grandes.
+
+`getInfo()` tiene límites de tamaño de respuesta y de 5 minutos. Para grillas
+provinciales (100k puntos) se exporta la FeatureCollection a Cloud Storage como
+GeoJSON, se consulta el estado de la tarea con backoff exponencial y se
+descarga el archivo terminado, que tiene la misma forma que la respuesta de
+`getInfo()` y entra directo al cálculo de riesgo.
+
+La creación de la tarea, la descarga y la espera son inyectables
+(`crear_tarea`, `descargar`, `dormir`) para poder probarlo con una API falsa.
+"""
+import json
+import time
+
+import ee
+import requests
+
+ESTADOS_FINALES = ('COMPLETED', 'FAILED', 'CANCELLED')
+ESPERA_INICIAL_S = 5
+ESPERA_MAXIMA_S = 120
+FACTOR_BACKOFF = 1.5
+TIEMPO_MAXIMO_S = 6 * 3600
+
+
+def crear_tarea_gcs(coleccion, descripcion, bucket, prefijo):
+    """Tarea Export.table.toCloudStorage en GeoJSON (conserva geometrías y propiedades)."""
+    return ee.batch.Export.table.toCloudStorage(
+        collection=coleccion,
+        description=descripcion,
+        bucket=bucket,
+        fileNamePrefix=prefijo,
+        fileFormat='GeoJSON',
+    )
+
+
+def descargar_de_gcs(bucket, objeto):
+    """Descarga `gs://bucket/objeto` como texto (google-cloud-storage si está instalado)."""
+    try:
+        from google.cloud import storage
+    except ImportError:  # sin el cliente: bucket público / URL firmada por el hosting
+        response = requests.get(f"https://storage.googleapis.com/{bucket}/{objeto}")
+        response.raise_for_status()
+        return response.text
+    return storage.Client().bucket(bucket).blob(objeto).download_as_text()
+
+
+def esperar_tarea(tarea, dormir=time.sleep, espera_inicial=ESPERA_INICIAL_S,
+                  espera_maxima=ESPERA_MAXIMA_S, tiempo_maximo=TIEMPO_MAXIMO_S):
+    """
+    Consulta `tarea.status()` con backoff exponencial hasta un estado final.
+    Devuelve el último status si COMPLETED; si no, lanza ee.EEException con el
+    mensaje de error de GEE (así los errores recuperables se pueden reintentar).
+    """
+    espera = espera_inicial
+    transcurrido = 0
+    while True:
+        estado = tarea.status()
+        if estado.get('state') in ESTADOS_FINALES:
+            break
+        if transcurrido >= tiempo_maximo:
+            raise ee.EEException(f"La tarea {estado.get('id')} no terminó en {tiempo_maximo} s")
+        dormir(espera)
+        transcurrido += espera
+        espera = min(espera * FACTOR_BACKOFF, espera_maxima)
+
+    if estado['state'] != 'COMPLETED':
+        raise ee.EEException(estado.get('error_message') or f"Tarea {estado['state']}")
+    return estado
+
+
+def exportar_y_esperar(coleccion, bucket, prefijo, descripcion='geoalertar_factores',
+                       crear_tarea=crear_tarea_gcs, descargar=descargar_de_gcs, dormir=time.sleep):
+    """
+    Exporta `coleccion`, espera a que termine y devuelve el GeoJSON descargado
+    como dict (misma estructura que `coleccion.getInfo()`).
+    """
+    tarea = crear_tarea(coleccion, descripcion, bucket, prefijo)
+    tarea.start()
+    print(f"  -> Tarea de exportación '{descripcion}' enviada; esperando a GEE...")
+    esperar_tarea(tarea, dormir=dormir)
+    print(f"  -> Tarea completa. Descargando gs://{bucket}/{prefijo}.geojson ...")
+    return json.loads(descargar(bucket, f"{prefijo}.geojson"))
@@ -0,0 +1,235 @@
+"""
+GeoAlertAR - Índice Meteorológico de Incendios canadiense (FWI), vectorizado.
+
+Implementa las ecuaciones de Van Wagner (1987) para los códigos de humedad
+FFMC, DMC y DC y los índices ISI, BUI y FWI. Cada función opera sobre arrays de
+NumPy (un valor por punto), así un día de miles de puntos es una sola pasada.
+
+Los códigos de humedad son acumulativos: el de hoy depende del de ayer. El
+`EstadoFWI` guarda por punto los últimos FFMC/DMC/DC y la fecha a la que
+corresponden (`fwi_estado.npz`), y `actualizar_dia` avanza un día con el clima
+del mediodía local (temperatura °C, humedad %, viento km/h) y la lluvia de las
+24 h previas (mm). Los puntos sin estado arrancan con los valores estándar de
+inicio de temporada.
+"""
+import os
+
+import numpy as np
+
+FFMC_INICIAL = 85.0
+DMC_INICIAL = 6.0
+DC_INICIAL = 15.0
+HORA_OBSERVACION = 12  # las entradas del FWI son las del mediodía local
+
+# Largo efectivo del día (DMC) por mes, según banda de latitud (cffdrs)
+LARGO_DIA_DMC = {
+    'norte_33': [6.5, 7.5, 9.0, 12.8, 13.9, 13.9, 12.4, 10.9, 9.4, 8.0, 7.0, 6.0],
+    'norte_0': [7.9, 8.4, 8.9, 9.5, 9.9, 10.2, 10.1, 9.7, 9.1, 8.6, 8.1, 7.8],
+    'sur_0': [10.1, 9.6, 9.1, 8.5, 8.1, 7.8, 7.9, 8.3, 8.9, 9.4, 9.9, 10.2],
+    'sur_30': [11.5, 10.5, 9.2, 7.9, 6.8, 6.2, 6.5, 7.4, 8.7, 10.0, 11.2, 11.8],
+}
+# Factor de largo del día (DC) por mes: hemisferio norte / sur (|lat| > 20), 1.4 cerca del ecuador
+LARGO_DIA_DC_NORTE = [-1.6, -1.6, -1.6, 0.9, 3.8, 5.8, 6.4, 5.0, 2.4, 0.4, -1.6, -1.6]
+LARGO_DIA_DC_SUR = [6.4, 5.0, 2.4, 0.4, -1.6, -1.6, -1.6, -1.6, -1.6, 0.9, 3.8, 5.8]
+LARGO_DIA_DC_ECUADOR = 1.4
+
+
+def _largo_dia_dmc(mes, lat):
+    i = mes - 1
+    return np.select(
+        [lat > 33, lat > 0, lat > -30],
+        [LARGO_DIA_DMC['norte_33'][i], LARGO_DIA_DMC['norte_0'][i], LARGO_DIA_DMC['sur_0'][i]],
+        default=LARGO_DIA_DMC['sur_30'][i])
+
+
+def _largo_dia_dc(mes, lat):
+    i = mes - 1
+    return np.select([lat > 20, lat <= -20], [LARGO_DIA_DC_NORTE[i], LARGO_DIA_DC_SUR[i]], default=LARGO_DIA_DC_ECUADOR)
+
+
+def ffmc(temperatura, humedad, viento, lluvia, ffmc_ayer):
+    """Código de humedad de combustibles finos (0-101)."""
+    t, h, w, p = (np.asarray(v, dtype=np.float64) for v in (temperatura, humedad, viento, lluvia))
+    h = np.clip(h, 0, 100)
+    mo = 147.2 * (101.0 - ffmc_ayer) / (59.5 + ffmc_ayer)
+
+    rf = np.maximum(p - 0.5, 1e-9)
+    mojado = mo + 42.5 * rf * np.exp(-100.0 / (251.0 - mo)) * (1.0 - np.exp(-6.93 / rf))
+    mojado = np.where(mo > 150, mojado + 0.0015 * (mo - 150.0) ** 2 * np.sqrt(rf), mojado)
+    mo = np.where(p > 0.5, np.minimum(mojado, 250.0), mo)
+
+    ed = 0.942 * h ** 0.679 + 11.0 * np.exp((h - 100.0) / 10.0) + 0.18 * (21.1 - t) * (1.0 - np.exp(-0.115 * h))
+    ew = 0.618 * h ** 0.753 + 10.0 * np.exp((h - 100.0) / 10.0) + 0.18 * (21.1 - t) * (1.0 - np.exp(-0.115 * h))
+    ko = 0.424 * (1.0 - (h / 100.0) ** 1.7) + 0.0694 * np.sqrt(w) * (1.0 - (h / 100.0) ** 8)
+    kl = 0.424 * (1.0 - ((100.0 - h) / 100.0) ** 1.7) + 0.0694 * np.sqrt(w) * (1.0 - ((100.0 - h) / 100.0) ** 8)
+    secado = ed + (mo - ed) * 10.0 ** (-ko * 0.581 * np.exp(0.0365 * t))
+    humectado = ew - (ew - mo) * 10.0 ** (-kl * 0.581 * np.exp(0.0365 * t))
+    m = np.select([mo > ed, mo < ew], [secado, humectado], default=mo)
+    return np.clip(59.5 * (250.0 - m) / (147.2 + m), 0.0, 101.0)
+
+
+def dmc(temperatura, humedad, lluvia, dmc_ayer, mes, lat):
+    """Código de humedad del mantillo (capa orgánica poco compacta)."""
+    t, h, p = (np.asarray(v, dtype=np.float64) for v in (temperatura, humedad, lluvia))
+    t = np.maximum(t, -1.1)
+    rk = 1.894 * (t + 1.1) * (100.0 - np.clip(h, 0, 100)) * _largo_dia_dmc(mes, lat) * 1e-4
+
+    dmc_ayer = np.asarray(dmc_ayer, dtype=np.float64)
+    rw = 0.92 * p - 1.27
+    wmi = 20.0 + 280.0 / np.exp(0.023 * dmc_ayer)
+    with np.errstate(divide='ignore'):
+        log_dmc = np.log(np.maximum(dmc_ayer, 1e-9))
+    b = np.select([dmc_ayer <= 33, dmc_ayer <= 65],
+                  [100.0 / (0.5 + 0.3 * dmc_ayer), 14.0 - 1.3 * log_dmc], default=6.2 * log_dmc - 17.2)
+    wmr = wmi + 1000.0 * rw / (48.77 + b * rw)
+    with np.errstate(invalid='ignore'):
+        mojado = 43.43 * (5.6348 - np.log(np.maximum(wmr - 20.0, 1e-9)))
+    pr = np.maximum(np.where(p > 1.5, mojado, dmc_ayer), 0.0)
+    return np.maximum(pr + rk, 0.0)
+
+
+def dc(temperatura, lluvia, dc_ayer, mes, lat):
+    """Código de sequía (humedad de la capa orgánica profunda)."""
+    t, p = (np.asarray(v, dtype=np.float64) for v in (temperatura, lluvia))
+    t = np.maximum(t, -2.8)
+    pe = np.maximum((0.36 * (t + 2.8) + _largo_dia_dc(mes, lat)) / 2.0, 0.0)
+
+    dc_ayer = np.asarray(dc_ayer, dtype=np.float64)
+    rw = 0.83 * p - 1.27
+    smi = 800.0 * np.exp(-dc_ayer / 400.0)
+    mojado = np.maximum(400.0 * np.log(800.0 / np.maximum(smi + 3.937 * rw, 1e-9)), 0.0)
+    dr = np.where(p > 2.8, mojado, dc_ayer)
+    return np.maximum(dr + pe, 0.0)
+
+
+def isi(ffmc_hoy, viento):
+    """Índice de propagación inicial."""
+    fm = 147.2 * (101.0 - ffmc_hoy) / (59.5 + ffmc_hoy)
+    sf = 19.115 * np.exp(-0.1386 * fm) * (1.0 + fm ** 5.31 / 4.93e7)
+    return sf * np.exp(0.05039 * np.asarray(viento, dtype=np.float64))
+
+
+def bui(dmc_hoy, dc_hoy):
+    """Índice de combustible disponible."""
+    dmc_hoy, dc_hoy = np.asarray(dmc_hoy, dtype=np.float64), np.asarray(dc_hoy, dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        suma = dmc_hoy + 0.4 * dc_hoy
+        bajo = 0.8 * dc_hoy * dmc_hoy / suma
+        alto = dmc_hoy - (1.0 - 0.8 * dc_hoy / suma) * (0.92 + (0.0114 * dmc_hoy) ** 1.7)
+    resultado = np.where(dmc_hoy <= 0.4 * dc_hoy, bajo, alto)
+    return np.maximum(np.nan_to_num(resultado, nan=0.0), 0.0)
+
+
+def fwi(isi_hoy, bui_hoy):
+    """Índice meteorológico de incendios."""
+    isi_hoy, bui_hoy = np.asarray(isi_hoy, dtype=np.float64), np.asarray(bui_hoy, dtype=np.float64)
+    fd = np.where(bui_hoy <= 80, 0.626 * bui_hoy ** 0.809 + 2.0, 1000.0 / (25.0 + 108.64 * np.exp(-0.023 * bui_hoy)))
+    bb = 0.1 * isi_hoy * fd
+    with np.errstate(divide='ignore', invalid='ignore'):
+        escalado = np.exp(2.72 * (0.434 * np.log(bb)) ** 0.647)
+    return np.where(bb > 1.0, escalado, bb)
+
+
+def actualizar_dia(codigos, temperatura, humedad, viento, lluvia, mes, lat):
+    """
+    Avanza un día. `codigos` = dict con ffmc/dmc/dc de ayer (arrays por punto);
+    devuelve dict con ffmc, dmc, dc, isi, bui y fwi de hoy. Donde falta algún
+    dato de clima (NaN) se conservan los códigos de ayer y los índices quedan NaN.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    falta = np.isnan(temperatura) | np.isnan(humedad) | np.isnan(viento) | np.isnan(lluvia)
+    t, h, w, p = (np.nan_to_num(np.asarray(v, dtype=np.float64)) for v in (temperatura, humedad, viento, lluvia))
+
+    hoy = {
+        'ffmc': ffmc(t, h, w, p, codigos['ffmc']),
+        'dmc': dmc(t, h, p, codigos['dmc'], mes, lat),
+        'dc': dc(t, p, codigos['dc'], mes, lat),
+    }
+    for codigo in ('ffmc', 'dmc', 'dc'):
+        hoy[codigo] = np.where(falta, codigos[codigo], hoy[codigo])
+    hoy['isi'] = isi(hoy['ffmc'], w)
+    hoy['bui'] = bui(hoy['dmc'], hoy['dc'])
+    hoy['fwi'] = fwi(hoy['isi'], hoy['bui'])
+    for indice in ('isi', 'bui', 'fwi'):
+        hoy[indice] = np.where(falta, np.nan, hoy[indice])
+    return hoy
+
+
+def clima_mediodia(horas, temperatura, humedad, viento, lluvia):
+    """
+    De matrices horarias (puntos × horas, eje `horas` datetime64[h] local) a
+    entradas diarias del FWI: valores de las 12:00 y lluvia acumulada en las 24 h
+    previas (13:00 del día anterior a 12:00). Devuelve (dias, dict de matrices
+    puntos × dias); sólo incluye días con 24 h previas completas en el eje.
+    """
+    horas = np.asarray(horas, dtype='datetime64[h]')
+    mediodias = np.flatnonzero((horas - horas.astype('datetime64[D]')).astype(np.int64) == HORA_OBSERVACION)
+    mediodias = mediodias[mediodias >= 23]
+    acumulada = np.concatenate([np.zeros((lluvia.shape[0], 1)), np.cumsum(lluvia, axis=1, dtype=np.float64)], axis=1)
+    # la suma acumulada propaga NaN: un hueco de lluvia anula el día, como corresponde
+    lluvia_24h = acumulada[:, mediodias + 1] - acumulada[:, mediodias - 23]
+    entradas = {
+        'temperatura': temperatura[:, mediodias].astype(np.float64),
+        'humedad': humedad[:, mediodias].astype(np.float64),
+        'viento': viento[:, mediodias].astype(np.float64),
+        'lluvia': lluvia_24h,
+    }
+    return horas[mediodias].astype('datetime64[D]'), entradas
+
+
+def ids_puntos(lat, lon):
+    """Id de estado de cada punto: sus coordenadas redondeadas a 4 decimales."""
+    return [f"{a:.4f},{b:.4f}" for a, b in zip(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64))]
+
+
+class EstadoFWI:
+    """Últimos códigos de humedad por punto (id texto) y la fecha a la que corresponden."""
+
+    def __init__(self, ids=(), ffmc=(), dmc=(), dc=(), fechas=()):
+        self.ids = np.asarray(ids, dtype=str)
+        self.codigos = {
+            'ffmc': np.asarray(ffmc, dtype=np.float64),
+            'dmc': np.asarray(dmc, dtype=np.float64),
+            'dc': np.asarray(dc, dtype=np.float64),
+        }
+        self.fechas = np.asarray(fechas, dtype='datetime64[D]')
+        self._posicion = {id_: i for i, id_ in enumerate(self.ids.tolist())}
+
+    @classmethod
+    def cargar(cls, ruta):
+        if not os.path.exists(ruta):
+            return cls()
+        with np.load(ruta, allow_pickle=False) as datos:
+            return cls(datos['ids'], datos['ffmc'], datos['dmc'], datos['dc'], datos['fechas'])
+
+    def guardar(self, ruta):
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        np.savez(ruta, ids=self.ids, fechas=self.fechas, **self.codigos)
+
+    def obtener(self, ids):
+        """(codigos, fechas) para `ids`; los desconocidos con valores iniciales y fecha NaT."""
+        posiciones = np.array([self._posicion.get(id_, -1) for id_ in ids], dtype=np.int64)
+        conocido = posiciones >= 0
+        iniciales = {'ffmc': FFMC_INICIAL, 'dmc': DMC_INICIAL, 'dc': DC_INICIAL}
+        codigos = {}
+        for codigo, inicial in iniciales.items():
+            codigos[codigo] = np.full(len(ids), inicial)
+            codigos[codigo][conocido] = self.codigos[codigo][posiciones[conocido]]
+        fechas = np.full(len(ids), np.datetime64('NaT'), dtype='datetime64[D]')
+        fechas[conocido] = self.fechas[posiciones[conocido]]
+        return codigos, fechas
+
+    def registrar(self, ids, codigos, fechas):
+        """Guarda en memoria los códigos de `ids` (los nuevos se agregan al final)."""
+        ids = list(ids)
+        nuevos = [id_ for id_ in dict.fromkeys(ids) if id_ not in self._posicion]
+        if nuevos:
+            self._posicion.update({id_: len(self.ids) + k for k, id_ in enumerate(nuevos)})
+            self.ids = np.concatenate([self.ids, np.array(nuevos, dtype=str)])
+            for codigo in self.codigos:
+                self.codigos[codigo] = np.concatenate([self.codigos[codigo], np.full(len(nuevos), np.nan)])
+            self.fechas = np.concatenate([self.fechas, np.full(len(nuevos), np.datetime64('NaT'), dtype='datetime64[D]')])
+        posiciones = np.array([self._posicion[id_] for id_ in ids], dtype=np.int64)
+        for codigo in self.codigos:
+            self.codigos[codigo][posiciones] = codigos[codigo]
+        self.fechas[posiciones] = fechas
@@ -0,0 +1,229 @@
+"""
+GeoAlertAR - Índice espacio-temporal sobre las instantáneas de `historico/`.
+
+Responder "riesgo en este lugar en los últimos 90 días" leyendo cada
+riesgo_YYYY-MM-DD.csv escala con la cantidad de días guardados. El índice
+consolida todas las instantáneas en columnas NumPy ordenadas por la clave
+(punto, día) — el equivalente a un B-tree sobre arrays: una consulta por rango
+son dos `searchsorted` y un slice contiguo — más una grilla espacial de puntos
+para las búsquedas por radio / bbox.
+
+Se persiste en `historico/indice.npz` y se actualiza en forma incremental: sólo
+se leen las instantáneas nuevas o modificadas desde la última vez. Los ids de
+punto son estables (se agregan al final, nunca se renumeran).
+
+    indice = IndiceHistorico.cargar()
+    dias, riesgo = indice.serie(-31.42, -64.19, desde='2025-06-01', hasta='2025-09-01')
+"""
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from riesgo_vectorizado import UMBRALES, NIVEL_BAJO, FACTORES
+
+CARPETA_HISTORICO = 'historico'
+ARCHIVO_INDICE = 'indice.npz'
+DECIMALES_PUNTO = 4          # coordenadas redondeadas que identifican a un punto
+LADO_CELDA_GRADOS = 0.1      # grilla espacial de puntos
+RADIO_TIERRA_KM = 6371.0
+COLUMNAS = ('riesgo_final', 'cobertura') + FACTORES
+
+# orden creciente; DATOS INSUFICENTES y desconocidos quedan en -1
+ORDEN_NIVELES = {nivel: i for i, nivel in enumerate([NIVEL_BAJO] + [n for _, n in reversed(UMBRALES)])}
+_PATRON_INSTANTANEA = re.compile(r'riesgo_(\d{4}-\d{2}-\d{2})\.csv$')
+
+
+def clave_punto_dia(ids, dias):
+    """(punto, día) -> int64 ordenable: primero por punto, luego por día."""
+    return np.asarray(ids, dtype=np.int64) * (1 << 32) + np.asarray(dias, dtype='datetime64[D]').astype(np.int64)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(a))
+
+
+def _celda(lat, lon, lado=LADO_CELDA_GRADOS):
+    return (np.floor(np.asarray(lat) / lado).astype(np.int64) << 32) + np.floor(np.asarray(lon) / lado).astype(np.int64)
+
+
+class IndiceHistorico:
+    def __init__(self, carpeta=CARPETA_HISTORICO):
+        self.carpeta = carpeta
+        # tabla de puntos (id = posición)
+        self.lat = np.empty(0)
+        self.lon = np.empty(0)
+        self.nombres = np.empty(0, dtype=str)
+        # observaciones ordenadas por clave (punto, día)
+        self.claves = np.empty(0, dtype=np.int64)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.dias = np.empty(0, dtype='datetime64[D]')
+        self.orden_nivel = np.empty(0, dtype=np.int8)
+        self.columnas = {c: np.empty(0, dtype=np.float32) for c in COLUMNAS}
+        self.fuentes = {}  # archivo -> mtime ya indexado
+        self._grilla = None
+
+    # --- construcción / persistencia ---
+
+    @classmethod
+    def cargar(cls, carpeta=CARPETA_HISTORICO, actualizar=True):
+        """Lee `carpeta`/indice.npz si existe y, por defecto, indexa instantáneas nuevas."""
+        indice = cls(carpeta)
+        ruta = os.path.join(carpeta, ARCHIVO_INDICE)
+        if os.path.exists(ruta):
+            with np.load(ruta, allow_pickle=False) as datos:
+                indice.lat, indice.lon, indice.nombres = datos['lat'], datos['lon'], datos['nombres']
+                indice.claves, indice.ids, indice.dias = datos['claves'], datos['ids'], datos['dias']
+                indice.orden_nivel = datos['orden_nivel']
+                indice.columnas = {c: datos[f"col_{c}"] for c in COLUMNAS}
+                indice.fuentes = dict(zip(datos['fuentes'].tolist(), datos['mtimes'].tolist()))
+        if actualizar and indice.actualizar():
+            indice.guardar()
+        return indice
+
+    def guardar(self):
+        np.savez(
+            os.path.join(self.carpeta, ARCHIVO_INDICE),
+            lat=self.lat, lon=self.lon, nombres=self.nombres,
+            claves=self.claves, ids=self.ids, dias=self.dias, orden_nivel=self.orden_nivel,
+            fuentes=np.array(list(self.fuentes), dtype=str), mtimes=np.array(list(self.fuentes.values()), dtype=np.float64),
+            **{f"col_{c}": v for c, v in self.columnas.items()},
+        )
+
+    def actualizar(self):
+        """Indexa instantáneas nuevas o modificadas. Devuelve cuántas leyó."""
+        pendientes = []
+        for ruta in sorted(glob.glob(os.path.join(self.carpeta, 'riesgo_*.csv'))):
+            fecha = _PATRON_INSTANTANEA.search(ruta)
+            nombre = os.path.basename(ruta)
+            if fecha and self.fuentes.get(nombre) != os.path.getmtime(ruta):
+                pendientes.append((ruta, np.datetime64(fecha.group(1), 'D')))
+        if not pendientes:
+            return 0
+
+        partes = []
+        for ruta, dia in pendientes:
+            df = pd.read_csv(ruta)
+            df['dia'] = dia
+            partes.append(df)
+            self.fuentes[os.path.basename(ruta)] = os.path.getmtime(ruta)
+        nuevas = pd.concat(partes, ignore_index=True)
+        ids = self._ids_de(nuevas['lat'].to_numpy(dtype=np.float64), nuevas['lon'].to_numpy(dtype=np.float64),
+                           nuevas['nombre'].fillna('').astype(str).to_numpy() if 'nombre' in nuevas else None)
+        dias = nuevas['dia'].to_numpy().astype('datetime64[D]')
+        claves = clave_punto_dia(ids, dias)
+
+        # una instantánea re-escrita reemplaza todas las filas de su día, también
+        # las de puntos que ya no trae
+        conservar = ~np.isin(self.dias, np.array([dia for _, dia in pendientes], dtype='datetime64[D]'))
+        self.claves = np.concatenate([self.claves[conservar], claves])
+        self.ids = np.concatenate([self.ids[conservar], ids])
+        self.dias = np.concatenate([self.dias[conservar], dias])
+        orden_nivel = nuevas['nivel'].map(ORDEN_NIVELES).fillna(-1).to_numpy(dtype=np.int8)
+        self.orden_nivel = np.concatenate([self.orden_nivel[conservar], orden_nivel])
+        for c in COLUMNAS:
+            valores = pd.to_numeric(nuevas[c], errors='coerce') if c in nuevas else pd.Series(np.nan, index=nuevas.index)
+            self.columnas[c] = np.concatenate([self.columnas[c][conservar], valores.to_numpy(dtype=np.float32)])
+
+        orden = np.argsort(self.claves, kind='stable')
+        self.claves, self.ids, self.dias, self.orden_nivel = (
+            self.claves[orden], self.ids[orden], self.dias[orden], self.orden_nivel[orden])
+        self.columnas = {c: v[orden] for c, v in self.columnas.items()}
+        return len(pendientes)
+
+    def _ids_de(self, lat, lon, nombres=None):
+        """Ids de punto para coordenadas; las nuevas se agregan al final de la tabla."""
+        redondeadas = np.round(np.column_stack([lat, lon]), DECIMALES_PUNTO)
+        conocidos = {(a, b): i for i, (a, b) in enumerate(np.round(np.column_stack([self.lat, self.lon]), DECIMALES_PUNTO).tolist())}
+        ids = np.empty(len(lat), dtype=np.int64)
+        nuevos_lat, nuevos_lon, nuevos_nombres = [], [], []
+        for k, coordenada in enumerate(map(tuple, redondeadas.tolist())):
+            if coordenada not in conocidos:
+                conocidos[coordenada] = len(self.lat) + len(nuevos_lat)
+                nuevos_lat.append(lat[k])
+                nuevos_lon.append(lon[k])
+                nuevos_nombres.append(nombres[k] if nombres is not None else '')
+            ids[k] = conocidos[coordenada]
+        if nuevos_lat:
+            self.lat = np.concatenate([self.lat, nuevos_lat])
+            self.lon = np.concatenate([self.lon, nuevos_lon])
+            self.nombres = np.concatenate([self.nombres, np.array(nuevos_nombres, dtype=str)])
+            self._grilla = None
+        return ids
+
+    # --- consultas espaciales ---
+
+    def _grilla_puntos(self):
+        if self._grilla is None:
+            celdas = _celda(self.lat, self.lon)
+            orden = np.argsort(celdas, kind='stable')
+            self._grilla = (celdas[orden], orden)
+        return self._grilla
+
+    def puntos_cerca(self, lat, lon, radio_km):
+        """Ids de los puntos a menos de `radio_km` de (lat, lon)."""
+        celdas, orden = self._grilla_puntos()
+        alcance = int(np.ceil(radio_km / (111.0 * LADO_CELDA_GRADOS * max(np.cos(np.radians(lat)), 1e-6))))
+        fila, columna = np.floor(lat / LADO_CELDA_GRADOS), np.floor(lon / LADO_CELDA_GRADOS)
+        candidatos = []
+        for dfila in range(-alcance, alcance + 1):
+            base = (int(fila) + dfila) << 32
+            # las columnas de una fila son contiguas en el orden de las claves
+            desde = np.searchsorted(celdas, base + int(columna) - alcance, 'left')
+            hasta = np.searchsorted(celdas, base + int(columna) + alcance, 'right')
+            candidatos.append(orden[desde:hasta])
+        candidatos = np.concatenate(candidatos)
+        return np.sort(candidatos[haversine_km(lat, lon, self.lat[candidatos], self.lon[candidatos]) <= radio_km])
+
+    def punto_mas_cercano(self, lat, lon):
+        if len(self.lat) == 0:
+            raise LookupError("El índice histórico está vacío")
+        return int(np.argmin(haversine_km(lat, lon, self.lat, self.lon)))
+
+    def puntos_en_bbox(self, lon_min, lat_min, lon_max, lat_max):
+        return np.flatnonzero((self.lat >= lat_min) & (self.lat <= lat_max) & (self.lon >= lon_min) & (self.lon <= lon_max))
+
+    # --- consultas temporales ---
+
+    def _rango(self, ids, desde=None, hasta=None):
+        """Posiciones (ordenadas) de las observaciones de `ids` entre `desde` y `hasta` inclusive."""
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.int64))
+        inicio = clave_punto_dia(ids, np.datetime64(desde or '1970-01-01', 'D'))
+        fin = clave_punto_dia(ids, np.datetime64(hasta or '2200-01-01', 'D'))
+        izquierda = np.searchsorted(self.claves, inicio, 'left')
+        derecha = np.searchsorted(self.claves, fin, 'right')
+        cantidad = derecha - izquierda
+        # concatenación de los slices contiguos izquierda[i]:derecha[i]
+        return np.repeat(izquierda - np.cumsum(cantidad) + cantidad, cantidad) + np.arange(cantidad.sum())
+
+    def consultar(self, ids=None, desde=None, hasta=None, columnas=('riesgo_final',)):
+        """
+        Observaciones de los puntos `ids` (None = todos) en [desde, hasta] como
+        dict de arrays: ids, dias, orden_nivel y las `columnas` pedidas.
+        """
+        if ids is None:
+            ids = np.arange(len(self.lat))
+        posiciones = self._rango(ids, desde, hasta)
+        resultado = {'ids': self.ids[posiciones], 'dias': self.dias[posiciones], 'orden_nivel': self.orden_nivel[posiciones]}
+        resultado.update({c: self.columnas[c][posiciones] for c in columnas})
+        return resultado
+
+    def serie(self, lat, lon, desde=None, hasta=None, columna='riesgo_final'):
+        """(dias, valores) del punto más cercano a (lat, lon)."""
+        posiciones = self._rango(self.punto_mas_cercano(lat, lon), desde, hasta)
+        return self.dias[posiciones], self.columnas[columna][posiciones]
+
+    def matriz(self, ids, desde, hasta, columna='riesgo_final'):
+        """Matriz densa puntos × días (NaN donde no hay instantánea) y el eje de días."""
+        ids = np.asarray(ids, dtype=np.int64)
+        dias = np.arange(np.datetime64(desde, 'D'), np.datetime64(hasta, 'D') + 1)
+        salida = np.full((len(ids), len(dias)), np.nan, dtype=np.float32)
+        obs = self.consultar(ids, desde, hasta, columnas=(columna,))
+        fila = np.searchsorted(ids, obs['ids']) if np.all(np.diff(ids) > 0) else \
+            np.argsort(ids)[np.searchsorted(np.sort(ids), obs['ids'])]
+        salida[fila, (obs['dias'] - dias[0]).astype(np.int64)] = obs[columna]
+        return salida, dias
@@ -0,0 +1,173 @@
+"""
+GeoAlertAR - Modelo de riesgo aprendido de los factores guardados.
+
+Entrena una regresión logística (scikit-learn, CPU) con las observaciones del
+índice histórico y etiquetas de focos FIRMS (las mismas de `validacion.py`):
+¿hubo foco cerca del punto en los próximos días? Las características son los
+factores normalizados 0-1 de RANGOS más un indicador de dato presente por
+factor, así los faltantes no se confunden con riesgo bajo.
+
+scikit-learn sólo hace falta para entrenar: se guardan los coeficientes en un
+.npz y la inferencia es `sigmoide(X @ w + b)` en NumPy, para cualquier forma de
+entrada (puntos, o puntos × horas). El riesgo es la probabilidad × 100; con
+`class_weight='balanced'` es un puntaje relativo, no una probabilidad calibrada.
+
+    python modelo_aprendido.py --focos firms/*.csv      # entrenar
+    python modelo_aprendido.py --benchmark               # presupuesto de inferencia
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+from riesgo_vectorizado import normalizar_factor, RANGOS, FACTORES
+from indice_historico import IndiceHistorico, CARPETA_HISTORICO
+from validacion import cargar_focos, focos_por_punto, etiquetar, auc_mann_whitney, RADIO_KM, HORIZONTE_DIAS
+
+try:
+    from sklearn.linear_model import LogisticRegression
+except ImportError:  # opcional: sin scikit-learn se puede puntuar pero no entrenar
+    LogisticRegression = None
+
+ARCHIVO_MODELO = os.path.join('modelos', 'modelo_aprendido.npz')
+FRACCION_VALIDACION = 0.2      # últimos días del histórico, fuera del entrenamiento
+PUNTOS_BENCHMARK = 100_000
+HORAS_BENCHMARK = 24
+PRESUPUESTO_INFERENCIA_S = 1.0  # por corrida horaria de PUNTOS_BENCHMARK × HORAS_BENCHMARK
+
+
+def caracteristicas(factores):
+    """Matriz (..., 2·len(FACTORES)): factor normalizado (0 si falta) e indicador de presencia."""
+    columnas = []
+    presencias = []
+    for factor in FACTORES:
+        valores = np.asarray(factores.get(factor, np.nan), dtype=np.float64)
+        presente = ~np.isnan(valores)
+        minimo, amplitud, invertido = RANGOS[factor]
+        columnas.append(np.where(presente, normalizar_factor(valores, minimo, amplitud, invertido), 0.0))
+        presencias.append(presente.astype(np.float64))
+    return np.stack(np.broadcast_arrays(*columnas, *presencias), axis=-1)
+
+
+class ModeloAprendido:
+    def __init__(self, coeficientes, intercepto, metadatos=None):
+        self.coeficientes = np.asarray(coeficientes, dtype=np.float64)
+        self.intercepto = float(intercepto)
+        self.metadatos = metadatos or {}
+
+    def puntuar(self, factores):
+        """Riesgo 0-100 con la forma del broadcasting de los factores."""
+        # equivale a caracteristicas(factores) @ coeficientes, sin materializar la matriz:
+        # los factores satelitales (puntos × 1) no se expanden a puntos × horas
+        n = len(FACTORES)
+        z = self.intercepto
+        for j, factor in enumerate(FACTORES):
+            valores = np.asarray(factores.get(factor, np.nan), dtype=np.float64)
+            presente = ~np.isnan(valores)
+            minimo, amplitud, invertido = RANGOS[factor]
+            r = normalizar_factor(valores, minimo, amplitud, invertido)
+            z = z + np.where(presente, self.coeficientes[j] * r + self.coeficientes[n + j], 0.0)
+        return 100.0 / (1.0 + np.exp(-z))
+
+    def guardar(self, ruta=ARCHIVO_MODELO):
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        np.savez(ruta, coeficientes=self.coeficientes, intercepto=self.intercepto,
+                 factores=np.array(FACTORES), metadatos=json.dumps(self.metadatos))
+
+    @classmethod
+    def cargar(cls, ruta=ARCHIVO_MODELO):
+        with np.load(ruta, allow_pickle=False) as datos:
+            if tuple(datos['factores'].tolist()) != FACTORES:
+                raise ValueError(f"'{ruta}' fue entrenado con otros factores: {datos['factores'].tolist()}")
+            return cls(datos['coeficientes'], datos['intercepto'], json.loads(str(datos['metadatos'])))
+
+
+def entrenar(indice, focos, radio_km=RADIO_KM, horizonte_dias=HORIZONTE_DIAS, fraccion_validacion=FRACCION_VALIDACION):
+    """Ajusta el modelo con todo el índice; reporta AUC en los últimos días (fuera de la muestra)."""
+    if LogisticRegression is None:
+        raise ImportError("Entrenar requiere scikit-learn: pip install scikit-learn")
+    observaciones = indice.consultar(columnas=FACTORES)
+    ids, dias = observaciones['ids'], observaciones['dias']
+    ids_foco, dias_foco = focos_por_punto(indice.lat, indice.lon, focos, radio_km)
+    etiqueta = etiquetar(ids, dias, ids_foco, dias_foco, horizonte_dias)
+    if etiqueta.all() or not etiqueta.any():
+        raise ValueError("Las etiquetas no tienen casos positivos y negativos: revisar focos y período")
+    X = caracteristicas({f: observaciones[f] for f in FACTORES})
+
+    # división temporal: validar con días posteriores a todos los de entrenamiento
+    dias_unicos = np.unique(dias)
+    corte = dias_unicos[int(len(dias_unicos) * (1 - fraccion_validacion))] if fraccion_validacion else dias_unicos[-1] + 1
+    entrenamiento = dias < corte
+
+    def ajustar(filas):
+        return LogisticRegression(class_weight='balanced', max_iter=1000).fit(X[filas], etiqueta[filas])
+
+    auc_validacion = None
+    if fraccion_validacion and etiqueta[entrenamiento].any() and etiqueta[~entrenamiento].any():
+        parcial = ajustar(entrenamiento)
+        auc_validacion = auc_mann_whitney(parcial.decision_function(X[~entrenamiento]), etiqueta[~entrenamiento])
+
+    final = ajustar(np.ones(len(etiqueta), dtype=bool))
+    metadatos = {
+        'entrenado': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'periodo': [str(dias.min()), str(dias.max())],
+        'observaciones': int(len(etiqueta)), 'positivas': int(etiqueta.sum()),
+        'radio_km': radio_km, 'horizonte_dias': horizonte_dias,
+        'auc_validacion': auc_validacion, 'validacion_desde': str(corte),
+    }
+    return ModeloAprendido(final.coef_[0], final.intercept_[0], metadatos)
+
+
+def medir_inferencia(modelo, puntos=PUNTOS_BENCHMARK, horas=HORAS_BENCHMARK, repeticiones=5, semilla=0):
+    """Mejor tiempo (s) de puntuar puntos × horas con factores sintéticos (satelitales por punto, clima por hora)."""
+    rng = np.random.default_rng(semilla)
+    factores = {}
+    for factor in FACTORES:
+        minimo, amplitud, _ = RANGOS[factor]
+        forma = (puntos, horas) if factor in ('humedad_min', 'viento_max_kmh') else (puntos, 1)
+        valores = rng.uniform(minimo, minimo + amplitud, forma)
+        valores[rng.random(forma) < 0.05] = np.nan
+        factores[factor] = valores
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        modelo.puntuar(factores)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GeoAlertAR - modelo de riesgo aprendido")
+    parser.add_argument('--focos', nargs='+', help="CSVs de focos FIRMS para entrenar")
+    parser.add_argument('--historico', default=CARPETA_HISTORICO)
+    parser.add_argument('--radio-km', type=float, default=RADIO_KM)
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE_DIAS)
+    parser.add_argument('--modelo', default=ARCHIVO_MODELO, help="archivo .npz del modelo")
+    parser.add_argument('--benchmark', action='store_true',
+                        help=f"medir la inferencia ({PUNTOS_BENCHMARK} puntos × {HORAS_BENCHMARK} h) contra el presupuesto")
+    args = parser.parse_args()
+    if not args.focos and not args.benchmark:
+        parser.error("indicar --focos para entrenar y/o --benchmark")
+
+    if args.focos:
+        rutas = [ruta for patron in args.focos for ruta in sorted(glob.glob(patron))]
+        print(f"🧠 Entrenando con el histórico de '{args.historico}' y {len(rutas)} archivos de focos...")
+        modelo = entrenar(IndiceHistorico.cargar(args.historico), cargar_focos(rutas), args.radio_km, args.horizonte)
+        modelo.guardar(args.modelo)
+        auc = modelo.metadatos['auc_validacion']
+        print(f"✅ Modelo guardado en '{args.modelo}' (AUC fuera de muestra: {'n/d' if auc is None else f'{auc:.3f}'}).")
+        for factor, peso in zip(FACTORES, modelo.coeficientes):
+            print(f"  {factor:>15}: {peso:+.3f}")
+
+    if args.benchmark:
+        modelo = ModeloAprendido.cargar(args.modelo)
+        segundos = medir_inferencia(modelo)
+        celdas = PUNTOS_BENCHMARK * HORAS_BENCHMARK
+        dentro = segundos <= PRESUPUESTO_INFERENCIA_S
+        print(f"{'✅' if dentro else '❌'} Inferencia: {segundos:.3f} s para {celdas:,} celdas "
+              f"({celdas / segundos:,.0f}/s; presupuesto {PRESUPUESTO_INFERENCIA_S} s).")
+        if not dentro:
+            raise SystemExit(1)
@@ -0,0 +1,120 @@
+"""
+GeoAlertAR - Registro de modelos de riesgo intercambiables.
+
+Todos los modelos implementan la misma interfaz por lotes: `puntuar(factores)`
+recibe un dict columna -> array (un valor por punto; los factores de
+riesgo_vectorizado más lat/lon) y devuelve el riesgo 0-100 de cada punto (NaN
+donde el modelo no tiene datos). Así `ejecutar` arma los arrays una sola vez y
+calcula varios modelos lado a lado, una columna `riesgo_<modelo>` por cada uno.
+
+Para agregar un modelo:
+
+    @registrar_modelo('mi_modelo')
+    class ModeloMio(ModeloRiesgo):
+        def puntuar(self, factores): ...
+
+`crear_modelo(nombre, **opciones)` lo instancia; cada modelo toma de
+`opciones` lo que necesita (perfil, ruta del estado FWI, contexto...).
+"""
+import abc
+import sys
+import warnings
+
+import numpy as np
+
+import fwi
+from modelo_aprendido import ModeloAprendido, ARCHIVO_MODELO
+from riesgo_vectorizado import calcular_riesgo_vectorizado
+
+MODELOS = {}
+
+# FWI -> riesgo 0-100: los cortes de clase de EFFIS (bajo / moderado / alto /
+# muy alto / extremo) caen en los umbrales de nivel del índice lineal.
+CORTES_FWI = [0.0, 11.2, 21.3, 38.0, 50.0]
+RIESGO_CORTES_FWI = [0.0, 25.0, 50.0, 75.0, 100.0]
+DIAS_VIGENCIA_ESTADO_FWI = 1  # códigos de humedad de hasta un día antes de la fecha de referencia
+
+
+def registrar_modelo(nombre):
+    """Decorador que agrega la clase al registro MODELOS con `nombre`."""
+    def registrar(clase):
+        if nombre in MODELOS:
+            raise ValueError(f"Modelo '{nombre}' ya registrado")
+        clase.nombre = nombre
+        MODELOS[nombre] = clase
+        return clase
+    return registrar
+
+
+def crear_modelo(nombre, **opciones):
+    if nombre not in MODELOS:
+        raise KeyError(f"Modelo '{nombre}' desconocido (disponibles: {', '.join(MODELOS)})")
+    return MODELOS[nombre](**opciones)
+
+
+def puntuar_modelos(modelos, factores):
+    """{'riesgo_<nombre>': array} para cada modelo, sobre los mismos arrays de factores."""
+    return {f"riesgo_{modelo.nombre}": np.round(modelo.puntuar(factores), 1) for modelo in modelos}
+
+
+class ModeloRiesgo(abc.ABC):
+    nombre = None
+
+    def __init__(self, **opciones):
+        pass
+
+    @abc.abstractmethod
+    def puntuar(self, factores):
+        """Riesgo 0-100 (array) a partir del dict factor -> array."""
+
+
+@registrar_modelo('lineal')
+class ModeloLineal(ModeloRiesgo):
+    """El índice publicado: suma ponderada de factores normalizados (según el perfil)."""
+
+    def __init__(self, perfil=None, **opciones):
+        self.perfil = perfil
+
+    def puntuar(self, factores):
+        return calcular_riesgo_vectorizado(factores, self.perfil)
+
+
+@registrar_modelo('fwi')
+class ModeloFWI(ModeloRiesgo):
+    """
+    FWI canadiense con los códigos de humedad del estado que mantiene `--fwi`
+    y el viento máximo del día; sin estado vigente para el punto, NaN.
+    """
+
+    def __init__(self, ruta_estado_fwi=None, contexto=None, **opciones):
+        self.estado = fwi.EstadoFWI.cargar(ruta_estado_fwi) if ruta_estado_fwi else fwi.EstadoFWI()
+        self.fecha = np.datetime64(contexto.fecha_referencia, 'D') if contexto else None
+
+    def puntuar(self, factores):
+        ids = fwi.ids_puntos(factores['lat'], factores['lon'])
+        codigos, fechas = self.estado.obtener(ids)
+        vigente = ~np.isnat(fechas)
+        if self.fecha is not None:
+            vigente &= (fechas <= self.fecha) & (fechas >= self.fecha - DIAS_VIGENCIA_ESTADO_FWI)
+        viento = np.asarray(factores.get('viento_max_kmh', np.nan), dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # viento NaN -> índice NaN
+            indice = fwi.fwi(fwi.isi(codigos['ffmc'], viento), fwi.bui(codigos['dmc'], codigos['dc']))
+        riesgo = np.interp(indice, CORTES_FWI, RIESGO_CORTES_FWI)
+        return np.where(vigente & ~np.isnan(indice), riesgo, np.nan)
+
+
+@registrar_modelo('aprendido')
+class ModeloRegresion(ModeloRiesgo):
+    """Regresión logística entrenada con `modelo_aprendido.py` (inferencia en NumPy)."""
+
+    def __init__(self, ruta_modelo_aprendido=ARCHIVO_MODELO, **opciones):
+        try:
+            self.modelo = ModeloAprendido.cargar(ruta_modelo_aprendido)
+        except FileNotFoundError:
+            print(f"❌ ERROR CRÍTICO: No se encontró el modelo '{ruta_modelo_aprendido}'. "
+                  f"Entrená primero con modelo_aprendido.py --focos firms/*.csv")
+            sys.exit(1)
+
+    def puntuar(self, factores):
+        return self.modelo.puntuar(factores)
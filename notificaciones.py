@@ -0,0 +1,288 @@
+"""
+GeoAlertAR - Despacho de notificaciones de cambios de nivel.
+
+Toma el feed de `alertas.py` (docs/cambios_nivel.jsonl) y lo reparte a los
+destinos de cada región configurada en un JSON (ver notificaciones_ejemplo.json):
+
+- Región: bbox [lon_min, lat_min, lon_max, lat_max] (sin bbox = toda la provincia)
+  y la lista de destinos que la reciben.
+- Destino: 'webhook' (POST JSON), 'smtp' (un correo por lote) o 'archivo' (JSONL).
+  Cada destino tiene su propio límite de envíos por segundo y de envíos
+  simultáneos, compartido entre todas las regiones que lo usan.
+
+Para que una ola de escalamientos en toda la provincia no sature los gateways:
+- se agrupan las alertas por región en lotes de hasta `tamanio_lote`,
+- se descarta lo ya notificado a cada destino para el mismo punto y nivel dentro
+  del período de enfriamiento (estado en historico/notificaciones_estado.json,
+  por destino: si el webhook falló, se reintenta aunque el archivo lo haya recibido),
+- los envíos corren en asyncio con una cola acotada (el productor espera si los
+  trabajadores van atrasados), semáforo por destino y token bucket por destino,
+  con reintentos y backoff exponencial.
+
+Los envíos HTTP/SMTP bloqueantes corren en hilos (`asyncio.to_thread`); se
+puede probar contra servidores locales (`python -m http.server`, aiosmtpd).
+
+    python notificaciones.py --config notificaciones.json
+"""
+import abc
+import argparse
+import asyncio
+import json
+import os
+import smtplib
+import time
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+
+import numpy as np
+import requests
+
+ARCHIVO_CAMBIOS = os.path.join('docs', 'cambios_nivel.jsonl')
+ARCHIVO_CONFIG = 'notificaciones.json'
+ARCHIVO_ESTADO = os.path.join('historico', 'notificaciones_estado.json')
+ENFRIAMIENTO_HORAS = 12
+TAMANIO_LOTE = 50
+TAMANIO_COLA = 100        # lotes en espera antes de frenar al productor
+TRABAJADORES = 8
+REINTENTOS = 3
+ESPERA_REINTENTO_S = 1.0
+TIMEOUT_HTTP_S = 10
+
+
+class LimiteTasa:
+    """Token bucket: hasta `tasa` envíos por segundo, con ráfagas de hasta `rafaga`."""
+
+    def __init__(self, tasa, rafaga=None):
+        self.tasa = float(tasa)
+        self.capacidad = float(rafaga or max(1.0, tasa))
+        self.fichas = self.capacidad
+        self.ultima = time.monotonic()
+        self._cerrojo = asyncio.Lock()
+
+    async def adquirir(self):
+        async with self._cerrojo:
+            while True:
+                ahora = time.monotonic()
+                self.fichas = min(self.capacidad, self.fichas + (ahora - self.ultima) * self.tasa)
+                self.ultima = ahora
+                if self.fichas >= 1:
+                    self.fichas -= 1
+                    return
+                await asyncio.sleep((1 - self.fichas) / self.tasa)
+
+
+class Destino(abc.ABC):
+    def __init__(self, nombre, tasa_por_segundo=5, concurrencia=4, **opciones):
+        self.nombre = nombre
+        self.limite = LimiteTasa(tasa_por_segundo)
+        self.semaforo = asyncio.Semaphore(concurrencia)
+
+    async def enviar(self, lote):
+        """Envía con reintentos; devuelve True si salió."""
+        async with self.semaforo:
+            for intento in range(REINTENTOS):
+                await self.limite.adquirir()
+                try:
+                    await self._enviar(lote)
+                    return True
+                except Exception as e:
+                    print(f"  -> Error enviando a '{self.nombre}' (intento {intento + 1}/{REINTENTOS}): {e}")
+                    await asyncio.sleep(ESPERA_REINTENTO_S * 2 ** intento)
+            return False
+
+    @abc.abstractmethod
+    async def _enviar(self, lote):
+        """Un intento de envío del lote; cualquier excepción cuenta como fallo."""
+
+
+class DestinoWebhook(Destino):
+    def __init__(self, nombre, url, encabezados=None, **opciones):
+        super().__init__(nombre, **opciones)
+        self.url = url
+        self.encabezados = encabezados or {}
+
+    async def _enviar(self, lote):
+        def post():
+            response = requests.post(self.url, json=lote, headers=self.encabezados, timeout=TIMEOUT_HTTP_S)
+            response.raise_for_status()
+        await asyncio.to_thread(post)
+
+
+class DestinoSMTP(Destino):
+    def __init__(self, nombre, host, remitente, para, puerto=25, usuario=None, clave=None, tls=False, **opciones):
+        super().__init__(nombre, **opciones)
+        self.host, self.puerto = host, puerto
+        self.remitente, self.para = remitente, list(para)
+        self.usuario, self.clave, self.tls = usuario, clave, tls
+
+    def _mensaje(self, lote):
+        mensaje = EmailMessage()
+        suben = sum(a['tipo'] == 'escalamiento' for a in lote['alertas'])
+        mensaje['Subject'] = f"GeoAlertAR [{lote['region']}]: {suben} escalamientos de riesgo de incendio"
+        mensaje['From'] = self.remitente
+        mensaje['To'] = ', '.join(self.para)
+        lineas = [f"{a['nombre']}: {a['nivel_anterior'] or '-'} -> {a['nivel']} (riesgo {a['riesgo']:.1f})"
+                  for a in lote['alertas']]
+        mensaje.set_content('\n'.join(lineas))
+        return mensaje
+
+    async def _enviar(self, lote):
+        def enviar():
+            with smtplib.SMTP(self.host, self.puerto, timeout=TIMEOUT_HTTP_S) as smtp:
+                if self.tls:
+                    smtp.starttls()
+                if self.usuario:
+                    smtp.login(self.usuario, self.clave)
+                smtp.send_message(self._mensaje(lote))
+        await asyncio.to_thread(enviar)
+
+
+class DestinoArchivo(Destino):
+    def __init__(self, nombre, ruta, **opciones):
+        super().__init__(nombre, **{'tasa_por_segundo': 1000, **opciones})
+        self.ruta = ruta
+
+    async def _enviar(self, lote):
+        os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+        with open(self.ruta, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(lote, ensure_ascii=False) + '\n')
+
+
+TIPOS_DESTINO = {'webhook': DestinoWebhook, 'smtp': DestinoSMTP, 'archivo': DestinoArchivo}
+
+
+def crear_destinos(config):
+    """Instancia los destinos y verifica que cada región use sólo destinos definidos."""
+    destinos = {}
+    for nombre, opciones in config.get('destinos', {}).items():
+        opciones = dict(opciones)
+        tipo = opciones.pop('tipo')
+        if tipo not in TIPOS_DESTINO:
+            raise ValueError(f"Destino '{nombre}': tipo '{tipo}' desconocido ({', '.join(TIPOS_DESTINO)})")
+        destinos[nombre] = TIPOS_DESTINO[tipo](nombre, **opciones)
+    for region, definicion in config.get('regiones', {}).items():
+        faltantes = [nombre for nombre in definicion.get('destinos', []) if nombre not in destinos]
+        if faltantes:
+            raise ValueError(f"Región '{region}': destinos no definidos {faltantes} "
+                             f"(definidos: {', '.join(destinos) or 'ninguno'})")
+    return destinos
+
+
+def leer_cambios(ruta=ARCHIVO_CAMBIOS):
+    if not os.path.exists(ruta):
+        return []
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def clave_estado(destino, cambio):
+    return f"{destino}|{cambio['id']}|{cambio['nivel']}"
+
+
+def filtrar_enfriamiento(cambios, estado, ahora, destino, horas=ENFRIAMIENTO_HORAS):
+    """Descarta cambios ya notificados a `destino` (mismo punto y nivel) hace menos de `horas`."""
+    limite = ahora - timedelta(hours=horas)
+    vigentes = []
+    for cambio in cambios:
+        ultimo = estado.get(clave_estado(destino, cambio))
+        if ultimo is None or datetime.fromisoformat(ultimo) < limite:
+            vigentes.append(cambio)
+    return vigentes
+
+
+def armar_lotes(cambios, regiones, tamanio_lote=TAMANIO_LOTE):
+    """[(region, alertas)] con hasta `tamanio_lote` alertas; un cambio puede ir a varias regiones."""
+    if not cambios:
+        return []
+    lat = np.array([c['lat'] for c in cambios], dtype=np.float64)
+    lon = np.array([c['lon'] for c in cambios], dtype=np.float64)
+    lotes = []
+    for region, definicion in regiones.items():
+        if definicion.get('bbox'):
+            lon_min, lat_min, lon_max, lat_max = definicion['bbox']
+            adentro = np.flatnonzero((lon >= lon_min) & (lon <= lon_max) & (lat >= lat_min) & (lat <= lat_max))
+        else:
+            adentro = np.arange(len(cambios))
+        for inicio in range(0, len(adentro), tamanio_lote):
+            lotes.append((region, [cambios[i] for i in adentro[inicio:inicio + tamanio_lote]]))
+    return lotes
+
+
+async def _trabajador(cola, enviados):
+    while True:
+        destino, lote = await cola.get()
+        try:
+            if await destino.enviar(lote):
+                enviados.append((destino.nombre, lote))
+        finally:
+            cola.task_done()
+
+
+async def despachar(cambios, config, estado=None, ahora=None):
+    """
+    Filtra, agrupa y envía `cambios`. Devuelve (enviados, estado actualizado):
+    el enfriamiento es por destino y sólo se registra lo que ese destino recibió.
+    """
+    estado = dict(estado or {})
+    ahora = ahora or datetime.now(timezone.utc)
+    if not config.get('incluir_desescalamientos', False):
+        cambios = [c for c in cambios if c['tipo'] == 'escalamiento']
+    horas = config.get('enfriamiento_horas', ENFRIAMIENTO_HORAS)
+    tamanio_lote = config.get('tamanio_lote', TAMANIO_LOTE)
+
+    destinos = crear_destinos(config)  # valida la config antes de encolar nada
+    cola = asyncio.Queue(maxsize=config.get('tamanio_cola', TAMANIO_COLA))
+    enviados = []
+    trabajadores = [asyncio.create_task(_trabajador(cola, enviados))
+                    for _ in range(config.get('trabajadores', TRABAJADORES))]
+    encolados = set()  # un destino compartido por regiones superpuestas recibe cada alerta una vez
+    for region, definicion in config.get('regiones', {}).items():
+        for nombre in definicion.get('destinos', []):
+            vigentes = [c for c in filtrar_enfriamiento(cambios, estado, ahora, nombre, horas)
+                        if clave_estado(nombre, c) not in encolados]
+            for _, alertas in armar_lotes(vigentes, {region: definicion}, tamanio_lote):
+                encolados.update(clave_estado(nombre, a) for a in alertas)
+                lote = {'region': region, 'generado': ahora.isoformat(timespec='seconds'), 'alertas': alertas}
+                await cola.put((destinos[nombre], lote))  # espera si la cola está llena
+    await cola.join()
+    for trabajador in trabajadores:
+        trabajador.cancel()
+    await asyncio.gather(*trabajadores, return_exceptions=True)
+
+    for nombre, lote in enviados:
+        for alerta in lote['alertas']:
+            estado[clave_estado(nombre, alerta)] = ahora.isoformat()
+    return enviados, estado
+
+
+def cargar_estado(ruta=ARCHIVO_ESTADO):
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def guardar_estado(estado, ruta=ARCHIVO_ESTADO):
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2)
+
+
+def notificar(ruta_config=ARCHIVO_CONFIG, ruta_cambios=ARCHIVO_CAMBIOS, ruta_estado=ARCHIVO_ESTADO):
+    """Punto de entrada sincrónico: lee feed, config y estado, despacha y guarda el estado."""
+    with open(ruta_config, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    cambios = leer_cambios(ruta_cambios)
+    enviados, estado = asyncio.run(despachar(cambios, config, cargar_estado(ruta_estado)))
+    guardar_estado(estado, ruta_estado)
+    print(f"📣 {len(enviados)} lotes enviados a partir de {len(cambios)} cambios de nivel.")
+    return enviados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GeoAlertAR - despacho de notificaciones de cambios de nivel")
+    parser.add_argument('--config', default=ARCHIVO_CONFIG, help="JSON de regiones y destinos")
+    parser.add_argument('--cambios', default=ARCHIVO_CAMBIOS, help="feed JSONL de alertas.py")
+    parser.add_argument('--estado', default=ARCHIVO_ESTADO, help="registro de lo ya notificado (enfriamiento)")
+    args = parser.parse_args()
+    notificar(args.config, args.cambios, args.estado)
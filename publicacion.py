@@ -0,0 +1,252 @@
+"""
+GeoAlertAR - Publicación de resultados para el mapa web.
+
+Formato binario compacto `riesgo_cordoba.bin` (little-endian), pensado para
+leerse con TypedArrays en `docs/index.html` sin parsear texto:
+
+    cabecera   b'GAR1' | uint32 n | uint32 bytes_nombres | uint32 reservado
+    int32[n]   lat × 1e6
+    int32[n]   lon × 1e6
+    int16[n]   por cada factor de FACTORES_BINARIO (valor × escala, -32768 = sin dato)
+    uint8[n]   riesgo redondeado 0-100 (255 = sin datos suficientes)
+    uint8[⌈n/4⌉] nivel, 2 bits por punto (ver CODIGOS_NIVEL; ignorado si riesgo = 255)
+    utf-8      nombres separados por '\\n'
+
+`publicar` además genera variantes pre-comprimidas (.gz y, si está instalado
+el paquete `brotli`, .br) de cada archivo servido y un `manifiesto.json` con
+el resumen del dataset, para que el mapa muestre conteos antes de descargarlo.
+
+Cada archivo se publica también con su hash en el nombre
+(`riesgo_cordoba.<hash>.csv`) y `latest.json` apunta a la versión vigente:
+los archivos con hash son inmutables (cache infinito) y el cliente sólo
+revalida ese puntero de pocos cientos de bytes.
+"""
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import struct
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from riesgo_vectorizado import NIVEL_SIN_DATOS
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli sólo se generan los .gz
+    brotli = None
+
+MAGIA_BINARIO = b'GAR1'
+ESCALA_COORDENADAS = 1e6
+SIN_DATO_INT16 = -32768
+SIN_DATO_UINT8 = 255
+
+# columna -> escala (se guarda como int16 redondeado)
+FACTORES_BINARIO = {
+    'ndvi': 1000,
+    'nbr': 1000,
+    'lst_celsius': 10,
+    'precip_60d_mm': 10,
+    'humedad_min': 10,
+    'viento_max_kmh': 10,
+}
+
+CODIGOS_NIVEL = {'BAJO': 0, 'MODERADO': 1, 'ALTO': 2, 'CRÍTICO': 3}
+# NIVEL_SIN_DATOS no entra en 2 bits: se codifica con riesgo = 255
+
+LARGO_HASH_NOMBRE = 12
+VERSIONES_CONSERVADAS = 3  # versiones viejas que quedan para clientes a mitad de carga
+
+
+def _a_int16(valores, escala):
+    valores = pd.to_numeric(valores, errors='coerce').to_numpy(dtype=np.float64) * escala
+    salida = np.full(valores.shape, SIN_DATO_INT16, dtype='<i2')
+    validos = ~np.isnan(valores)
+    salida[validos] = np.clip(np.rint(valores[validos]), SIN_DATO_INT16 + 1, 32767)
+    return salida
+
+
+def _empaquetar_niveles(niveles):
+    codigos = np.array([CODIGOS_NIVEL.get(n, 0) for n in niveles], dtype=np.uint8)
+    codigos = np.pad(codigos, (0, -len(codigos) % 4))
+    cuartetos = codigos.reshape(-1, 4)
+    return (cuartetos[:, 0] | (cuartetos[:, 1] << 2) | (cuartetos[:, 2] << 4) | (cuartetos[:, 3] << 6)).astype(np.uint8)
+
+
+def exportar_binario(df, ruta):
+    """Escribe el DataFrame de resultados en el formato binario descrito arriba."""
+    n = len(df)
+    nombres = '\n'.join(df['nombre'].fillna('').astype(str)).encode('utf-8')
+
+    riesgo = pd.to_numeric(df['riesgo_final'], errors='coerce').to_numpy(dtype=np.float64)
+    riesgo_u8 = np.full(n, SIN_DATO_UINT8, dtype=np.uint8)
+    validos = ~np.isnan(riesgo) & (df['nivel'] != NIVEL_SIN_DATOS).to_numpy()
+    riesgo_u8[validos] = np.clip(np.rint(riesgo[validos]), 0, 100).astype(np.uint8)
+
+    partes = [
+        MAGIA_BINARIO + struct.pack('<III', n, len(nombres), 0),
+        np.rint(df['lat'].to_numpy(dtype=np.float64) * ESCALA_COORDENADAS).astype('<i4').tobytes(),
+        np.rint(df['lon'].to_numpy(dtype=np.float64) * ESCALA_COORDENADAS).astype('<i4').tobytes(),
+    ]
+    for columna, escala in FACTORES_BINARIO.items():
+        valores = df[columna] if columna in df else pd.Series(np.nan, index=df.index)
+        partes.append(_a_int16(valores, escala).tobytes())
+    partes += [riesgo_u8.tobytes(), _empaquetar_niveles(df['nivel']).tobytes(), nombres]
+
+    with open(ruta, 'wb') as f:
+        for parte in partes:
+            f.write(parte)
+
+
+def leer_binario(ruta):
+    """Inversa de `exportar_binario` (para verificar el formato desde Python)."""
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    if datos[:4] != MAGIA_BINARIO:
+        raise ValueError(f"'{ruta}' no es un archivo GeoAlertAR binario")
+    n, bytes_nombres, _ = struct.unpack_from('<III', datos, 4)
+    pos = 16
+
+    def tomar(dtype, cantidad):
+        nonlocal pos
+        arr = np.frombuffer(datos, dtype=dtype, count=cantidad, offset=pos)
+        pos += arr.nbytes
+        return arr
+
+    columnas = {
+        'lat': tomar('<i4', n) / ESCALA_COORDENADAS,
+        'lon': tomar('<i4', n) / ESCALA_COORDENADAS,
+    }
+    for columna, escala in FACTORES_BINARIO.items():
+        crudo = tomar('<i2', n)
+        columnas[columna] = np.where(crudo == SIN_DATO_INT16, np.nan, crudo / escala)
+    riesgo = tomar('u1', n)
+    columnas['riesgo_final'] = np.where(riesgo == SIN_DATO_UINT8, np.nan, riesgo)
+    empaquetado = tomar('u1', (n + 3) // 4)
+    codigos = ((empaquetado[:, None] >> np.array([0, 2, 4, 6], dtype=np.uint8)) & 3).ravel()[:n]
+    por_codigo = {c: nivel for nivel, c in CODIGOS_NIVEL.items()}
+    columnas['nivel'] = [NIVEL_SIN_DATOS if r == SIN_DATO_UINT8 else por_codigo[c] for c, r in zip(codigos, riesgo)]
+    nombres = datos[pos:pos + bytes_nombres].decode('utf-8')
+    columnas['nombre'] = nombres.split('\n') if n else []
+    return pd.DataFrame(columnas)
+
+
+def hash_contenido(ruta):
+    """sha256 hexadecimal del archivo."""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def comprimir_variantes(ruta):
+    """
+    Escribe `ruta`.gz (y `ruta`.br si hay brotli) junto al original.
+    Devuelve dict formato -> bytes de cada variante.
+    """
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    tamanios = {}
+    # mtime=0 para que el .gz sea idéntico entre corridas con el mismo contenido
+    with open(ruta + '.gz', 'wb') as f:
+        f.write(gzip.compress(datos, compresslevel=9, mtime=0))
+    tamanios['gz'] = os.path.getsize(ruta + '.gz')
+    if brotli is not None:
+        with open(ruta + '.br', 'wb') as f:
+            f.write(brotli.compress(datos, quality=11))
+        tamanios['br'] = os.path.getsize(ruta + '.br')
+    return tamanios
+
+
+def resumen_dataset(df):
+    """Filas, bbox [lon_min, lat_min, lon_max, lat_max] y conteo por nivel."""
+    if len(df) == 0:
+        return {'filas': 0, 'bbox': None, 'niveles': {}}
+    return {
+        'filas': int(len(df)),
+        'bbox': [float(df['lon'].min()), float(df['lat'].min()), float(df['lon'].max()), float(df['lat'].max())],
+        'niveles': {str(k): int(v) for k, v in df['nivel'].value_counts().items()},
+    }
+
+
+def nombre_con_hash(ruta, sha256):
+    """'docs/riesgo_cordoba.csv' -> 'docs/riesgo_cordoba.<hash>.csv'."""
+    base, ext = os.path.splitext(ruta)
+    return f"{base}.{sha256[:LARGO_HASH_NOMBRE]}{ext}"
+
+
+def _podar_versiones(ruta, vigente):
+    """Borra copias con hash de `ruta` más viejas que las VERSIONES_CONSERVADAS recientes."""
+    base, ext = os.path.splitext(ruta)
+    patron = re.compile(re.escape(os.path.basename(base)) + r'\.[0-9a-f]{%d}' % LARGO_HASH_NOMBRE + re.escape(ext) + '$')
+    versiones = [v for v in glob.glob(f"{glob.escape(base)}.*{ext}")
+                 if patron.match(os.path.basename(v)) and v != vigente]
+    versiones.sort(key=os.path.getmtime, reverse=True)
+    for vieja in versiones[VERSIONES_CONSERVADAS - 1:]:
+        for variante in (vieja, vieja + '.gz', vieja + '.br'):
+            if os.path.exists(variante):
+                os.remove(variante)
+
+
+def _publicar_con_hash(ruta, sha256):
+    """Copia `ruta` y sus variantes comprimidas al nombre con hash. Devuelve ese nombre."""
+    destino = nombre_con_hash(ruta, sha256)
+    for sufijo in ('', '.gz', '.br'):
+        if os.path.exists(ruta + sufijo):
+            shutil.copyfile(ruta + sufijo, destino + sufijo)
+    _podar_versiones(ruta, destino)
+    return destino
+
+
+def publicar(df, carpeta, archivos, contexto=None):
+    """
+    Comprime los `archivos` publicados (más las capas de `carpeta`/layers),
+    escribe `carpeta`/manifiesto.json, las copias con hash y `carpeta`/latest.json.
+    `contexto` (dict) queda registrado en el manifiesto. Devuelve el manifiesto.
+    """
+    archivos = [a for a in archivos if os.path.exists(a)]
+    archivos += sorted(a for a in glob.glob(os.path.join(carpeta, 'layers', '*.geojson'))
+                       if not re.search(r'\.[0-9a-f]{%d}\.geojson$' % LARGO_HASH_NOMBRE, a))
+
+    manifiesto = {
+        'generado': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        **resumen_dataset(df),
+        'contexto': contexto,
+        'archivos': {},
+    }
+    latest = {'archivos': {}}
+    for ruta in archivos:
+        nombre = os.path.relpath(ruta, carpeta).replace(os.sep, '/')
+        sha256 = hash_contenido(ruta)
+        manifiesto['archivos'][nombre] = {
+            'bytes': os.path.getsize(ruta),
+            'sha256': sha256,
+            'comprimido': comprimir_variantes(ruta),
+        }
+        versionado = _publicar_con_hash(ruta, sha256)
+        latest['archivos'][nombre] = {
+            'url': os.path.relpath(versionado, carpeta).replace(os.sep, '/'),
+            'etag': sha256[:LARGO_HASH_NOMBRE],
+        }
+
+    ruta_manifiesto = os.path.join(carpeta, 'manifiesto.json')
+    with open(ruta_manifiesto, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    manifiesto_versionado = _publicar_con_hash(ruta_manifiesto, hash_contenido(ruta_manifiesto))
+
+    # Puntero mínimo: lo único que el cliente revalida en cada visita
+    latest.update({
+        'generado': manifiesto['generado'],
+        'filas': manifiesto['filas'],
+        'niveles': manifiesto['niveles'],
+        'manifiesto': os.path.relpath(manifiesto_versionado, carpeta).replace(os.sep, '/'),
+    })
+    with open(os.path.join(carpeta, 'latest.json'), 'w', encoding='utf-8') as f:
+        json.dump(latest, f, separators=(',', ':'), ensure_ascii=False)
+    return manifiesto
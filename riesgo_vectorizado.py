@@ -0,0 +1,166 @@
+"""
+GeoAlertAR - Cálculo vectorizado del índice de riesgo.
+
+Misma fórmula que `AnalizadorHackathon.calcular_riesgo_local`, pero operando
+sobre arrays de NumPy: cada factor puede ser un escalar, un vector (puntos) o
+una matriz (puntos × horas) y el resultado respeta el broadcasting.
+
+Los datos faltantes se representan con NaN (nunca con 0): el factor se omite y
+los pesos de los factores presentes se renormalizan. La `cobertura` es la suma
+de pesos disponibles (1.0 = todos los factores).
+
+Pesos y rangos forman un "perfil" ({'pesos': ..., 'rangos': ...}). PERFIL_BASE
+es la fórmula publicada; `perfiles_riesgo.json` define variantes para calibrar,
+que se aplican con `re_puntuar_csv` sin volver a consultar GEE ni Open-Meteo.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# factor -> (mínimo, amplitud, invertido)
+# invertido=True: valores altos del factor reducen el riesgo (NDVI, NBR, precip, humedad).
+RANGOS = {
+    'ndvi':           (0.1, 0.5, True),
+    'nbr':            (0.0, 0.5, True),
+    'lst_celsius':    (15, 30, False),
+    'precip_60d_mm':  (10, 140, True),
+    'humedad_min':    (15, 65, True),
+    'viento_max_kmh': (10, 50, False),
+}
+
+PESOS = {
+    'nbr': 0.25,
+    'precip_60d_mm': 0.10,
+    'humedad_min': 0.30,
+    'viento_max_kmh': 0.25,
+    'lst_celsius': 0.05,
+    'ndvi': 0.05,
+}
+
+PERFIL_BASE = {'pesos': PESOS, 'rangos': RANGOS}
+ARCHIVO_PERFILES = 'perfiles_riesgo.json'
+
+# (umbral exclusivo, nivel), de mayor a menor
+UMBRALES = ((75, 'CRÍTICO'), (50, 'ALTO'), (25, 'MODERADO'))
+NIVEL_BAJO = 'BAJO'
+COBERTURA_MINIMA = 0.6
+NIVEL_SIN_DATOS = "DATOS INSUFICENTES"  # mismo texto que CONFIG.RISK_LEVELS en docs/index.html
+FACTORES = tuple(PESOS)
+TOLERANCIA_SUMA_PESOS = 1e-6
+# columnas que dependen del riesgo de la corrida original (suavizado, modelos,
+# histéresis): re_puntuar_csv las descarta en lugar de dejarlas desactualizadas
+COLUMNAS_DERIVADAS = ('riesgo_suavizado', 'nivel_suavizado', 'maximo_local', 'nivel_alerta')
+
+
+def cargar_perfiles(ruta=ARCHIVO_PERFILES):
+    """
+    {'base': PERFIL_BASE, **perfiles del JSON}. Cada perfil del archivo puede
+    definir sólo 'pesos' o sólo algunos 'rangos': lo que falta sale de la base.
+    """
+    perfiles = {'base': PERFIL_BASE}
+    if not os.path.exists(ruta):
+        return perfiles
+    with open(ruta, 'r', encoding='utf-8') as f:
+        definidos = json.load(f)
+    for nombre, perfil in definidos.items():
+        pesos = {**PESOS, **perfil.get('pesos', {})}
+        rangos = {**RANGOS, **{k: tuple(v) for k, v in perfil.get('rangos', {}).items()}}
+        desconocidos = (set(pesos) | set(rangos)) - set(FACTORES)
+        if desconocidos:
+            raise ValueError(f"Perfil '{nombre}': factores desconocidos {sorted(desconocidos)}")
+        # la cobertura es la suma de pesos presentes: sólo compara con COBERTURA_MINIMA si suman 1
+        suma = sum(pesos.values())
+        if abs(suma - 1.0) > TOLERANCIA_SUMA_PESOS:
+            raise ValueError(f"Perfil '{nombre}': los pesos suman {suma:.4f}, deben sumar 1")
+        perfiles[nombre] = {'pesos': pesos, 'rangos': rangos}
+    return perfiles
+
+
+def cargar_perfil(nombre, ruta=ARCHIVO_PERFILES):
+    perfiles = cargar_perfiles(ruta)
+    if nombre not in perfiles:
+        raise KeyError(f"Perfil '{nombre}' no definido en '{ruta}' (disponibles: {', '.join(perfiles)})")
+    return perfiles[nombre]
+
+
+def normalizar_factor(valores, minimo, amplitud, invertido=False):
+    """Lleva un factor físico a riesgo 0-1 (recortado)."""
+    r = np.clip((np.asarray(valores, dtype=np.float64) - minimo) / amplitud, 0, 1)
+    return 1 - r if invertido else r
+
+
+def a_float(valores):
+    """Convierte escalares/listas con None a float64 con NaN."""
+    if valores is None:
+        return np.float64(np.nan)
+    arr = np.asarray(valores)
+    if arr.dtype == object:
+        arr = np.where(np.equal(arr, None), np.nan, arr)
+    return arr.astype(np.float64)
+
+
+def calcular_riesgo_y_cobertura(factores, perfil=None):
+    """
+    Recibe un dict factor -> escalar/array (NaN/None = sin dato) y devuelve
+    (riesgo 0-100, cobertura 0-1) con la forma del broadcasting de los factores.
+    Donde no hay ningún factor el riesgo es NaN.
+    """
+    perfil = perfil or PERFIL_BASE
+    suma = 0.0
+    cobertura = 0.0
+    for factor, peso in perfil['pesos'].items():
+        minimo, amplitud, invertido = perfil['rangos'][factor]
+        valores = a_float(factores.get(factor))
+        presente = ~np.isnan(valores)
+        r = normalizar_factor(valores, minimo, amplitud, invertido)
+        suma = suma + np.where(presente, peso * r, 0.0)
+        cobertura = cobertura + np.where(presente, peso, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        riesgo = np.where(cobertura > 0, suma / cobertura, np.nan) * 100
+    return riesgo, cobertura
+
+
+def calcular_riesgo_vectorizado(factores, perfil=None):
+    """Riesgo 0-100 con pesos renormalizados sobre los factores disponibles."""
+    return calcular_riesgo_y_cobertura(factores, perfil)[0]
+
+
+def clasificar_niveles(riesgo, cobertura=1.0, umbrales=UMBRALES):
+    """Versión vectorizada de `AnalizadorHackathon.clasificar_nivel`."""
+    riesgo = np.asarray(riesgo, dtype=np.float64)
+    sin_datos = np.isnan(riesgo) | (np.asarray(cobertura) < COBERTURA_MINIMA)
+    condiciones = [sin_datos] + [riesgo > umbral for umbral, _ in umbrales]
+    return np.select(condiciones, [NIVEL_SIN_DATOS] + [nivel for _, nivel in umbrales], default=NIVEL_BAJO)
+
+
+def re_puntuar_csv(ruta_entrada, perfil, ruta_salida):
+    """
+    Recalcula riesgo_final / nivel / cobertura de un CSV de resultados (que ya
+    trae los factores crudos) con otro perfil, en una sola pasada vectorizada.
+    Las columnas derivadas del riesgo anterior (COLUMNAS_DERIVADAS y las
+    riesgo_<modelo>) se descartan. Se clasifica el riesgo redondeado, como en
+    la corrida normal.
+    """
+    df = pd.read_csv(ruta_entrada)
+    derivadas = [c for c in df.columns
+                 if c in COLUMNAS_DERIVADAS or (c.startswith('riesgo_') and c != 'riesgo_final')]
+    df = df.drop(columns=derivadas)
+    factores = {f: df[f].to_numpy(dtype=np.float64) for f in FACTORES if f in df}
+    riesgo, cobertura = calcular_riesgo_y_cobertura(factores, perfil)
+    df['riesgo_final'] = np.round(riesgo, 1)
+    df['cobertura'] = np.round(cobertura, 2)
+    df['nivel'] = clasificar_niveles(df['riesgo_final'].to_numpy(), df['cobertura'].to_numpy())
+    df.to_csv(ruta_salida, index=False)
+    return df
+
+
+def ventana_pico(riesgo, horas):
+    """
+    Para una matriz (puntos × horas) devuelve, por punto, el riesgo máximo y la
+    hora en que ocurre.
+    """
+    idx = np.nanargmax(riesgo, axis=1)
+    pico = riesgo[np.arange(riesgo.shape[0]), idx]
+    return pico, np.asarray(horas)[idx]
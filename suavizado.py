@@ -0,0 +1,95 @@
+"""
+GeoAlertAR - Suavizado espacial del riesgo por vecindario.
+
+Cada punto se puntúa aislado, así que dos localidades vecinas pueden saltar
+entre ALTO y CRÍTICO por ruido de un píxel o de la API de clima. Esta etapa,
+posterior al cálculo y sin consultas extra, promedia el riesgo de los vecinos
+a menos de `radio_km` con pesos gaussianos (σ = radio / 2) y marca los máximos
+locales (puntos cuyo riesgo no es superado por ningún vecino).
+
+Los vecinos se buscan con un KD-tree de scipy si está instalado; si no, con una
+grilla de celdas del tamaño del radio (sólo se comparan las 9 celdas vecinas).
+Ambos devuelven los mismos pares (i, j, distancia) y el resto es NumPy.
+"""
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # opcional: sin scipy se usa la grilla
+    cKDTree = None
+
+KM_POR_GRADO_LAT = 110.574
+KM_POR_GRADO_LON_ECUADOR = 111.320
+
+
+def proyectar_km(lat, lon):
+    """Equirectangular centrada en la latitud media: suficiente para radios de decenas de km."""
+    lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+    coseno = np.cos(np.radians(np.nanmean(lat))) if len(lat) else 1.0
+    return lon * KM_POR_GRADO_LON_ECUADOR * coseno, lat * KM_POR_GRADO_LAT
+
+
+def _pares_grilla(x, y, radio_km):
+    lado = radio_km
+    fila = np.floor(y / lado).astype(np.int64)
+    columna = np.floor(x / lado).astype(np.int64)
+    celdas = (fila << 32) + columna
+    orden = np.argsort(celdas, kind='stable')
+    ordenadas = celdas[orden]
+    origen, destino = [], []
+    for dfila in (-1, 0, 1):
+        for dcol in (-1, 0, 1):
+            vecina = ((fila + dfila) << 32) + (columna + dcol)
+            desde = np.searchsorted(ordenadas, vecina, 'left')
+            cantidad = np.searchsorted(ordenadas, vecina, 'right') - desde
+            origen.append(np.repeat(np.arange(len(x)), cantidad))
+            destino.append(orden[np.repeat(desde - np.cumsum(cantidad) + cantidad, cantidad) + np.arange(cantidad.sum())])
+    return np.concatenate(origen), np.concatenate(destino)
+
+
+def pares_vecinos(lat, lon, radio_km):
+    """
+    Pares (i, j, distancia_km) con distancia <= radio_km, en ambos sentidos
+    e incluyendo (i, i). Los puntos con coordenadas NaN no tienen vecinos.
+    """
+    x, y = proyectar_km(lat, lon)
+    validos = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+    xv, yv = x[validos], y[validos]
+    if cKDTree is not None:
+        pares = cKDTree(np.column_stack([xv, yv])).query_pairs(radio_km, output_type='ndarray')
+        propios = np.arange(len(xv))
+        i = np.concatenate([pares[:, 0], pares[:, 1], propios])
+        j = np.concatenate([pares[:, 1], pares[:, 0], propios])
+    else:
+        i, j = _pares_grilla(xv, yv, radio_km)
+    distancia = np.hypot(xv[i] - xv[j], yv[i] - yv[j])
+    cerca = distancia <= radio_km
+    return validos[i[cerca]], validos[j[cerca]], distancia[cerca]
+
+
+def suavizar(riesgo, pares, radio_km):
+    """Media gaussiana del riesgo de los vecinos (ignora NaN); NaN si ningún vecino tiene dato."""
+    riesgo = np.asarray(riesgo, dtype=np.float64)
+    n = len(riesgo)
+    i, j, distancia = pares
+    sigma = radio_km / 2.0
+    peso = np.exp(-0.5 * (distancia / sigma) ** 2) * ~np.isnan(riesgo[j])
+    suma = np.bincount(i, weights=peso * np.nan_to_num(riesgo[j]), minlength=n)
+    total = np.bincount(i, weights=peso, minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, suma / total, np.nan)
+
+
+def maximos_locales(riesgo, pares):
+    """True donde el riesgo es >= al de todos sus vecinos (y no es NaN)."""
+    riesgo = np.asarray(riesgo, dtype=np.float64)
+    i, j, _ = pares
+    maximo_vecinos = np.full(len(riesgo), -np.inf)
+    np.maximum.at(maximo_vecinos, i, np.nan_to_num(riesgo[j], nan=-np.inf))
+    return ~np.isnan(riesgo) & (riesgo >= maximo_vecinos)
+
+
+def suavizar_riesgo(riesgo, lat, lon, radio_km):
+    """(riesgo suavizado, máximo local) para un vector de puntos."""
+    pares = pares_vecinos(lat, lon, radio_km)
+    return suavizar(riesgo, pares, radio_km), maximos_locales(riesgo, pares)
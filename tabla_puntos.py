@@ -0,0 +1,88 @@
+"""
+GeoAlertAR - Tabla columnar de puntos.
+
+En lugar de un dict por punto (properties + geometry de GeoJSON, y otro dict
+por fila de resultado), los puntos viajan por `ejecutar` como un structured
+array de NumPy: nombre (str internado), lat, lon y una columna float64 por
+factor. Son ~8 bytes por valor en lugar de un objeto Python por valor, se
+cachea y concatena por lote, y todas las etapas operan sobre columnas enteras.
+El DataFrame se arma recién al final, para escribir y publicar.
+
+    tabla = TablaPuntos.desde_features(resultado['features'], ('ndvi', 'nbr'))
+    tabla['ndvi']              # array (vista de la columna)
+    tabla.a_dataframe(riesgo_final=riesgo)
+"""
+import hashlib
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cargador_puntos import coordenadas_representativas
+from riesgo_vectorizado import a_float
+
+COLUMNAS_BASE = (('nombre', object), ('lat', np.float64), ('lon', np.float64))
+
+
+class TablaPuntos:
+    __slots__ = ('datos',)
+
+    def __init__(self, datos):
+        self.datos = datos
+
+    @classmethod
+    def vacia(cls, n, columnas=()):
+        """`n` puntos sin nombre, con coordenadas y `columnas` en NaN."""
+        datos = np.empty(n, dtype=list(COLUMNAS_BASE) + [(c, np.float64) for c in columnas])
+        datos['nombre'] = None
+        for columna in datos.dtype.names[1:]:
+            datos[columna] = np.nan
+        return cls(datos)
+
+    @classmethod
+    def desde_features(cls, features, columnas=()):
+        """Tabla a partir de features GeoJSON (p. ej. el resultado de GEE); None -> NaN."""
+        tabla = cls.vacia(len(features), columnas)
+        if not features:
+            return tabla
+        nombres = (f['properties'].get('nombre') for f in features)
+        tabla.datos['nombre'] = [None if n is None else sys.intern(str(n)) for n in nombres]
+        coordenadas = np.array([coordenadas_representativas(f['geometry']) for f in features], dtype=np.float64)
+        tabla.datos['lon'], tabla.datos['lat'] = coordenadas[:, 0], coordenadas[:, 1]
+        for columna in columnas:
+            tabla.datos[columna] = a_float([f['properties'].get(columna) for f in features])
+        return tabla
+
+    @classmethod
+    def concatenar(cls, tablas, columnas=()):
+        """Une tablas con las mismas columnas (vacía con `columnas` si no hay ninguna)."""
+        tablas = list(tablas)
+        if not tablas:
+            return cls.vacia(0, columnas)
+        return cls(np.concatenate([t.datos for t in tablas]))
+
+    @property
+    def columnas(self):
+        return self.datos.dtype.names
+
+    def __len__(self):
+        return len(self.datos)
+
+    def __getitem__(self, columna):
+        return self.datos[columna]
+
+    def __contains__(self, columna):
+        return columna in self.datos.dtype.names
+
+    def huella(self, columnas=None):
+        """sha256 del contenido de `columnas` numéricas (todas por defecto), para claves de cache."""
+        h = hashlib.sha256()
+        for columna in columnas or self.columnas[1:]:
+            h.update(columna.encode('utf-8'))
+            h.update(np.ascontiguousarray(self.datos[columna]).tobytes())
+        return h.hexdigest()
+
+    def a_dataframe(self, columnas=None, **extras):
+        """DataFrame con `columnas` (todas por defecto) seguidas de `extras` (nombre -> array)."""
+        df = pd.DataFrame({c: self.datos[c] for c in (columnas or self.columnas)})
+        return df.assign(**extras) if extras else df
@@ -17,7 +17,7 @@ import ee
 import geojson
 import json
 import sys
-from datetime import datetime, date, timedelta
+from datetime import date, timedelta
 
 # --------------------------
 # CONFIGURACIÓN (ajustable)
@@ -33,7 +33,9 @@ FECHA_FIN = None     # ejemplo: '2025-08-31'  (None -> calculado automáticament
 
 # Escalas (metros)
 SCALE_MODIS = 1000
-SCALE_CHIRPS = 5000
+SCALE_CHIRPS = 5000  # la precipitación se suma en esta grilla antes de apilarla con MODIS
+# >1 reparte cada reducción en más tiles (menos memoria) al probar polígonos grandes
+TILE_SCALE = 1
 
 # --------------------------
 # UTILIDADES de FECHAS
@@ -73,20 +75,25 @@ def init_gee(project_id="portafolio-aegis"):
 # --------------------------
 # Función helper segura para reducir regiones en GEE
 # --------------------------
-def reducir_region_o_cero(imagen, banda, geom, scale):
+def reducir_region_apilada(imagen, geom, scale):
     """
-    Reduce 'imagen' sobre 'geom' y devuelve un ee.Number.
-    Si el valor es null, devuelve 0 usando ee.Algorithms.If (robusto).
+    Reduce todas las bandas de 'imagen' sobre 'geom' en una sola llamada y
+    devuelve un ee.Dictionary banda -> valor (null si no hay píxeles válidos).
+    No se usa 0 como respaldo: NDVI/precip = 0 parecen riesgo máximo.
     """
-    valor = imagen.reduceRegion(
+    return imagen.reduceRegion(
         reducer=ee.Reducer.mean(),
         geometry=geom,
         scale=scale,
+        tileScale=TILE_SCALE,
         bestEffort=True,
         maxPixels=1e13
-    ).get(banda)
-    # Si 'valor' es null -> devuelvo 0; si no -> valor.
-    return ee.Number(ee.Algorithms.If(valor, valor, 0))
+    )
+
+def imagen_o_vacia(imagen, bandas):
+    """'imagen' si existe; si no, una imagen enmascarada con las mismas bandas."""
+    vacia = ee.Image.constant([0] * len(bandas)).rename(bandas).updateMask(0)
+    return ee.Image(ee.Algorithms.If(imagen, imagen, vacia))
 
 # --------------------------
 # Función que se ejecuta en GEE para cada punto (versión de prueba)
@@ -99,6 +106,7 @@ def analizar_punto_simple(punto, fecha_inicio_str, fecha_fin_str):
      - lst_celsius
      - precip_60d_mm
     Rango de fechas en formato 'YYYY-MM-DD' (strings).
+    Todas las bandas (MODIS y CHIRPS) se apilan y se reducen en una única llamada.
     """
     fecha_inicio = ee.Date(fecha_inicio_str)
     fecha_fin = ee.Date(fecha_fin_str)
@@ -109,34 +117,30 @@ def analizar_punto_simple(punto, fecha_inicio_str, fecha_fin_str):
     chirps = ee.ImageCollection('UCSB-CHG/CHIRPS/PENTAD').filterDate(fecha_inicio, fecha_fin)
 
     # NDVI & NBR (primera imagen del rango)
-    img_ref = modis_ref.sort('system:time_start', False).first()
-
-    def calc_indices(img):
-        ndvi_img = img.normalizedDifference(['sur_refl_b02', 'sur_refl_b01']).rename('ndvi')
-        nbr_img = img.normalizedDifference(['sur_refl_b02', 'sur_refl_b07']).rename('nbr')
-        ndvi_val = reducir_region_o_cero(ndvi_img, 'ndvi', punto.geometry(), SCALE_MODIS)
-        nbr_val = reducir_region_o_cero(nbr_img, 'nbr', punto.geometry(), SCALE_MODIS)
-        return ee.Dictionary({'ndvi': ndvi_val, 'nbr': nbr_val})
+    img_ref = imagen_o_vacia(modis_ref.sort('system:time_start', False).first(),
+                             ['sur_refl_b01', 'sur_refl_b02', 'sur_refl_b07'])
+    ndvi_img = img_ref.normalizedDifference(['sur_refl_b02', 'sur_refl_b01']).rename('ndvi')
+    nbr_img = img_ref.normalizedDifference(['sur_refl_b02', 'sur_refl_b07']).rename('nbr')
 
-    indices = ee.Dictionary(ee.Algorithms.If(img_ref, calc_indices(img_ref), ee.Dictionary({'ndvi': 0, 'nbr': 0})))
+    # LST (MOD11A1) - primera imagen del rango; 0 = relleno
+    img_lst = imagen_o_vacia(modis_lst.select('LST_Day_1km').sort('system:time_start', False).first(),
+                             ['LST_Day_1km'])
+    lst_img = img_lst.updateMask(img_lst.gt(0)).multiply(0.02).subtract(273.15).rename('lst')
 
-    # LST (MOD11A1) - primera imagen del rango
-    img_lst = modis_lst.select('LST_Day_1km').sort('system:time_start', False).first()
-    def calc_lst(im):
-        lst_k = reducir_region_o_cero(im, 'LST_Day_1km', punto.geometry(), SCALE_MODIS).multiply(0.02)
-        return lst_k.subtract(273.15)
-    lst_c = ee.Number(ee.Algorithms.If(img_lst, calc_lst(img_lst), 0))
+    # Precipitación acumulada (sum of pentads), fijada a la grilla de SCALE_CHIRPS:
+    # así puede ir en la misma pila y la reducción a SCALE_MODIS sólo la muestrea
+    precip_img = ee.Image(chirps.sum()).rename('precip').reproject(crs='EPSG:4326', scale=SCALE_CHIRPS)
 
-    # Precipitación acumulada (sum of pentads)
-    precip_img = ee.Image(chirps.sum()).rename('precip')
-    precip_mm = reducir_region_o_cero(precip_img, 'precip', punto.geometry(), SCALE_CHIRPS)
+    # todas las bandas en una sola reducción por punto
+    valores = reducir_region_apilada(ee.Image.cat([ndvi_img, nbr_img, lst_img, precip_img]),
+                                     punto.geometry(), SCALE_MODIS)
 
     # Anexar propiedades y devolver feature
     return punto.set({
-        'ndvi_test': indices.get('ndvi'),
-        'nbr_test': indices.get('nbr'),
-        'lst_test_c': lst_c,
-        'precip_test_mm': precip_mm
+        'ndvi_test': valores.get('ndvi'),
+        'nbr_test': valores.get('nbr'),
+        'lst_test_c': valores.get('lst'),
+        'precip_test_mm': valores.get('precip')
     })
 
 # --------------------------
@@ -193,10 +197,10 @@ def main():
     for f in res.get('features', []):
         props = f.get('properties', {})
         nombre = props.get('nombre', 'sin_nombre')
-        ndvi = props.get('ndvi_test', 0)
-        nbr = props.get('nbr_test', 0)
-        lst = props.get('lst_test_c', 0)
-        precip = props.get('precip_test_mm', 0)
+        ndvi = props.get('ndvi_test')
+        nbr = props.get('nbr_test')
+        lst = props.get('lst_test_c')
+        precip = props.get('precip_test_mm')
         print(f" - {nombre}: NDVI={ndvi}, NBR={nbr}, LST(°C)={lst}, PRECIP(60d mm)={precip}")
 
 if __name__ == '__main__':
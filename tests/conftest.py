@@ -0,0 +1,5 @@
+"""Los módulos del proyecto son planos en la raíz del repo: hacerlos importables desde tests/."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,75 @@
+"""Cambios de nivel con histéresis entre dos corridas."""
+import json
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from alertas import diferenciar, escribir_cambios, instantanea_anterior, nivel_con_histeresis, NIVELES
+
+BAJO, MODERADO, ALTO, CRITICO = range(4)
+
+
+def test_nivel_con_histeresis():
+    riesgo = np.array([77.0, 78.1, 73.0, 71.9, 20.0, 76.0, 79.0])
+    anterior = np.array([ALTO, ALTO, CRITICO, CRITICO, CRITICO, -1, MODERADO])
+    assert nivel_con_histeresis(riesgo, anterior, histeresis=3.0).tolist() == [
+        ALTO,       # 77: dentro de la banda, no sube
+        CRITICO,    # 78.1 > 75 + 3: escala
+        CRITICO,    # 73: dentro de la banda, no baja
+        ALTO,       # 71.9 < 75 - 3: desescala
+        BAJO,       # puede bajar más de un nivel
+        CRITICO,    # sin nivel previo: umbrales sin histéresis
+        CRITICO,    # puede subir más de un nivel
+    ]
+
+
+def resultado(riesgos, cobertura=None):
+    n = len(riesgos)
+    return pd.DataFrame({'nombre': [f"p{i}" for i in range(n)], 'lat': -31.0 - np.arange(n) / 10,
+                         'lon': np.full(n, -64.0), 'riesgo_final': riesgos,
+                         'cobertura': cobertura if cobertura is not None else np.ones(n)})
+
+
+def test_diferenciar_escala_desescala_y_banda():
+    anterior, _ = diferenciar(resultado([60.0, 77.0, 74.0, 40.0, 30.0]))
+    assert anterior['nivel_alerta'].tolist() == ['ALTO', 'CRÍTICO', 'ALTO', 'MODERADO', 'MODERADO']
+
+    # p0 sube, p1 baja, p2 oscila dentro de la banda, p3 sin datos, p4 igual, p5 nuevo
+    nuevo = resultado([79.0, 71.0, 76.0, np.nan, 30.0, 55.0])
+    df, cambios = diferenciar(nuevo, anterior, date(2025, 9, 15))
+    assert df['nivel_alerta'].tolist() == ['CRÍTICO', 'ALTO', 'ALTO', 'MODERADO', 'MODERADO', 'ALTO']
+    assert [(c['nombre'], c['tipo'], c['nivel_anterior'], c['nivel']) for c in cambios] == [
+        ('p0', 'escalamiento', 'ALTO', 'CRÍTICO'),
+        ('p1', 'desescalamiento', 'CRÍTICO', 'ALTO'),
+        ('p5', 'escalamiento', None, 'ALTO'),
+    ]
+    assert cambios[0]['fecha'] == '2025-09-15'
+    assert cambios[0]['riesgo_anterior'] == 60.0 and cambios[0]['riesgo'] == 79.0
+
+
+def test_punto_nuevo_bajo_no_avisa():
+    anterior, _ = diferenciar(resultado([60.0]))
+    _, cambios = diferenciar(resultado([60.0, 10.0]), anterior, date(2025, 9, 15))
+    assert cambios == []
+    assert NIVELES[0] == 'BAJO'
+
+
+def test_acumulado_idempotente_por_fecha(tmp_path):
+    ruta, acumulado = str(tmp_path / 'cambios.jsonl'), str(tmp_path / 'historico' / 'cambios.jsonl')
+    dia1 = [{'fecha': '2025-09-14', 'id': 'a', 'tipo': 'escalamiento'}]
+    dia2 = [{'fecha': '2025-09-15', 'id': 'b', 'tipo': 'escalamiento'}]
+    escribir_cambios(dia1, ruta, acumulado, date(2025, 9, 14))
+    escribir_cambios(dia2, ruta, acumulado, date(2025, 9, 15))
+    escribir_cambios(dia2, ruta, acumulado, date(2025, 9, 15))  # reintento de la corrida
+    with open(acumulado, encoding='utf-8') as f:
+        assert [json.loads(linea)['id'] for linea in f] == ['a', 'b']
+    with open(ruta, encoding='utf-8') as f:
+        assert [json.loads(linea)['id'] for linea in f] == ['b']
+
+
+def test_instantanea_anterior(tmp_path):
+    for fecha in ('2025-09-13', '2025-09-14', '2025-09-15'):
+        (tmp_path / f"riesgo_{fecha}.csv").write_text('')
+    assert instantanea_anterior(str(tmp_path), date(2025, 9, 15)).endswith('riesgo_2025-09-14.csv')
+    assert instantanea_anterior(str(tmp_path), date(2025, 9, 13)) is None
@@ -0,0 +1,100 @@
+"""Etapas de AnalizadorHackathon sin GEE ni Open-Meteo: las consultas se reemplazan por datos fijos."""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import analizador_demo
+from analizador_demo import AnalizadorHackathon, FACTORES_SATELITALES
+from cache_etapas import CacheEtapas
+from contexto import ContextoEjecucion
+from tabla_puntos import TablaPuntos
+
+
+@pytest.fixture
+def analizador(monkeypatch, tmp_path):
+    monkeypatch.setattr(AnalizadorHackathon, '_inicializar_gee', lambda self: None)
+    monkeypatch.setattr(analizador_demo, 'CARPETA_SALIDA', str(tmp_path))
+    return AnalizadorHackathon(cache=CacheEtapas(activo=False))
+
+
+def tabla_puntos():
+    tabla = TablaPuntos.vacia(3, FACTORES_SATELITALES)
+    tabla.datos['nombre'] = ['La Cumbre', 'Mina Clavero', 'Córdoba']
+    tabla.datos['lat'] = [-30.98, -31.72, -31.40]
+    tabla.datos['lon'] = [-64.49, -65.00, -64.18]
+    for i, factor in enumerate(FACTORES_SATELITALES):
+        tabla.datos[factor] = np.array([0.213, 0.347, 0.461]) * (i + 1)
+    return tabla
+
+
+def test_pronostico_se_abre_sin_pickle(analizador, monkeypatch, tmp_path):
+    ruta = tmp_path / 'pronostico_riesgo.npz'
+    monkeypatch.setattr(analizador_demo, 'ARCHIVO_PRONOSTICO', str(ruta))
+    monkeypatch.setattr(analizador_demo, 'CARPETA_CUBO', str(tmp_path / 'cubo'))
+    monkeypatch.setattr(analizador, '_extraer_factores_satelitales', lambda: ('clave', tabla_puntos()))
+    horas = np.datetime64('2025-09-15', 'D') + np.arange(24).astype('timedelta64[h]')
+    clima = np.linspace(10, 60, 3 * 24, dtype=np.float32).reshape(3, 24)
+    monkeypatch.setattr(analizador, 'obtener_pronostico_horario', lambda lats, lons, dias: (horas, clima, clima, clima))
+
+    analizador.ejecutar_pronostico(dias=1)
+
+    with np.load(ruta) as pronostico:
+        assert pronostico['nombres'].dtype.kind == 'U'
+        assert pronostico['nombres'].tolist() == ['La Cumbre', 'Mina Clavero', 'Córdoba']
+        assert pronostico['riesgo'].shape == (3, 24)
+        assert (pronostico['horas'] == horas).all()
+
+
+def test_modelo_lineal_igual_a_riesgo_final(monkeypatch, tmp_path):
+    monkeypatch.setattr(AnalizadorHackathon, '_inicializar_gee', lambda self: None)
+    analizador = AnalizadorHackathon(cache=CacheEtapas(activo=False), modelos=('lineal',))
+    rng = np.random.default_rng(7)
+    n = 500
+    tabla = TablaPuntos.vacia(n, FACTORES_SATELITALES)
+    tabla.datos['nombre'] = [f"p{i}" for i in range(n)]
+    tabla.datos['lat'], tabla.datos['lon'] = rng.uniform(-35, -29, n), rng.uniform(-66, -62, n)
+    for factor, (bajo, alto) in {'ndvi': (0, 0.8), 'nbr': (-0.2, 0.6), 'lst_celsius': (10, 50),
+                                 'precip_60d_mm': (0, 200)}.items():
+        tabla.datos[factor] = rng.uniform(bajo, alto, n)
+    clima = {'humedad_min': rng.uniform(5, 80, n), 'viento_max_kmh': rng.uniform(0, 70, n)}
+
+    df = analizador._puntuar(tabla, clima)
+    df = analizador._puntuar_modelos(df, tabla, clima)
+    np.testing.assert_array_equal(df['riesgo_lineal'].to_numpy(), df['riesgo_final'].to_numpy())
+
+
+def test_calcular_riesgo_local_devuelve_escalar(analizador):
+    riesgo = analizador.calcular_riesgo_local({'ndvi': 0.2, 'humedad_min': None, 'viento_max_kmh': 40})
+    assert isinstance(riesgo, float) and riesgo == round(riesgo, 1)
+    assert np.isnan(analizador.calcular_riesgo_local({}))
+
+
+def test_url_clima_por_antiguedad():
+    hoy = date(2026, 1, 31)
+    assert analizador_demo.url_clima(date(2026, 1, 20), hoy) == analizador_demo.URL_CLIMA_PRONOSTICO
+    assert analizador_demo.url_clima(hoy - timedelta(days=92), hoy) == analizador_demo.URL_CLIMA_PRONOSTICO
+    assert analizador_demo.url_clima(hoy - timedelta(days=93), hoy) == analizador_demo.URL_CLIMA_ARCHIVO
+    assert analizador_demo.url_clima(date(2026, 2, 5), hoy) == analizador_demo.URL_CLIMA_PRONOSTICO
+
+
+def test_fecha_vieja_usa_archivo_de_open_meteo(monkeypatch):
+    monkeypatch.setattr(AnalizadorHackathon, '_inicializar_gee', lambda self: None)
+    analizador = AnalizadorHackathon(contexto=ContextoEjecucion.para_fecha('2020-09-15'),
+                                     cache=CacheEtapas(activo=False))
+    pedidos = []
+
+    class Respuesta:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {'daily': {'relative_humidity_2m_min': [18.0], 'wind_speed_10m_max': [42.5]}}
+
+    def get(url, params):
+        pedidos.append((url, params['start_date'], params['end_date']))
+        return Respuesta()
+
+    monkeypatch.setattr(analizador_demo.requests, 'get', get)
+    assert analizador.obtener_datos_climaticos(-31.4, -64.2) == {'humedad_min': 18.0, 'viento_max_kmh': 42.5}
+    assert pedidos == [(analizador_demo.URL_CLIMA_ARCHIVO, '2020-09-15', '2020-09-15')]
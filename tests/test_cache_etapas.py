@@ -0,0 +1,91 @@
+"""Cache de etapas en disco: aciertos, invalidación por clave y poda LRU."""
+import os
+
+import numpy as np
+
+from cache_etapas import CacheEtapas
+from contexto import ContextoEjecucion, clave_hash
+from riesgo_vectorizado import PERFIL_BASE
+
+
+class Contador:
+    def __init__(self, valor):
+        self.valor = valor
+        self.llamadas = 0
+
+    def __call__(self):
+        self.llamadas += 1
+        return self.valor
+
+
+def test_acierto_e_invalidacion_por_clave(tmp_path):
+    cache = CacheEtapas(str(tmp_path))
+    contexto = ContextoEjecucion.para_fecha('2025-09-15')
+    calcular = Contador(np.arange(3))
+
+    clave = clave_hash('puntuacion', contexto.clave('puntos'), PERFIL_BASE)
+    assert cache.obtener_o_calcular('puntuacion', clave, calcular).tolist() == [0, 1, 2]
+    assert cache.obtener_o_calcular('puntuacion', clave, calcular).tolist() == [0, 1, 2]
+    assert calcular.llamadas == 1
+
+    # cualquier entrada distinta (pesos, fecha, puntos) es otra clave y se recalcula
+    otro_perfil = {**PERFIL_BASE, 'pesos': {**PERFIL_BASE['pesos'], 'ndvi': 0.06}}
+    otras = [clave_hash('puntuacion', contexto.clave('puntos'), otro_perfil),
+             clave_hash('puntuacion', ContextoEjecucion.para_fecha('2025-09-16').clave('puntos'), PERFIL_BASE),
+             clave_hash('puntuacion', contexto.clave('otros puntos'), PERFIL_BASE)]
+    assert len({clave, *otras}) == 4
+    for otra in otras:
+        cache.obtener_o_calcular('puntuacion', otra, calcular)
+    assert calcular.llamadas == 4
+
+
+def test_clave_clima_ignora_parametros_de_gee():
+    a = ContextoEjecucion.para_fecha('2025-09-15', modo_extraccion='compuesto')
+    b = ContextoEjecucion.para_fecha('2025-09-15', modo_extraccion='ultima', dias_ventana_satelital=10)
+    assert a.clave_clima('puntos') == b.clave_clima('puntos')
+    assert a.clave('puntos') != b.clave('puntos')
+    assert a.clave_clima('puntos') != ContextoEjecucion.para_fecha('2025-09-16').clave_clima('puntos')
+
+
+def test_resultado_invalido_o_corrupto_no_queda(tmp_path):
+    cache = CacheEtapas(str(tmp_path))
+    calcular = Contador({'humedad_min': np.array([np.nan])})
+    es_valido = lambda clima: not np.isnan(clima['humedad_min']).any()
+    cache.obtener_o_calcular('clima', 'k', calcular, es_valido)
+    cache.obtener_o_calcular('clima', 'k', calcular, es_valido)
+    assert calcular.llamadas == 2
+
+    calcular = Contador('ok' * 1000)
+    cache.obtener_o_calcular('gee', 'k', calcular)
+    with open(cache._ruta('gee', 'k'), 'r+b') as f:
+        f.truncate(100)  # corrida interrumpida a mitad de escritura
+    assert cache.obtener_o_calcular('gee', 'k', calcular) == 'ok' * 1000
+    assert calcular.llamadas == 2
+
+
+def test_poda_lru(tmp_path):
+    valor = b'x' * 10_000
+    cache = CacheEtapas(str(tmp_path), limite_bytes=25_000)
+    calcular = Contador(valor)
+    for k, mtime in (('a', 1000), ('b', 2000)):
+        cache.obtener_o_calcular('gee', k, calcular)
+        os.utime(cache._ruta('gee', k), (mtime, mtime))
+
+    cache.obtener_o_calcular('gee', 'a', calcular)   # acierto: 'a' pasa a ser la más reciente
+    cache.obtener_o_calcular('gee', 'c', calcular)   # supera el límite: se poda la menos usada
+    assert calcular.llamadas == 3
+    assert sorted(os.listdir(tmp_path / 'gee')) == ['a.pkl', 'c.pkl']
+
+
+def test_inactivo_y_limpiar(tmp_path):
+    calcular = Contador(1)
+    inactivo = CacheEtapas(str(tmp_path), activo=False)
+    inactivo.obtener_o_calcular('gee', 'k', calcular)
+    inactivo.obtener_o_calcular('gee', 'k', calcular)
+    assert calcular.llamadas == 2 and not os.path.exists(tmp_path / 'gee')
+
+    cache = CacheEtapas(str(tmp_path))
+    cache.obtener_o_calcular('gee', 'k', calcular)
+    cache.obtener_o_calcular('clima', 'k', calcular)
+    cache.limpiar('gee')
+    assert not os.path.exists(cache._ruta('gee', 'k')) and os.path.exists(cache._ruta('clima', 'k'))
@@ -0,0 +1,73 @@
+"""Lectura en streaming de puntos con todos los tipos de geometría GeoJSON."""
+import json
+
+import numpy as np
+import pytest
+
+import cargador_puntos
+from cargador_puntos import coordenadas_representativas, lotes_puntos, leer_puntos
+
+LINEA = {'type': 'LineString', 'coordinates': [[-64.0, -31.0], [-64.2, -31.2], [-64.4, -31.0]]}
+MULTILINEA = {'type': 'MultiLineString', 'coordinates': [[[-64.0, -31.0], [-64.2, -31.0]],
+                                                         [[-64.4, -31.4], [-64.6, -31.4]]]}
+POLIGONO = {'type': 'Polygon', 'coordinates': [[[-65.0, -32.0], [-64.0, -32.0], [-64.0, -31.0],
+                                                [-65.0, -31.0], [-65.0, -32.0]]]}
+COLECCION = {'type': 'GeometryCollection', 'geometries': [{'type': 'Point', 'coordinates': [-63.0, -30.0]},
+                                                          {'type': 'LineString', 'coordinates': [[-65.0, -32.0],
+                                                                                                 [-64.0, -31.0]]}]}
+
+
+def feature(nombre, geometria):
+    return {'type': 'Feature', 'properties': {'nombre': nombre}, 'geometry': geometria}
+
+
+@pytest.mark.parametrize('geometria, esperado', [
+    ({'type': 'Point', 'coordinates': [-64.1, -31.4]}, (-64.1, -31.4)),
+    ({'type': 'MultiPoint', 'coordinates': [[-64.0, -31.0], [-65.0, -32.0]]}, (-64.5, -31.5)),
+    (LINEA, (-64.2, -31.0666667)),
+    (MULTILINEA, (-64.3, -31.2)),
+    (POLIGONO, (-64.5, -31.5)),
+    ({'type': 'MultiPolygon', 'coordinates': [POLIGONO['coordinates']]}, (-64.5, -31.5)),
+    (COLECCION, (-64.0, -31.0)),
+])
+def test_coordenadas_representativas(geometria, esperado):
+    assert coordenadas_representativas(geometria) == pytest.approx(esperado)
+
+
+@pytest.mark.parametrize('geometria', [
+    {'type': 'LineString', 'coordinates': []},
+    {'type': 'GeometryCollection', 'geometries': []},
+    {'type': 'Curva', 'coordinates': [[0, 0]]},
+])
+def test_geometria_sin_vertices(geometria):
+    with pytest.raises(ValueError):
+        coordenadas_representativas(geometria)
+
+
+@pytest.fixture(params=['coleccion', 'lineas', 'sin_ijson'])
+def archivo(request, tmp_path, monkeypatch):
+    features = [feature('linea', LINEA), feature('multilinea', MULTILINEA), feature('vacia', {'type': 'LineString', 'coordinates': []}),
+                feature('coleccion', COLECCION), feature('sin_geometria', None),
+                feature('punto', {'type': 'Point', 'coordinates': [-64.1, -31.4]})]
+    if request.param == 'lineas':
+        ruta = tmp_path / 'puntos.geojsonl'
+        ruta.write_text('\n'.join(json.dumps(f) for f in features), encoding='utf-8')
+    else:
+        if request.param == 'sin_ijson':
+            monkeypatch.setattr(cargador_puntos, 'ijson', None)
+        ruta = tmp_path / 'puntos.geojson'
+        ruta.write_text(json.dumps({'type': 'FeatureCollection', 'features': features}), encoding='utf-8')
+    return str(ruta)
+
+
+def test_lotes_con_lineas_y_colecciones(archivo, capsys):
+    lotes = list(lotes_puntos(archivo, tamanio_lote=2))
+    assert [lote.ids.tolist() for lote in lotes] == [['linea', 'multilinea'], ['coleccion', 'punto']]
+    # las geometrías no puntuales viajan completas a GEE
+    assert lotes[0].geometrias == {0: LINEA, 1: MULTILINEA}
+    assert lotes[1].geometrias == {0: COLECCION}
+    assert "Feature 2 omitido" in capsys.readouterr().out
+
+    puntos = leer_puntos(archivo)
+    np.testing.assert_allclose(puntos.lon, [-64.2, -64.3, -64.0, -64.1])
+    np.testing.assert_allclose(puntos.lat, [-31.0666667, -31.2, -31.0, -31.4])
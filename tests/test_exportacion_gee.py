@@ -0,0 +1,76 @@
+"""Espera de tareas de exportación con una tarea falsa y un `dormir` que sólo registra."""
+import json
+
+import ee
+import pytest
+
+from exportacion_gee import esperar_tarea, exportar_y_esperar
+
+
+class TareaFalsa:
+    def __init__(self, estados, error=None):
+        self.estados = list(estados)
+        self.error = error
+        self.iniciada = False
+
+    def start(self):
+        self.iniciada = True
+
+    def status(self):
+        estado = self.estados.pop(0) if len(self.estados) > 1 else self.estados[0]
+        status = {'id': 'T1', 'state': estado}
+        if self.error and estado == 'FAILED':
+            status['error_message'] = self.error
+        return status
+
+
+def test_tarea_completa():
+    esperas = []
+    estado = esperar_tarea(TareaFalsa(['READY', 'RUNNING', 'COMPLETED']), dormir=esperas.append)
+    assert estado['state'] == 'COMPLETED'
+    assert esperas == [5, 7.5]
+
+
+def test_tarea_fallida():
+    esperas = []
+    with pytest.raises(ee.EEException, match="Quota exceeded"):
+        esperar_tarea(TareaFalsa(['READY', 'FAILED'], error="Quota exceeded"), dormir=esperas.append)
+    assert esperas == [5]
+
+
+def test_tarea_cancelada_sin_mensaje():
+    with pytest.raises(ee.EEException, match="Tarea CANCELLED"):
+        esperar_tarea(TareaFalsa(['CANCELLED']), dormir=lambda s: None)
+
+
+def test_tiempo_maximo_y_tope_de_backoff():
+    esperas = []
+    with pytest.raises(ee.EEException, match="no terminó en 600 s"):
+        esperar_tarea(TareaFalsa(['RUNNING']), dormir=esperas.append, tiempo_maximo=600)
+    esperado = [5 * 1.5 ** i for i in range(8)] + [120, 120, 120]
+    assert esperas == pytest.approx(esperado)
+    assert max(esperas) == 120
+    assert sum(esperas[:-1]) < 600 <= sum(esperas)
+
+
+def test_exportar_y_esperar():
+    tarea = TareaFalsa(['READY', 'COMPLETED'])
+    pedidos = []
+    coleccion = {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'nombre': 'A', 'ndvi': 0.3},
+         'geometry': {'type': 'Point', 'coordinates': [-64.3, -31.4]}}]}
+
+    def crear_tarea(fc, descripcion, bucket, prefijo):
+        pedidos.append(('crear', descripcion, bucket, prefijo))
+        return tarea
+
+    def descargar(bucket, objeto):
+        pedidos.append(('descargar', bucket, objeto))
+        return json.dumps(coleccion)
+
+    resultado = exportar_y_esperar(object(), 'mi-bucket', 'corridas/hoy', crear_tarea=crear_tarea,
+                                   descargar=descargar, dormir=lambda s: None)
+    assert tarea.iniciada
+    assert resultado == coleccion
+    assert pedidos == [('crear', 'geoalertar_factores', 'mi-bucket', 'corridas/hoy'),
+                       ('descargar', 'mi-bucket', 'corridas/hoy.geojson')]
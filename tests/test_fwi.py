@@ -0,0 +1,69 @@
+"""FWI contra la secuencia de prueba publicada con el programa de Van Wagner y Pickett (1985)."""
+import numpy as np
+import pytest
+
+import fwi
+
+# (temperatura, humedad, viento, lluvia) -> (FFMC, DMC, DC, ISI, BUI, FWI), 13 al 18 de abril,
+# latitud 46° N, arrancando de los valores estándar (85, 6, 15)
+REFERENCIA = [
+    ((17.0, 42, 25, 0.0), (87.7, 8.5, 19.0, 10.9, 8.5, 10.1)),
+    ((20.0, 21, 25, 2.4), (86.2, 10.4, 23.6, 8.8, 10.4, 9.3)),
+    ((8.5, 40, 17, 0.0), (87.0, 11.8, 26.1, 6.5, 11.7, 7.6)),
+    ((6.5, 25, 6, 0.0), (88.8, 13.2, 28.2, 4.9, 13.1, 6.2)),
+    ((13.0, 34, 24, 0.0), (89.1, 15.4, 31.5, 12.6, 15.3, 14.8)),
+    ((6.0, 40, 22, 0.4), (88.7, 16.5, 33.5, 10.7, 16.4, 13.5)),
+]
+INDICES = ('ffmc', 'dmc', 'dc', 'isi', 'bui', 'fwi')
+
+
+def iniciales(n):
+    return {'ffmc': np.full(n, fwi.FFMC_INICIAL), 'dmc': np.full(n, fwi.DMC_INICIAL), 'dc': np.full(n, fwi.DC_INICIAL)}
+
+
+def test_secuencia_de_referencia():
+    codigos = iniciales(1)
+    for clima, esperado in REFERENCIA:
+        hoy = fwi.actualizar_dia(codigos, *(np.array([v], dtype=np.float64) for v in clima), mes=4, lat=np.array([46.0]))
+        # la tabla publicada está redondeada a un decimal
+        assert [float(hoy[i][0]) for i in INDICES] == pytest.approx(esperado, abs=0.051)
+        codigos = {c: hoy[c] for c in ('ffmc', 'dmc', 'dc')}
+
+
+def test_vectorizado_y_dato_faltante():
+    # tres puntos en una pasada: el de referencia, uno sin viento y uno en el hemisferio sur
+    codigos = iniciales(3)
+    hoy = fwi.actualizar_dia(codigos, np.array([17.0, 17.0, 17.0]), np.array([42.0, 42.0, 42.0]),
+                             np.array([25.0, np.nan, 25.0]), np.zeros(3), mes=4, lat=np.array([46.0, 46.0, -31.4]))
+    assert hoy['ffmc'][0] == pytest.approx(87.7, abs=0.051)
+    # sin clima completo se conservan los códigos de ayer y los índices son NaN
+    assert [hoy[c][1] for c in ('ffmc', 'dmc', 'dc')] == [85.0, 6.0, 15.0]
+    assert all(np.isnan(hoy[i][1]) for i in ('isi', 'bui', 'fwi'))
+    # en abril el día es más corto en el sur: DMC y DC suben menos
+    assert hoy['dmc'][2] < hoy['dmc'][0] and hoy['dc'][2] < hoy['dc'][0]
+
+
+def test_clima_mediodia_lluvia_24h():
+    horas = np.datetime64('2025-09-14T00', 'h') + np.arange(48).astype('timedelta64[h]')
+    lluvia = np.zeros((1, 48))
+    lluvia[0, 12] = 5.0   # mediodía del 14: fuera de la ventana del 15 (el 14 no tiene 24 h previas)
+    lluvia[0, 13] = 2.0   # 13 h del 14: primera hora de la ventana del 15
+    lluvia[0, 36] = 1.0   # mediodía del 15: última hora de su ventana
+    temperatura = np.arange(48, dtype=np.float64)[None, :]
+    dias, entradas = fwi.clima_mediodia(horas, temperatura, temperatura, temperatura, lluvia)
+    assert dias.tolist() == [np.datetime64('2025-09-15', 'D')]
+    assert entradas['temperatura'].tolist() == [[36.0]]
+    assert entradas['lluvia'].tolist() == [[3.0]]
+
+
+def test_estado_guardar_y_obtener(tmp_path):
+    ruta = str(tmp_path / 'fwi_estado.npz')
+    estado = fwi.EstadoFWI()
+    ids = fwi.ids_puntos([-31.4, -30.98], [-64.2, -64.49])
+    estado.registrar(ids, {'ffmc': [88.0, 90.0], 'dmc': [20.0, 25.0], 'dc': [300.0, 350.0]},
+                     np.array(['2025-09-14', '2025-09-15'], dtype='datetime64[D]'))
+    estado.guardar(ruta)
+
+    codigos, fechas = fwi.EstadoFWI.cargar(ruta).obtener([ids[1], 'desconocido'])
+    assert codigos['dc'].tolist() == [350.0, fwi.DC_INICIAL]
+    assert fechas[0] == np.datetime64('2025-09-15') and np.isnat(fechas[1])
@@ -0,0 +1,51 @@
+"""Índice espacio-temporal sobre instantáneas escritas en una carpeta temporal."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from indice_historico import IndiceHistorico
+
+PUNTOS = {'La Cumbre': (-30.98, -64.49), 'Mina Clavero': (-31.72, -65.00), 'Córdoba': (-31.42, -64.19)}
+
+
+def escribir_instantanea(carpeta, fecha, riesgos, mtime):
+    filas = [{'nombre': n, 'lat': PUNTOS[n][0], 'lon': PUNTOS[n][1], 'riesgo_final': r,
+              'nivel': 'ALTO' if r > 50 else 'BAJO', 'cobertura': 1.0} for n, r in riesgos.items()]
+    ruta = os.path.join(carpeta, f"riesgo_{fecha}.csv")
+    pd.DataFrame(filas).to_csv(ruta, index=False)
+    os.utime(ruta, (mtime, mtime))  # mtime explícito: el índice detecta cambios por mtime
+
+
+@pytest.fixture
+def carpeta(tmp_path):
+    escribir_instantanea(tmp_path, '2025-09-14', {'La Cumbre': 40.0, 'Mina Clavero': 20.0, 'Córdoba': 30.0}, 1000)
+    escribir_instantanea(tmp_path, '2025-09-15', {'La Cumbre': 60.0, 'Mina Clavero': 25.0, 'Córdoba': 35.0}, 1000)
+    return str(tmp_path)
+
+
+def test_serie_y_persistencia(carpeta):
+    indice = IndiceHistorico.cargar(carpeta)
+    dias, riesgo = indice.serie(-30.98, -64.49)
+    assert dias.tolist() == list(np.array(['2025-09-14', '2025-09-15'], dtype='datetime64[D]'))
+    np.testing.assert_array_equal(riesgo, [40.0, 60.0])
+
+    recargado = IndiceHistorico.cargar(carpeta)
+    np.testing.assert_array_equal(recargado.claves, indice.claves)
+    assert recargado.actualizar() == 0
+
+
+def test_reescritura_quita_puntos_ausentes(carpeta):
+    IndiceHistorico.cargar(carpeta)
+    # se re-escribe el 15 sin Mina Clavero y con otro valor para La Cumbre
+    escribir_instantanea(carpeta, '2025-09-15', {'La Cumbre': 80.0, 'Córdoba': 35.0}, 2000)
+
+    indice = IndiceHistorico.cargar(carpeta)
+    dia = indice.consultar(desde='2025-09-15', hasta='2025-09-15')
+    assert sorted(indice.nombres[dia['ids']].tolist()) == ['Córdoba', 'La Cumbre']
+    assert indice.serie(-30.98, -64.49, desde='2025-09-15')[1].tolist() == [80.0]
+    # el día anterior no se toca
+    dias, riesgo = indice.serie(-31.72, -65.00)
+    assert dias.tolist() == [np.datetime64('2025-09-14', 'D')] and riesgo.tolist() == [20.0]
+    assert np.all(np.diff(indice.claves) > 0)
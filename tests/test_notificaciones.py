@@ -0,0 +1,221 @@
+"""
+Pruebas del despacho de notificaciones contra servidores locales: un webhook
+(http.server) y un SMTP mínimo (socketserver), ambos en puertos efímeros.
+"""
+import asyncio
+import json
+import socketserver
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import notificaciones
+from notificaciones import LimiteTasa, Destino, armar_lotes, filtrar_enfriamiento, despachar, clave_estado
+
+AHORA = datetime(2025, 9, 15, 12, 0, tzinfo=timezone.utc)
+
+
+def cambio(i, lat=-31.0, lon=-64.3, nivel='CRÍTICO', tipo='escalamiento'):
+    return {'fecha': '2025-09-15', 'id': f"p{i}", 'nombre': f"Punto {i}", 'lat': lat, 'lon': lon,
+            'tipo': tipo, 'nivel_anterior': 'ALTO', 'nivel': nivel, 'riesgo_anterior': 70.0, 'riesgo': 80.0}
+
+
+@pytest.fixture(autouse=True)
+def reintentos_rapidos(monkeypatch):
+    monkeypatch.setattr(notificaciones, 'ESPERA_REINTENTO_S', 0.01)
+
+
+# --- servidores de prueba ---
+
+class _Webhook(BaseHTTPRequestHandler):
+    def do_POST(self):
+        cuerpo = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        servidor = self.server
+        if servidor.fallas_pendientes > 0:
+            servidor.fallas_pendientes -= 1
+            self.send_response(503)
+        else:
+            servidor.recibidos.append(cuerpo)
+            self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def webhook():
+    servidor = HTTPServer(('127.0.0.1', 0), _Webhook)
+    servidor.recibidos, servidor.fallas_pendientes = [], 0
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+class _SMTP(socketserver.StreamRequestHandler):
+    def handle(self):
+        responder = lambda texto: self.wfile.write((texto + '\r\n').encode())
+        responder('220 stub')
+        en_datos, lineas = False, []
+        for linea in self.rfile:
+            linea = linea.decode('utf-8').rstrip('\r\n')
+            if en_datos:
+                if linea == '.':
+                    self.server.mensajes.append('\n'.join(lineas))
+                    en_datos, lineas = False, []
+                    responder('250 ok')
+                else:
+                    lineas.append(linea)
+            elif linea.upper().startswith('DATA'):
+                en_datos = True
+                responder('354 datos')
+            elif linea.upper().startswith('QUIT'):
+                responder('221 chau')
+                return
+            else:
+                responder('250 ok')
+
+
+@pytest.fixture
+def smtp():
+    servidor = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _SMTP)
+    servidor.daemon_threads = True
+    servidor.mensajes = []
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+# --- lotes y enfriamiento ---
+
+def test_armar_lotes_por_bbox_y_tamanio():
+    cambios = [cambio(i, lat=-31.0) for i in range(5)] + [cambio(9, lat=-34.0)]
+    regiones = {'sierras': {'bbox': [-64.5, -31.5, -64.0, -30.5]}, 'provincia': {}}
+    lotes = armar_lotes(cambios, regiones, tamanio_lote=2)
+    por_region = {}
+    for region, alertas in lotes:
+        por_region.setdefault(region, []).append([a['id'] for a in alertas])
+    assert por_region['sierras'] == [['p0', 'p1'], ['p2', 'p3'], ['p4']]
+    assert sum(len(l) for l in por_region['provincia']) == 6
+    assert all(len(l) <= 2 for l in por_region['provincia'])
+    assert armar_lotes([], regiones) == []
+
+
+def test_filtrar_enfriamiento_por_destino():
+    cambios = [cambio(1), cambio(2), cambio(3, nivel='ALTO')]
+    estado = {
+        clave_estado('web', cambios[0]): (AHORA - timedelta(hours=1)).isoformat(),   # reciente
+        clave_estado('web', cambios[1]): (AHORA - timedelta(hours=13)).isoformat(),  # vencido
+        clave_estado('mail', cambios[2]): AHORA.isoformat(),                         # otro destino
+    }
+    vigentes = filtrar_enfriamiento(cambios, estado, AHORA, 'web', horas=12)
+    assert [c['id'] for c in vigentes] == ['p2', 'p3']
+    assert [c['id'] for c in filtrar_enfriamiento(cambios, estado, AHORA, 'mail', horas=12)] == ['p1', 'p2']
+
+
+def test_region_con_destino_no_definido():
+    config = {'regiones': {'sierras': {'destinos': ['fantasma']}},
+              'destinos': {'archivo': {'tipo': 'archivo', 'ruta': 'x.jsonl'}}}
+    with pytest.raises(ValueError, match="fantasma"):
+        asyncio.run(despachar([cambio(1)], config, ahora=AHORA))
+
+
+# --- concurrencia y reintentos ---
+
+def test_limite_tasa():
+    async def medir():
+        limite = LimiteTasa(20, rafaga=1)
+        inicio = time.monotonic()
+        for _ in range(11):
+            await limite.adquirir()
+        return time.monotonic() - inicio
+
+    # la primera ficha es inmediata, las 10 siguientes a 20/s
+    assert 0.45 <= asyncio.run(medir()) < 1.0
+
+
+class _DestinoQueFalla(Destino):
+    def __init__(self, fallas, **opciones):
+        super().__init__('prueba', tasa_por_segundo=1000, **opciones)
+        self.fallas = fallas
+        self.intentos = []
+
+    async def _enviar(self, lote):
+        self.intentos.append(time.monotonic())
+        if len(self.intentos) <= self.fallas:
+            raise ConnectionError("caído")
+
+
+def test_reintentos_con_backoff():
+    async def enviar(destino):
+        return await destino.enviar({'alertas': []})
+
+    recupera = _DestinoQueFalla(fallas=2)
+    assert asyncio.run(enviar(recupera)) is True
+    esperas = [b - a for a, b in zip(recupera.intentos, recupera.intentos[1:])]
+    assert len(esperas) == 2 and esperas[1] >= 1.8 * esperas[0]  # 0.01 s y luego 0.02 s
+
+    nunca = _DestinoQueFalla(fallas=99)
+    assert asyncio.run(enviar(nunca)) is False
+    assert len(nunca.intentos) == notificaciones.REINTENTOS
+
+
+def test_destino_abstracto():
+    with pytest.raises(TypeError):
+        Destino('sin_envio')
+
+
+# --- extremo a extremo contra los servidores locales ---
+
+def test_webhook_smtp_y_archivo(webhook, smtp, tmp_path):
+    webhook.fallas_pendientes = 1  # el primer POST falla y se reintenta
+    salida = tmp_path / 'notificaciones.jsonl'
+    config = {
+        'tamanio_lote': 2, 'tamanio_cola': 1,
+        'regiones': {'sierras': {'bbox': [-64.5, -31.5, -64.0, -30.5], 'destinos': ['web', 'mail']},
+                     'provincia': {'destinos': ['archivo']}},
+        'destinos': {
+            'web': {'tipo': 'webhook', 'url': f"http://127.0.0.1:{webhook.server_port}/alertas"},
+            'mail': {'tipo': 'smtp', 'host': '127.0.0.1', 'puerto': smtp.server_address[1],
+                     'remitente': 'geoalertar@example.org', 'para': ['guardia@example.org']},
+            'archivo': {'tipo': 'archivo', 'ruta': str(salida)},
+        },
+    }
+    cambios = [cambio(i) for i in range(3)] + [cambio(8, lat=-34.0), cambio(9, tipo='desescalamiento')]
+    enviados, estado = asyncio.run(despachar(cambios, config, ahora=AHORA))
+
+    # el lote reintentado llega después: el orden entre lotes no está garantizado
+    assert sorted(a['id'] for lote in webhook.recibidos for a in lote['alertas']) == ['p0', 'p1', 'p2']
+    asuntos = sorted(m.splitlines()[0] for m in smtp.mensajes)
+    assert [a.split(': ')[2][0] for a in asuntos] == ['1', '2']
+    assert all(a.startswith('Subject: GeoAlertAR [sierras]: ') for a in asuntos)
+    assert sum(len(json.loads(l)['alertas']) for l in salida.read_text(encoding='utf-8').splitlines()) == 4
+    assert len(enviados) == 2 + 2 + 2
+    assert clave_estado('web', cambios[0]) in estado and clave_estado('archivo', cambios[3]) in estado
+
+    # dentro del enfriamiento no se repite nada
+    enviados, _ = asyncio.run(despachar(cambios, config, estado, ahora=AHORA + timedelta(hours=1)))
+    assert enviados == []
+
+
+def test_enfriamiento_no_marca_destinos_que_fallaron(tmp_path):
+    config = {
+        'regiones': {'provincia': {'destinos': ['archivo', 'web']}},
+        'destinos': {'archivo': {'tipo': 'archivo', 'ruta': str(tmp_path / 'n.jsonl')},
+                     'web': {'tipo': 'webhook', 'url': 'http://127.0.0.1:9/inalcanzable'}},
+    }
+    _, estado = asyncio.run(despachar([cambio(1)], config, ahora=AHORA))
+    assert clave_estado('archivo', cambio(1)) in estado
+    assert clave_estado('web', cambio(1)) not in estado
+
+    # la corrida siguiente vuelve a intentar el webhook, no el archivo
+    config['destinos']['web'] = {'tipo': 'archivo', 'ruta': str(tmp_path / 'web.jsonl')}
+    enviados, _ = asyncio.run(despachar([cambio(1)], config, estado, ahora=AHORA + timedelta(minutes=5)))
+    assert [nombre for nombre, _ in enviados] == ['web']
@@ -0,0 +1,68 @@
+"""Formato binario del mapa: exportar_binario y leer_binario deben ser inversas."""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from publicacion import exportar_binario, leer_binario, FACTORES_BINARIO, SIN_DATO_UINT8
+from riesgo_vectorizado import NIVEL_SIN_DATOS
+
+
+@pytest.fixture
+def resultados():
+    # 5 puntos: el empaquetado de niveles (4 por byte) queda con un byte incompleto
+    return pd.DataFrame({
+        'nombre': ['La Cumbre', 'Mina Clavero', 'Córdoba', 'Villa Carlos Paz', None],
+        'lat': [-30.982345, -31.72, -31.416668, -31.4241, -32.0],
+        'lon': [-64.490012, -65.0, -64.183334, -64.4978, -63.5],
+        'ndvi': [0.2134, np.nan, 0.5, 0.31, 0.1],
+        'nbr': [0.1, 0.2, np.nan, 0.3, 0.4],
+        'lst_celsius': [31.26, 28.0, 25.5, 30.0, np.nan],
+        'precip_60d_mm': [12.34, 80.0, 140.0, 5.0, 0.0],
+        'humedad_min': [18.0, 40.0, 55.0, 22.0, np.nan],
+        'viento_max_kmh': [45.55, 20.0, 10.0, 38.0, np.nan],
+        'riesgo_final': [80.4, 49.5, 12.6, 62.5, 88.0],
+        'nivel': ['CRÍTICO', 'MODERADO', 'BAJO', 'ALTO', NIVEL_SIN_DATOS],
+        'cobertura': [1.0, 0.95, 0.95, 1.0, 0.4],
+    })
+
+
+def test_ida_y_vuelta(resultados, tmp_path):
+    ruta = str(tmp_path / 'riesgo.bin')
+    exportar_binario(resultados, ruta)
+    leido = leer_binario(ruta)
+
+    n = len(resultados)
+    assert os.path.getsize(ruta) == 16 + 8 * n + 2 * n * len(FACTORES_BINARIO) + n + (n + 3) // 4 + \
+        len('\n'.join(resultados['nombre'].fillna('')).encode('utf-8'))
+    assert leido['nombre'].tolist() == ['La Cumbre', 'Mina Clavero', 'Córdoba', 'Villa Carlos Paz', '']
+    assert leido['nivel'].tolist() == resultados['nivel'].tolist()
+    np.testing.assert_allclose(leido['lat'], resultados['lat'], atol=1e-6)
+    np.testing.assert_allclose(leido['lon'], resultados['lon'], atol=1e-6)
+
+    # riesgo a enteros (mitades al par, como np.rint); sin datos suficientes -> NaN aunque haya riesgo
+    np.testing.assert_array_equal(leido['riesgo_final'], [80, 50, 13, 62, np.nan])
+
+    for columna, escala in FACTORES_BINARIO.items():
+        esperado = np.rint(resultados[columna].to_numpy() * escala) / escala
+        np.testing.assert_array_equal(leido[columna], esperado)  # NaN viaja como -32768 y vuelve NaN
+
+
+def test_centinela_de_riesgo(resultados, tmp_path):
+    ruta = str(tmp_path / 'riesgo.bin')
+    resultados.loc[1, 'riesgo_final'] = np.nan   # sin riesgo, aunque el nivel diga otra cosa
+    exportar_binario(resultados, ruta)
+    with open(ruta, 'rb') as f:
+        datos = f.read()
+    n = len(resultados)
+    inicio = 16 + 8 * n + 2 * n * len(FACTORES_BINARIO)
+    assert list(datos[inicio:inicio + n]) == [80, SIN_DATO_UINT8, 13, 62, SIN_DATO_UINT8]
+    assert leer_binario(ruta)['nivel'].tolist()[1] == NIVEL_SIN_DATOS
+
+
+def test_archivo_ajeno(tmp_path):
+    ruta = tmp_path / 'otro.bin'
+    ruta.write_bytes(b'PK\x03\x04' + bytes(12))
+    with pytest.raises(ValueError):
+        leer_binario(str(ruta))
@@ -0,0 +1,220 @@
+"""
+GeoAlertAR - Validación del índice contra focos de calor históricos.
+
+Cruza las instantáneas de `historico/` (riesgo_YYYY-MM-DD.csv) con archivos de
+focos activos tipo FIRMS (MODIS/VIIRS, columnas latitude, longitude, acq_date)
+descargados a disco. Una observación (punto, día) es positiva si hubo un foco a
+menos de `radio_km` del punto entre ese día y `horizonte_dias` después.
+
+Métricas:
+- AUC (ROC) del riesgo_final como predictor, por Mann-Whitney, y la curva ROC.
+- Por nivel: observaciones, tasa de acierto (fracción con foco) y, para cada
+  foco, con cuántos días de anticipación el punto ya estaba en ese nivel o más.
+
+El cruce espacial usa una grilla de celdas del tamaño del radio (sólo se
+comparan focos de las 9 celdas vecinas) y el temporal, claves (punto, día)
+ordenadas con `searchsorted`: todo vectorizado, apto para años de focos. Las
+observaciones salen de `indice_historico.IndiceHistorico`, ya ordenadas.
+
+    python validacion.py --focos firms/*.csv --radio-km 5 --horizonte 3
+"""
+import argparse
+import glob
+import json
+
+import numpy as np
+import pandas as pd
+
+from indice_historico import IndiceHistorico, clave_punto_dia, haversine_km, ORDEN_NIVELES, CARPETA_HISTORICO
+
+ARCHIVO_VALIDACION = 'docs/validacion.json'
+RADIO_KM = 5.0
+HORIZONTE_DIAS = 3
+ANTICIPACION_MAXIMA_DIAS = 14
+# VIIRS usa l/n/h; MODIS, 0-100. Se descartan los de baja confianza.
+CONFIANZA_MINIMA_MODIS = 30
+CONFIANZA_DESCARTADA_VIIRS = ('l', 'low')
+
+
+def cargar_focos(rutas):
+    """Concatena CSVs FIRMS -> DataFrame (lat, lon, dia); descarta focos de baja confianza."""
+    partes = []
+    for ruta in rutas:
+        df = pd.read_csv(ruta)
+        if 'confidence' in df:
+            confianza = df['confidence']
+            numerica = pd.to_numeric(confianza, errors='coerce')
+            descartar = numerica.lt(CONFIANZA_MINIMA_MODIS) | confianza.astype(str).str.lower().isin(CONFIANZA_DESCARTADA_VIIRS)
+            df = df[~descartar]
+        partes.append(pd.DataFrame({
+            'lat': df['latitude'].to_numpy(dtype=np.float64),
+            'lon': df['longitude'].to_numpy(dtype=np.float64),
+            'dia': pd.to_datetime(df['acq_date']).to_numpy().astype('datetime64[D]'),
+        }))
+    if not partes:
+        return pd.DataFrame({'lat': [], 'lon': [], 'dia': np.array([], dtype='datetime64[D]')})
+    return pd.concat(partes, ignore_index=True)
+
+
+def focos_por_punto(lat_puntos, lon_puntos, focos, radio_km=RADIO_KM):
+    """
+    Pares (punto, día de foco) con algún foco a menos de `radio_km`, como
+    arrays (ids, dias) sin repetir. Grilla de celdas de lado >= radio.
+    """
+    if len(focos) == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype='datetime64[D]')
+    lado = radio_km / 111.0
+    # la longitud se achica con cos(lat): celdas más anchas en grados para no perder vecinos
+    lado_lon = lado / max(np.cos(np.radians(np.max(np.abs(lat_puntos)))), 1e-6)
+    celda_foco = (np.floor(focos['lat'].to_numpy() / lado).astype(np.int64) << 32) + \
+        np.floor(focos['lon'].to_numpy() / lado_lon).astype(np.int64)
+    orden = np.argsort(celda_foco, kind='stable')
+    celdas_ordenadas = celda_foco[orden]
+
+    fila = np.floor(lat_puntos / lado).astype(np.int64)
+    columna = np.floor(lon_puntos / lado_lon).astype(np.int64)
+    ids, indices = [], []
+    for dfila in (-1, 0, 1):
+        for dcol in (-1, 0, 1):
+            vecina = ((fila + dfila) << 32) + (columna + dcol)
+            desde = np.searchsorted(celdas_ordenadas, vecina, 'left')
+            hasta = np.searchsorted(celdas_ordenadas, vecina, 'right')
+            cantidad = hasta - desde
+            ids.append(np.repeat(np.arange(len(lat_puntos)), cantidad))
+            # índices desde[i]..hasta[i] concatenados sin bucle de Python
+            inicio = np.repeat(desde - np.cumsum(cantidad) + cantidad, cantidad)
+            indices.append(orden[inicio + np.arange(cantidad.sum())])
+    ids = np.concatenate(ids)
+    indices = np.concatenate(indices)
+
+    cerca = haversine_km(lat_puntos[ids], lon_puntos[ids],
+                          focos['lat'].to_numpy()[indices], focos['lon'].to_numpy()[indices]) <= radio_km
+    pares = np.unique(np.column_stack([ids[cerca], focos['dia'].to_numpy().astype('datetime64[D]')[indices[cerca]].astype(np.int64)]), axis=0)
+    return pares[:, 0], pares[:, 1].astype('datetime64[D]')
+
+
+def etiquetar(ids_obs, dias_obs, ids_foco, dias_foco, horizonte_dias=HORIZONTE_DIAS):
+    """True donde hubo foco en el punto entre el día de la observación y `horizonte_dias` después."""
+    claves_foco = np.sort(clave_punto_dia(ids_foco, dias_foco))
+    desde = clave_punto_dia(ids_obs, dias_obs)
+    hasta = desde + horizonte_dias
+    return np.searchsorted(claves_foco, hasta, 'right') > np.searchsorted(claves_foco, desde, 'left')
+
+
+def rangos_promedio(valores):
+    """Rangos 1..n con empates promediados (equivale a scipy.stats.rankdata)."""
+    orden = np.argsort(valores, kind='mergesort')
+    ordenados = valores[orden]
+    nuevos = np.r_[True, ordenados[1:] != ordenados[:-1]]
+    grupo = np.cumsum(nuevos) - 1
+    inicios = np.flatnonzero(nuevos)
+    finales = np.r_[inicios[1:], len(valores)]
+    promedio = (inicios + finales + 1) / 2.0
+    rangos = np.empty(len(valores))
+    rangos[orden] = promedio[grupo]
+    return rangos
+
+
+def auc_mann_whitney(puntaje, etiqueta):
+    """Área bajo la curva ROC = P(puntaje positivo > puntaje negativo)."""
+    positivos = int(etiqueta.sum())
+    negativos = len(etiqueta) - positivos
+    if positivos == 0 or negativos == 0:
+        return float('nan')
+    rangos = rangos_promedio(puntaje)
+    return float((rangos[etiqueta].sum() - positivos * (positivos + 1) / 2) / (positivos * negativos))
+
+
+def curva_roc(puntaje, etiqueta, umbrales=np.arange(0, 101, 5)):
+    """Tasa de verdaderos/falsos positivos para `puntaje >= umbral`."""
+    alerta = puntaje[None, :] >= np.asarray(umbrales)[:, None]
+    tpr = (alerta & etiqueta).sum(axis=1) / max(etiqueta.sum(), 1)
+    fpr = (alerta & ~etiqueta).sum(axis=1) / max((~etiqueta).sum(), 1)
+    return pd.DataFrame({'umbral': umbrales, 'tpr': tpr, 'fpr': fpr})
+
+
+def anticipacion_por_nivel(ids_obs, dias_obs, orden_obs, ids_foco, dias_foco,
+                           anticipacion_maxima=ANTICIPACION_MAXIMA_DIAS):
+    """
+    Para cada nivel L y cada foco (punto, día): días entre la primera
+    observación del punto con nivel >= L en la ventana previa y el foco.
+    Las observaciones deben venir ordenadas por (punto, día), como en el índice.
+    Devuelve {nivel: array de anticipaciones (NaN = no anticipado)}.
+    """
+    hasta = clave_punto_dia(ids_foco, dias_foco)
+    desde = hasta - anticipacion_maxima
+    resultado = {}
+    for nivel, orden in ORDEN_NIVELES.items():
+        alcanzado = orden_obs >= orden
+        claves = clave_punto_dia(ids_obs[alcanzado], dias_obs[alcanzado])
+        primero = np.searchsorted(claves, desde, 'left')
+        hay = primero < np.searchsorted(claves, hasta, 'right')
+        dias = np.full(len(hasta), np.nan)
+        dias[hay] = hasta[hay] - claves[primero[hay]]
+        resultado[nivel] = dias
+    return resultado
+
+
+def validar(indice, focos, radio_km=RADIO_KM, horizonte_dias=HORIZONTE_DIAS, desde=None, hasta=None):
+    """Métricas de validación (dict serializable a JSON) y curva ROC sobre [desde, hasta]."""
+    observaciones = indice.consultar(desde=desde, hasta=hasta)
+    ids, dias, orden = observaciones['ids'], observaciones['dias'], observaciones['orden_nivel']
+    riesgo = observaciones['riesgo_final'].astype(np.float64)
+    if len(ids) == 0:
+        raise ValueError("No hay observaciones en el período pedido")
+
+    ids_foco, dias_foco = focos_por_punto(indice.lat, indice.lon, focos, radio_km)
+    # sólo focos dentro del período cubierto por el histórico
+    en_periodo = (dias_foco >= dias.min()) & (dias_foco <= dias.max() + horizonte_dias)
+    ids_foco, dias_foco = ids_foco[en_periodo], dias_foco[en_periodo]
+    etiqueta = etiquetar(ids, dias, ids_foco, dias_foco, horizonte_dias)
+
+    con_dato = ~np.isnan(riesgo)
+    anticipaciones = anticipacion_por_nivel(ids, dias, orden, ids_foco, dias_foco)
+    niveles = {}
+    for nivel, valor in ORDEN_NIVELES.items():
+        en_nivel = orden == valor
+        anticipado = anticipaciones[nivel][~np.isnan(anticipaciones[nivel])]
+        niveles[nivel] = {
+            'observaciones': int(en_nivel.sum()),
+            'con_foco': int((en_nivel & etiqueta).sum()),
+            'tasa_acierto': float(etiqueta[en_nivel].mean()) if en_nivel.any() else None,
+            'focos_anticipados': float(len(anticipado) / len(ids_foco)) if len(ids_foco) else None,
+            'anticipacion_mediana_dias': float(np.median(anticipado)) if len(anticipado) else None,
+        }
+    metricas = {
+        'periodo': [str(dias.min()), str(dias.max())],
+        'puntos': int(len(np.unique(ids))),
+        'observaciones': int(len(ids)),
+        'focos_cercanos': int(len(ids_foco)),
+        'positivas': int(etiqueta.sum()),
+        'radio_km': radio_km,
+        'horizonte_dias': horizonte_dias,
+        'auc': auc_mann_whitney(riesgo[con_dato], etiqueta[con_dato]),
+        'niveles': niveles,
+    }
+    return metricas, curva_roc(riesgo[con_dato], etiqueta[con_dato])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GeoAlertAR - validación contra focos de calor históricos")
+    parser.add_argument('--focos', nargs='+', required=True, help="CSVs de focos activos (FIRMS MODIS/VIIRS)")
+    parser.add_argument('--historico', default=CARPETA_HISTORICO, help="carpeta con riesgo_YYYY-MM-DD.csv")
+    parser.add_argument('--radio-km', type=float, default=RADIO_KM)
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE_DIAS,
+                        help="días posteriores a la observación en los que un foco cuenta como acierto")
+    parser.add_argument('--desde', metavar='YYYY-MM-DD', help="inicio del período evaluado")
+    parser.add_argument('--hasta', metavar='YYYY-MM-DD', help="fin del período evaluado")
+    parser.add_argument('--salida', default=ARCHIVO_VALIDACION)
+    args = parser.parse_args()
+
+    rutas = [ruta for patron in args.focos for ruta in sorted(glob.glob(patron))]
+    indice = IndiceHistorico.cargar(args.historico)
+    focos = cargar_focos(rutas)
+    print(f"🔎 {len(indice.claves)} observaciones contra {len(focos)} focos de {len(rutas)} archivos...")
+
+    metricas, roc = validar(indice, focos, args.radio_km, args.horizonte, args.desde, args.hasta)
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump({**metricas, 'roc': roc.to_dict(orient='list')}, f, indent=2, ensure_ascii=False)
+    print(f"✅ AUC = {metricas['auc']:.3f} ({metricas['positivas']} observaciones con foco). Detalle en '{args.salida}'.")
+    print(pd.DataFrame(metricas['niveles']).T.to_string())